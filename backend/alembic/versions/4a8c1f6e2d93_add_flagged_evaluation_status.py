@@ -0,0 +1,34 @@
+"""add_flagged_evaluation_status
+
+Revision ID: 4a8c1f6e2d93
+Revises: e71b5d08c9a4
+Create Date: 2026-10-19 20:05:31.447912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a8c1f6e2d93'
+down_revision = 'e71b5d08c9a4'
+branch_labels = None
+depends_on = None
+
+_STATUSES = ('PENDING', 'APPROVED', 'REJECTED')
+
+
+def upgrade() -> None:
+    # Statut posé par l'analyse anti-spam (app.services.spam_detection)
+    op.alter_column('evaluations', 'status',
+                    existing_type=sa.Enum(*_STATUSES, name='evaluationstatus'),
+                    type_=sa.Enum('PENDING', 'APPROVED', 'FLAGGED', 'REJECTED', name='evaluationstatus'),
+                    existing_nullable=False)
+
+
+def downgrade() -> None:
+    op.execute("UPDATE evaluations SET status = 'PENDING' WHERE status = 'FLAGGED'")
+    op.alter_column('evaluations', 'status',
+                    existing_type=sa.Enum('PENDING', 'APPROVED', 'FLAGGED', 'REJECTED', name='evaluationstatus'),
+                    type_=sa.Enum(*_STATUSES, name='evaluationstatus'),
+                    existing_nullable=False)
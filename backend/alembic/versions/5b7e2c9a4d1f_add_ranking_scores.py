@@ -0,0 +1,99 @@
+"""add_ranking_scores
+
+Revision ID: 5b7e2c9a4d1f
+Revises: 0d3105b23f4e
+Create Date: 2026-10-19 10:12:31.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+from app.core.ranking import bayesian_average, wilson_lower_bound
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e2c9a4d1f'
+down_revision = '0d3105b23f4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Totaux des évaluations et score de classement des services
+    op.add_column('services', sa.Column('evaluation_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('services', sa.Column('score_sum', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('services', sa.Column('ranking_score', sa.Float(), nullable=True))
+    op.create_index('ix_services_ranking_score', 'services', ['ranking_score'])
+    op.create_index('ix_services_category_ranking_score', 'services', ['category', 'ranking_score'])
+
+    # Compteurs de votes et score de Wilson des évaluations
+    op.add_column('evaluations', sa.Column('helpful_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('evaluations', sa.Column('unhelpful_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('evaluations', sa.Column('helpfulness', sa.Float(), nullable=False, server_default='0'))
+
+    # Remplissage des totaux à partir des données existantes (les évaluations
+    # rejetées ne comptent pas, comme dans crud_service.recompute_service_ratings)
+    op.execute("""
+        UPDATE services SET
+            evaluation_count = (SELECT COUNT(*) FROM evaluations
+                                WHERE evaluations.service_id = services.id AND evaluations.status <> 'REJECTED'),
+            score_sum = COALESCE((SELECT SUM(score) FROM evaluations
+                                  WHERE evaluations.service_id = services.id AND evaluations.status <> 'REJECTED'), 0)
+    """)
+    op.execute("""
+        UPDATE evaluations SET
+            helpful_count = (SELECT COUNT(*) FROM evaluation_votes
+                             WHERE evaluation_votes.evaluation_id = evaluations.id AND is_helpful = 1),
+            unhelpful_count = (SELECT COUNT(*) FROM evaluation_votes
+                               WHERE evaluation_votes.evaluation_id = evaluations.id AND is_helpful = 0)
+    """)
+
+    # Scores calculés en Python (mêmes fonctions que l'application)
+    bind = op.get_bind()
+    totals = bind.execute(sa.text(
+        "SELECT category, SUM(score_sum), SUM(evaluation_count) FROM services GROUP BY category"
+    )).fetchall()
+    total_sum = sum(float(row[1] or 0) for row in totals)
+    total_count = sum(int(row[2] or 0) for row in totals)
+    global_prior = total_sum / total_count if total_count else settings.RANKING_DEFAULT_PRIOR
+    priors = {
+        row[0]: float(row[1]) / int(row[2])
+        for row in totals
+        if row[2] and int(row[2]) >= settings.RANKING_PRIOR_MIN_EVALUATIONS
+    }
+
+    services = bind.execute(sa.text("SELECT id, category, score_sum, evaluation_count FROM services")).fetchall()
+    if services:
+        bind.execute(
+            sa.text("UPDATE services SET ranking_score = :ranking_score WHERE id = :id"),
+            [
+                {"id": row[0], "ranking_score": bayesian_average(
+                    float(row[2] or 0), int(row[3] or 0), priors.get(row[1], global_prior)
+                )}
+                for row in services
+            ]
+        )
+
+    voted = bind.execute(sa.text(
+        "SELECT id, helpful_count, unhelpful_count FROM evaluations WHERE helpful_count + unhelpful_count > 0"
+    )).fetchall()
+    if voted:
+        bind.execute(
+            sa.text("UPDATE evaluations SET helpfulness = :helpfulness WHERE id = :id"),
+            [
+                {"id": row[0], "helpfulness": wilson_lower_bound(int(row[1]), int(row[1]) + int(row[2]))}
+                for row in voted
+            ]
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('evaluations', 'helpfulness')
+    op.drop_column('evaluations', 'unhelpful_count')
+    op.drop_column('evaluations', 'helpful_count')
+    op.drop_index('ix_services_category_ranking_score', table_name='services')
+    op.drop_index('ix_services_ranking_score', table_name='services')
+    op.drop_column('services', 'ranking_score')
+    op.drop_column('services', 'score_sum')
+    op.drop_column('services', 'evaluation_count')
@@ -0,0 +1,35 @@
+"""add_helpfulness_index
+
+Revision ID: 8d2f6a3c1e57
+Revises: 5b7e2c9a4d1f
+Create Date: 2026-10-19 14:03:48.551926
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f6a3c1e57'
+down_revision = '5b7e2c9a4d1f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Double précision : les curseurs de pagination comparent la valeur stockée
+    op.alter_column('evaluations', 'helpfulness',
+               existing_type=sa.Float(),
+               type_=sa.Float(precision=53),
+               existing_nullable=False,
+               existing_server_default='0')
+    op.create_index('ix_evaluations_service_id_helpfulness', 'evaluations', ['service_id', 'helpfulness'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_evaluations_service_id_helpfulness', table_name='evaluations')
+    op.alter_column('evaluations', 'helpfulness',
+               existing_type=sa.Float(precision=53),
+               type_=sa.Float(),
+               existing_nullable=False,
+               existing_server_default='0')
@@ -0,0 +1,41 @@
+"""add_outbox_events
+
+Revision ID: 9c2f47d1e8b6
+Revises: b5e0d27a4c18
+Create Date: 2026-10-19 22:03:17.512846
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.utils import UUID
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2f47d1e8b6'
+down_revision = 'b5e0d27a4c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Événements écrits dans la même transaction que l'entité, livrés par app.core.outbox
+    op.create_table(
+        'outbox_events',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+        sa.Column('topic', sa.String(length=100), nullable=False),
+        sa.Column('aggregate_id', UUID(length=36), nullable=True),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('available_at', sa.DateTime(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_events_pending', 'outbox_events', ['processed_at', 'available_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_events_pending', table_name='outbox_events')
+    op.drop_table('outbox_events')
@@ -0,0 +1,64 @@
+"""unique_evaluation_votes
+
+Revision ID: b5e0d27a4c18
+Revises: 4a8c1f6e2d93
+Create Date: 2026-10-19 21:12:48.905317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.ranking import wilson_lower_bound
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e0d27a4c18'
+down_revision = '4a8c1f6e2d93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    # Doublons laissés par l'ancien chemin lecture-puis-écriture : on garde le vote le plus récent
+    # (timestamp peut être NULL : un tel vote passe pour le plus ancien, l'id départage les égalités)
+    affected = [evaluation_id for (evaluation_id,) in bind.execute(sa.text(
+        "SELECT DISTINCT evaluation_id FROM evaluation_votes WHERE voter_id IS NOT NULL "
+        "GROUP BY evaluation_id, voter_id HAVING COUNT(*) > 1"
+    ))]
+    op.execute("""
+        DELETE older FROM evaluation_votes older
+        JOIN evaluation_votes newer
+          ON newer.evaluation_id = older.evaluation_id AND newer.voter_id = older.voter_id
+         AND (COALESCE(newer.timestamp, '1970-01-01') > COALESCE(older.timestamp, '1970-01-01')
+              OR (COALESCE(newer.timestamp, '1970-01-01') = COALESCE(older.timestamp, '1970-01-01')
+                  AND newer.id > older.id))
+    """)
+
+    # Compteurs des évaluations concernées
+    for start in range(0, len(affected), 1000):
+        counts = bind.execute(
+            sa.text(
+                "SELECT evaluation_id, SUM(is_helpful), SUM(1 - is_helpful) FROM evaluation_votes "
+                "WHERE evaluation_id IN :ids GROUP BY evaluation_id"
+            ).bindparams(sa.bindparam("ids", expanding=True)),
+            {"ids": affected[start:start + 1000]}
+        ).fetchall()
+        bind.execute(
+            sa.text(
+                "UPDATE evaluations SET helpful_count = :helpful, unhelpful_count = :unhelpful, "
+                "helpfulness = :helpfulness WHERE id = :id"
+            ),
+            [
+                {"id": evaluation_id, "helpful": int(helpful), "unhelpful": int(unhelpful),
+                 "helpfulness": wilson_lower_bound(int(helpful), int(helpful) + int(unhelpful))}
+                for evaluation_id, helpful, unhelpful in counts
+            ]
+        )
+
+    op.create_unique_constraint('uq_evaluation_votes_evaluation_voter', 'evaluation_votes', ['evaluation_id', 'voter_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_evaluation_votes_evaluation_voter', 'evaluation_votes', type_='unique')
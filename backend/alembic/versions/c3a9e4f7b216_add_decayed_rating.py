@@ -0,0 +1,62 @@
+"""add_decayed_rating
+
+Revision ID: c3a9e4f7b216
+Revises: 8d2f6a3c1e57
+Create Date: 2026-10-19 16:41:07.218634
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.ranking import decay_factor
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a9e4f7b216'
+down_revision = '8d2f6a3c1e57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('services', sa.Column('decayed_weight', sa.Float(precision=53), nullable=False, server_default='0'))
+    op.add_column('services', sa.Column('decayed_score_sum', sa.Float(precision=53), nullable=False, server_default='0'))
+    op.add_column('services', sa.Column('decay_reference', sa.DateTime(), nullable=True))
+    op.add_column('services', sa.Column('decayed_rating', sa.Float(), nullable=True))
+    op.create_index('ix_services_decayed_rating', 'services', ['decayed_rating'])
+
+    # Remplissage : une passe sur les notes (hors évaluations rejetées), cumul par service en Python
+    now = datetime.utcnow()
+    bind = op.get_bind()
+    totals = {}
+    rows = bind.execution_options(stream_results=True).execute(sa.text(
+        "SELECT service_id, score, COALESCE(timestamp, created_at) FROM evaluations WHERE status <> 'REJECTED'"
+    ))
+    for service_id, score, evaluated_at in rows:
+        weight = decay_factor(now - evaluated_at) if evaluated_at is not None else 1.0
+        total = totals.setdefault(service_id, [0.0, 0.0])
+        total[0] += weight
+        total[1] += weight * score
+
+    if totals:
+        bind.execute(
+            sa.text(
+                "UPDATE services SET decayed_weight = :weight, decayed_score_sum = :score_sum, "
+                "decay_reference = :now, decayed_rating = :rating WHERE id = :id"
+            ),
+            [
+                {"id": service_id, "weight": weight, "score_sum": score_sum, "now": now,
+                 "rating": score_sum / weight if weight > 1e-12 else None}
+                for service_id, (weight, score_sum) in totals.items()
+            ]
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_services_decayed_rating', table_name='services')
+    op.drop_column('services', 'decayed_rating')
+    op.drop_column('services', 'decay_reference')
+    op.drop_column('services', 'decayed_score_sum')
+    op.drop_column('services', 'decayed_weight')
@@ -0,0 +1,49 @@
+"""add_jobs
+
+Revision ID: d4a7e2c91f35
+Revises: 9c2f47d1e8b6
+Create Date: 2026-10-19 23:10:42.208519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.utils import UUID
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a7e2c91f35'
+down_revision = '9c2f47d1e8b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # File des tâches de fond (app.core.jobs), exécutées par app.scripts.job_worker
+    op.create_table(
+        'jobs',
+        sa.Column('id', UUID(length=36), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', 'CANCELLED', name='jobstatus'),
+                  nullable=False),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('created_by', UUID(length=36), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('run_at', sa.DateTime(), nullable=False),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.Column('worker_id', sa.String(length=100), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_status_run_at', 'jobs', ['status', 'run_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_jobs_status_run_at', table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,69 @@
+"""add_moderation_queue
+
+Revision ID: e71b5d08c9a4
+Revises: c3a9e4f7b216
+Create Date: 2026-10-19 18:22:54.630195
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+from app.models.utils import UUID
+
+
+# revision identifiers, used by Alembic.
+revision = 'e71b5d08c9a4'
+down_revision = 'c3a9e4f7b216'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Réputation des signaleurs
+    op.add_column('users', sa.Column('reports_accepted', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('users', sa.Column('reports_rejected', sa.Integer(), nullable=False, server_default='0'))
+
+    # Résolution des signalements ; les signalements existants ont le poids a priori
+    op.add_column('evaluation_reports', sa.Column('weight', sa.Float(precision=53), nullable=False,
+                                                  server_default=str(settings.MODERATION_REPUTATION_PRIOR)))
+    op.add_column('evaluation_reports', sa.Column('resolution', sa.Enum('accepted', 'rejected', name='reportresolution'),
+                                                  nullable=True))
+    op.add_column('evaluation_reports', sa.Column('resolved_at', sa.DateTime(), nullable=True))
+    op.add_column('evaluation_reports', sa.Column('resolved_by', UUID(length=36), nullable=True))
+    op.create_foreign_key('fk_er_resolved_by', 'evaluation_reports', 'users', ['resolved_by'], ['id'], ondelete='SET NULL')
+
+    # File de modération
+    op.add_column('evaluations', sa.Column('unresolved_report_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('evaluations', sa.Column('report_weight', sa.Float(precision=53), nullable=False, server_default='0'))
+    op.add_column('evaluations', sa.Column('first_reported_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_evaluations_moderation_queue', 'evaluations', [
+        sa.text('unresolved_report_count DESC'), sa.text('report_weight DESC'), 'first_reported_at', 'id'
+    ])
+
+    op.execute("""
+        UPDATE evaluations SET
+            unresolved_report_count = (SELECT COUNT(*) FROM evaluation_reports
+                                       WHERE evaluation_reports.evaluation_id = evaluations.id
+                                       AND evaluation_reports.resolved = 0),
+            report_weight = COALESCE((SELECT SUM(weight) FROM evaluation_reports
+                                      WHERE evaluation_reports.evaluation_id = evaluations.id
+                                      AND evaluation_reports.resolved = 0), 0),
+            first_reported_at = (SELECT MIN(created_at) FROM evaluation_reports
+                                 WHERE evaluation_reports.evaluation_id = evaluations.id
+                                 AND evaluation_reports.resolved = 0)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_evaluations_moderation_queue', table_name='evaluations')
+    op.drop_column('evaluations', 'first_reported_at')
+    op.drop_column('evaluations', 'report_weight')
+    op.drop_column('evaluations', 'unresolved_report_count')
+    op.drop_constraint('fk_er_resolved_by', 'evaluation_reports', type_='foreignkey')
+    op.drop_column('evaluation_reports', 'resolved_by')
+    op.drop_column('evaluation_reports', 'resolved_at')
+    op.drop_column('evaluation_reports', 'resolution')
+    op.drop_column('evaluation_reports', 'weight')
+    op.drop_column('users', 'reports_rejected')
+    op.drop_column('users', 'reports_accepted')
@@ -0,0 +1,34 @@
+"""add_applied_outbox_events
+
+Revision ID: f2b8c5d17a40
+Revises: d4a7e2c91f35
+Create Date: 2026-10-20 09:41:05.318274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8c5d17a40'
+down_revision = 'd4a7e2c91f35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Événements de l'outbox déjà appliqués par chaque consommateur (livraison au moins une fois)
+    op.create_table(
+        'applied_outbox_events',
+        sa.Column('consumer', sa.String(length=100), nullable=False),
+        sa.Column('event_id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=False,
+                  nullable=False),
+        sa.Column('applied_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('consumer', 'event_id')
+    )
+    op.create_index('ix_applied_outbox_events_applied_at', 'applied_outbox_events', ['applied_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_applied_outbox_events_applied_at', table_name='applied_outbox_events')
+    op.drop_table('applied_outbox_events')
@@ -7,9 +7,12 @@ from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
 from app.core.config import settings
+from app.core.password_pool import PasswordHashPoolBusy
 from app.core.security import create_access_token
-from app.crud.crud_auth import create_user, get_user_by_email, verify_password
-from app.models.user import User
+from app.crud.crud_auth import (
+    DuplicateUserError, create_user, get_user_by_email, update_password_hash,
+    verify_password_and_update
+)
 from app.schemas.user import UserCreate, UserOut
 from app.schemas.token import Token
 
@@ -24,36 +27,16 @@ def create_user_route(
     """
     Create new user
     """
-    # Check if user already exists
-    user = get_user_by_email(db, email=user_in.email)
-    if user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Check if username already exists
-    existing_username = db.query(User).filter(User.username == user_in.username).first()
-    if existing_username:
+    # Insert directly and let the unique indexes on email/username reject
+    # duplicates, instead of checking each one with a separate query
+    try:
+        return create_user(db, user=user_in)
+    except DuplicateUserError as e:
+        detail = "Email already registered" if e.field == "email" else "Username already taken"
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already taken"
+            detail=detail
         )
-    
-    # Create new user - Pas de try/except pour voir les vraies erreurs
-    # Affichage du contenu de user_in pour le débogage
-    import traceback
-    print(f"\n\nTentative de création d'utilisateur avec: {user_in.dict()}\n\n")
-    
-    try:
-        user = create_user(db, user=user_in)
-        return user
-    except Exception as e:
-        # Afficher l'erreur complète avec traceback
-        print(f"\n\nERREUR LORS DE LA CRÉATION D'UTILISATEUR:\n{str(e)}\n")
-        traceback.print_exc()
-        # Relancer l'exception brute pour voir l'erreur réelle
-        raise
 
 
 @router.post("/login", response_model=Token)
@@ -78,7 +61,8 @@ def login_access_token(
             )
         
         # Verify password
-        if not verify_password(form_data.password, user.hashed_password):
+        is_valid, new_hash = verify_password_and_update(form_data.password, user.hashed_password)
+        if not is_valid:
             print(f"Password verification failed for: {form_data.username}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -86,6 +70,10 @@ def login_access_token(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        # Transparently upgrade hashes made with an older work factor
+        if new_hash:
+            update_password_hash(db, user, new_hash)
+        
         # Check if user is active
         if not user.is_active:
             raise HTTPException(
@@ -104,8 +92,8 @@ def login_access_token(
             "access_token": token,
             "token_type": "bearer",
         }
-    except HTTPException:
-        # Re-raise HTTP exceptions
+    except (HTTPException, PasswordHashPoolBusy):
+        # Re-raise HTTP exceptions and hashing overload (mapped to 503)
         raise
     except Exception as e:
         # Log unexpected errors
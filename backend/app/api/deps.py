@@ -1,20 +1,26 @@
-from typing import Generator, Optional
+import base64
+import json
+from typing import Any, Generator, List, Optional, Sequence
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from app.database import SessionLocal, get_db
 from app.models.user import User, UserRole
 from app.core import security
+from app.core.auth_cache import CachedUser, token_user_cache
 from app.core.config import settings
+from app.core.responses import dumps
 from app.crud.crud_auth import get_user_by_id
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+# Same scheme for routes that also serve anonymous requests
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False)
 
 
 def get_current_user(
@@ -22,8 +28,22 @@ def get_current_user(
 ) -> User:
     """
     Validate access token and return current user
+
+    Tokens seen recently are served from an in-process cache without
+    re-verifying the signature or querying the database; columns other
+    than id, role and is_active are loaded lazily on first access.
     """
-    user_id = security.verify_token(token)
+    cached = token_user_cache.get(token)
+    if cached is not None:
+        if not cached.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Inactive user"
+            )
+        return _user_from_snapshot(db, cached)
+    
+    payload = security.decode_access_token(token)
+    user_id = payload.get("sub") if payload else None
     if not user_id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -38,6 +58,10 @@ def get_current_user(
             detail="User not found"
         )
     
+    token_user_cache.set(
+        token, user.id, user.role, bool(user.is_active), token_exp=payload.get("exp")
+    )
+    
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -47,15 +71,70 @@ def get_current_user(
     return user
 
 
+def get_optional_current_user(
+    db: Session = Depends(get_db), token: Optional[str] = Depends(optional_oauth2_scheme)
+) -> Optional[User]:
+    """
+    Return the current user, or None for an anonymous request
+
+    A token that is sent but invalid is still rejected.
+    """
+    if not token:
+        return None
+    return get_current_user(db, token)
+
+
+def _user_from_snapshot(db: Session, cached: CachedUser) -> User:
+    """Attach a User built from a cached snapshot to the session without a query"""
+    user = User(id=cached.id, role=cached.role, is_active=cached.is_active)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
 def get_current_admin_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
     """
     Validate that the current user is an admin
     """
-    if current_user.role != UserRole.ADMIN:
+    if current_user.role != UserRole.admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated `fields=` projection for list endpoints
+    
+    Returns None when no projection is requested (all fields).
+    """
+    if not fields:
+        return None
+    
+    requested = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed fields: {', '.join(allowed)}"
+        )
+    return requested or None
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row of a page as an opaque keyset cursor"""
+    return base64.urlsafe_b64encode(dumps(list(values))).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
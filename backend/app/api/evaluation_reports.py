@@ -1,19 +1,23 @@
 from typing import Any, List, Optional
 from datetime import datetime
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Path, Response
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_current_admin_user, get_db
+from app.api.deps import get_current_user, get_current_admin_user, get_db, encode_cursor, decode_cursor
+from app.core.responses import FastJSONResponse
+from app.crud.crud_evaluation import get_evaluation_by_id
 from app.crud.crud_evaluation_report import (
-    create_evaluation_report, get_evaluation_reports,
-    get_evaluation_report_by_id, resolve_evaluation_report
+    create_evaluation_report, get_evaluation_reports, get_moderation_queue,
+    get_evaluation_report_by_id, resolve_evaluation_report, resolve_evaluation_reports
 )
 from app.models.user import User
 from app.models.evaluation_report import ReportReason
 from app.schemas.evaluation import (
     EvaluationReportCreate, EvaluationReportOut,
-    EvaluationReportWithDetails, EvaluationReportPagination
+    EvaluationReportWithDetails, EvaluationReportPagination,
+    EvaluationReportBatchResolve, EvaluationReportBatchResult, ModerationQueuePage
 )
 
 router = APIRouter()
@@ -28,6 +32,9 @@ def create_report(
     """
     Create a new evaluation report.
     """
+    if not get_evaluation_by_id(db, report_in.evaluation_id):
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+    
     report = create_evaluation_report(db, report_in, current_user.id)
     return report
 
@@ -38,8 +45,8 @@ def list_reports(
     current_user: User = Depends(get_current_admin_user),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(10, ge=1, le=100, description="Items per page"),
-    evaluation_id: Optional[int] = Query(None, description="Filter by evaluation ID"),
-    reporter_id: Optional[int] = Query(None, description="Filter by reporter ID"),
+    evaluation_id: Optional[UUID] = Query(None, description="Filter by evaluation ID"),
+    reporter_id: Optional[UUID] = Query(None, description="Filter by reporter ID"),
     reason: Optional[ReportReason] = Query(None, description="Filter by report reason"),
     resolved: Optional[int] = Query(None, description="Filter by resolution status (0: pending, 1: accepted, 2: rejected)"),
     sort_by: str = Query("timestamp", description="Sort by field"),
@@ -48,6 +55,8 @@ def list_reports(
     """
     List evaluation reports.
     Admin only.
+    
+    Use GET /evaluation-reports/queue to work through pending reports.
     """
     skip = (page - 1) * limit
     reports, total = get_evaluation_reports(
@@ -70,9 +79,51 @@ def list_reports(
     }
 
 
+@router.get("/queue", response_model=ModerationQueuePage)
+def read_moderation_queue(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+    limit: int = Query(50, ge=1, le=200, description="Items per page"),
+    after: Optional[str] = Query(None, description="next_cursor of the previous page")
+):
+    """
+    Evaluations with pending reports, in moderation order.
+    Admin only.
+    
+    Most reported evaluations first, then those reported by the most reliable
+    reporters (share of their past reports that were accepted), then the
+    oldest. Pass `next_cursor` back as `after` to get the next page.
+    """
+    try:
+        items, next_key = get_moderation_queue(db, limit=limit, after=decode_cursor(after) if after else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return FastJSONResponse({
+        "items": items,
+        "next_cursor": encode_cursor(next_key) if next_key else None
+    })
+
+
+@router.post("/resolve", response_model=EvaluationReportBatchResult)
+def resolve_reports(
+    resolve_in: EvaluationReportBatchResolve,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Resolve many reports at once, in a single transaction.
+    Admin only.
+    
+    Accepting a report rejects its evaluation and upholds the other pending
+    reports on it. Unknown or already resolved reports are skipped.
+    """
+    return resolve_evaluation_reports(db, resolve_in.report_ids, resolve_in.resolution, current_user.id)
+
+
 @router.get("/{report_id}", response_model=EvaluationReportWithDetails)
 def get_report(
-    report_id: int = Path(..., description="The ID of the report to retrieve"),
+    report_id: UUID = Path(..., description="The ID of the report to retrieve"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
@@ -89,7 +140,7 @@ def get_report(
 @router.post("/{report_id}/resolve", response_model=EvaluationReportOut)
 def resolve_report(
     resolution: int = Query(..., ge=1, le=2, description="Resolution (1: accept, 2: reject)"),
-    report_id: int = Path(..., description="The ID of the report to resolve"),
+    report_id: UUID = Path(..., description="The ID of the report to resolve"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
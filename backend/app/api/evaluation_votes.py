@@ -1,12 +1,16 @@
 from typing import Any, List, Optional, Dict
 from datetime import datetime
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Path, Response
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, get_db
+from app.core.config import settings
 from app.crud.crud_evaluation_vote import (
     create_or_update_evaluation_vote, delete_evaluation_vote,
+    buffer_evaluation_vote, buffer_evaluation_vote_removal,
+    get_user_votes_for_evaluations, MAX_VOTE_LOOKUP_EVALUATIONS,
     get_evaluation_votes, get_evaluation_vote_counts,
     get_user_vote_for_evaluation
 )
@@ -26,6 +30,7 @@ def vote_on_evaluation(
     """
     Vote on an evaluation (helpful or not helpful).
     If the user has already voted, the vote will be updated.
+    With VOTE_WRITE_BEHIND the vote is buffered and written shortly after.
     """
     # Vérifier que l'évaluation existe
     evaluation = get_evaluation_by_id(db, vote_in.evaluation_id)
@@ -39,20 +44,46 @@ def vote_on_evaluation(
             detail="You cannot vote on your own evaluation"
         )
     
+    if settings.VOTE_WRITE_BEHIND:
+        return buffer_evaluation_vote(db, vote_in, current_user.id)
+    
     vote, is_new = create_or_update_evaluation_vote(db, vote_in, current_user.id)
     return vote
 
 
+@router.get("/my-votes", response_model=Dict[UUID, bool])
+def get_my_votes(
+    evaluation_ids: List[UUID] = Query(..., description="Evaluation IDs (repeat the parameter for each evaluation)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the current user's votes on many evaluations at once.
+    
+    Returns {evaluation_id: is_helpful} for the evaluations the user voted on.
+    """
+    if len(evaluation_ids) > MAX_VOTE_LOOKUP_EVALUATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_VOTE_LOOKUP_EVALUATIONS} evaluations can be requested at once"
+        )
+    
+    return get_user_votes_for_evaluations(db, evaluation_ids, current_user.id)
+
+
 @router.delete("/{evaluation_id}", status_code=status.HTTP_204_NO_CONTENT, response_class=Response)
 def remove_vote(
-    evaluation_id: int = Path(..., description="The ID of the evaluation to remove vote from"),
+    evaluation_id: UUID = Path(..., description="The ID of the evaluation to remove vote from"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Remove a vote from an evaluation.
     """
-    success, message = delete_evaluation_vote(db, evaluation_id, current_user.id)
+    if settings.VOTE_WRITE_BEHIND:
+        success, message = buffer_evaluation_vote_removal(db, evaluation_id, current_user.id)
+    else:
+        success, message = delete_evaluation_vote(db, evaluation_id, current_user.id)
     if not success:
         raise HTTPException(
             status_code=404 if message == "Vote not found" else 400,
@@ -62,7 +93,7 @@ def remove_vote(
 
 @router.get("/{evaluation_id}/counts", response_model=Dict[str, int])
 def get_vote_counts(
-    evaluation_id: int = Path(..., description="The ID of the evaluation to get vote counts for"),
+    evaluation_id: UUID = Path(..., description="The ID of the evaluation to get vote counts for"),
     db: Session = Depends(get_db)
 ):
     """
@@ -78,7 +109,7 @@ def get_vote_counts(
 
 @router.get("/{evaluation_id}/my-vote", response_model=Optional[EvaluationVoteOut])
 def get_my_vote(
-    evaluation_id: int = Path(..., description="The ID of the evaluation to get your vote for"),
+    evaluation_id: UUID = Path(..., description="The ID of the evaluation to get your vote for"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -3,29 +3,43 @@ from datetime import datetime
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Path, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_current_admin_user, get_db
+from app.api.deps import (
+    get_current_user, get_current_admin_user, get_optional_current_user, get_db,
+    parse_fields, encode_cursor, decode_cursor
+)
+from app.core.config import settings
+from app.core.export import EXPORT_MEDIA_TYPES, gzip_stream, stream_csv, stream_ndjson
+from app.core.responses import FastJSONResponse
 from app.crud.crud_evaluation import (
-    create_evaluation, get_evaluations, get_evaluation_by_id, 
+    EVALUATION_EXPORT_COLUMNS, EVALUATION_LIST_FIELDS, iter_evaluation_export_rows,
+    create_evaluation, get_evaluation_rows, get_evaluation_by_id, 
     update_evaluation, delete_evaluation, get_evaluation_stats,
-    check_user_has_evaluated_service
+    check_user_has_evaluated_service, bulk_moderate_evaluations
 )
 from app.crud.crud_service import get_service_by_id
 from app.crud.crud_evaluation_criteria import (
     create_evaluation_criteria_score, get_evaluation_criteria_scores,
     calculate_overall_score
 )
+from app.database import SessionLocal
 from app.models.user import User
 from app.models.evaluation import EvaluationStatus
 from app.schemas.evaluation import (
     EvaluationCreate, EvaluationUpdate, EvaluationOut, 
     EvaluationWithDetails, EvaluationPagination, EvaluationStats,
-    SortOrder, DetailedEvaluationCreate, EvaluationCriteriaScoreOut
+    SortOrder, ExportFormat, DetailedEvaluationCreate, EvaluationCriteriaScoreOut,
+    ServiceRatingStats, EvaluationBulkModeration, EvaluationBulkModerationResult
 )
+from app.services.rating_analytics import MAX_BULK_STATS_SERVICES, get_bulk_rating_stats
 
 router = APIRouter()
 
+# Orderings of GET /{service_id}/list, all newest or most useful first
+LIST_SORT_FIELDS = ("timestamp", "helpfulness")
+
 
 @router.post("/detailed/", response_model=EvaluationWithDetails, status_code=status.HTTP_201_CREATED)
 def create_detailed_evaluation(
@@ -141,13 +155,24 @@ def read_evaluations(
     date_to: Optional[datetime] = Query(None, description="Filter to date (ISO format)"),
     status: Optional[EvaluationStatus] = Query(None, description="Filter by evaluation status"),
     include_votes: bool = Query(True, description="Include vote counts"),
+    include_my_vote: bool = Query(False, description="Include the authenticated user's vote as my_vote"),
     sort_by: str = Query("timestamp", description="Field to sort by"),
-    sort_order: SortOrder = Query(SortOrder.DESC, description="Sort order (asc or desc)")
+    sort_order: SortOrder = Query(SortOrder.DESC, description="Sort order (asc or desc)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,score,service"),
+    current_user: Optional[User] = Depends(get_optional_current_user)
 ) -> Any:
     """
     Retrieve evaluations with pagination and filtering.
+    
+    `fields` restricts each item to the listed fields; related data (user,
+    service, vote counts) is only queried when requested. With
+    `include_my_vote` each item gets the caller's vote, joined in the same
+    query (null when anonymous or not voted).
     """
-    evaluations, total = get_evaluations(
+    requested_fields = parse_fields(fields, EVALUATION_LIST_FIELDS)
+    # Rows are fetched as plain dicts already shaped like EvaluationPagination
+    # and rendered directly, skipping ORM loading and response_model validation
+    evaluations, total = get_evaluation_rows(
         db=db,
         page=page,
         limit=limit,
@@ -161,17 +186,90 @@ def read_evaluations(
         status=status,
         sort_by=sort_by,
         sort_order=sort_order.value,
-        include_user=True,
-        include_service=True,
-        include_votes=include_votes
+        include_votes=include_votes,
+        fields=requested_fields,
+        voter_id=current_user.id if include_my_vote and current_user is not None else None
     )
     
-    return {
+    if include_my_vote and current_user is None:
+        for item in evaluations:
+            item["my_vote"] = None
+    
+    return FastJSONResponse({
         "total": total,
         "page": page,
         "limit": limit,
         "items": evaluations
-    }
+    })
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_evaluations(
+    current_user: User = Depends(get_current_admin_user),
+    format: ExportFormat = Query(ExportFormat.CSV, description="Export format (csv or ndjson)"),
+    gzip: bool = Query(False, description="Compress the export with gzip"),
+    service_id: Optional[UUID] = Query(None, description="Filter by service ID"),
+    user_id: Optional[UUID] = Query(None, description="Filter by user ID"),
+    min_score: Optional[float] = Query(None, ge=0, le=10, description="Minimum score"),
+    max_score: Optional[float] = Query(None, ge=0, le=10, description="Maximum score"),
+    date_from: Optional[datetime] = Query(None, description="Filter from date (ISO format)"),
+    date_to: Optional[datetime] = Query(None, description="Filter to date (ISO format)"),
+    status: Optional[EvaluationStatus] = Query(None, description="Filter by evaluation status")
+) -> Any:
+    """
+    Stream all evaluations matching the filters as CSV or NDJSON.
+    
+    Rows are read with a server-side cursor and encoded as they arrive, so
+    memory use does not depend on the size of the export. Admin only.
+    """
+    filters = dict(
+        service_id=service_id,
+        user_id=user_id,
+        min_score=min_score,
+        max_score=max_score,
+        date_from=date_from,
+        date_to=date_to,
+        status=status
+    )
+    encode = stream_csv if format == ExportFormat.CSV else stream_ndjson
+    
+    def generate():
+        # The request session may be closed before the body is fully sent
+        db = SessionLocal()
+        try:
+            rows = iter_evaluation_export_rows(db, batch_size=settings.EXPORT_BATCH_SIZE, **filters)
+            yield from encode(EVALUATION_EXPORT_COLUMNS, rows)
+        finally:
+            db.close()
+    
+    filename = f"evaluations.{format.value}"
+    body = generate()
+    media_type = EXPORT_MEDIA_TYPES[format.value]
+    if gzip:
+        filename += ".gz"
+        body = gzip_stream(body)
+        media_type = "application/gzip"
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/moderate", response_model=EvaluationBulkModerationResult)
+def moderate_evaluations(
+    moderation: EvaluationBulkModeration,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+) -> Any:
+    """
+    Approve or reject evaluations in bulk, by ID list and/or by filter.
+    
+    Only evaluations in `current_status` (pending by default) are changed,
+    and the rating of each affected service is recomputed once. Admin only.
+    """
+    return bulk_moderate_evaluations(db, moderation)
 
 
 @router.get("/{service_id}/list", response_model=List[EvaluationWithDetails])
@@ -180,11 +278,24 @@ def read_evaluations_by_service(
     db: Session = Depends(get_db),
     skip: int = Query(0, ge=0, description="Skip N items"),
     limit: int = Query(100, ge=1, le=100, description="Limit to N items"),
-    include_user: bool = Query(True, description="Include user details")
+    include_user: bool = Query(True, description="Include user details (always included, kept for compatibility)"),
+    sort_by: str = Query("timestamp", description="Sort by timestamp (newest first) or helpfulness (most useful first)"),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page")
 ) -> Any:
     """
     Retrieve evaluations for a specific service.
+    
+    When a full page is returned, the X-Next-Cursor response header holds a
+    cursor for the next one: pass it as `after` (instead of `skip`) to page
+    through the results with keyset pagination, which stays fast however
+    deep the page.
     """
+    if sort_by not in LIST_SORT_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid sort_by; allowed values: {', '.join(LIST_SORT_FIELDS)}"
+        )
+    
     # Check if service exists
     service = get_service_by_id(db, service_id=service_id)
     if not service:
@@ -194,16 +305,25 @@ def read_evaluations_by_service(
         )
     
     # Get evaluations for this service
-    evaluations, _ = get_evaluations(
-        db=db,
-        page=skip // limit + 1 if limit > 0 else 1,
-        limit=limit,
-        service_id=service_id,
-        include_user=include_user,
-        include_service=True
-    )
+    try:
+        evaluations, _ = get_evaluation_rows(
+            db=db,
+            page=skip // limit + 1 if limit > 0 else 1,
+            limit=limit,
+            service_id=service_id,
+            sort_by=sort_by,
+            sort_order="desc",
+            after=decode_cursor(after) if after else None,
+            include_total=False
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    return evaluations
+    headers = {}
+    if len(evaluations) == limit:
+        last = evaluations[-1]
+        headers["X-Next-Cursor"] = encode_cursor([last[sort_by], last["id"]])
+    return FastJSONResponse(evaluations, headers=headers)
 
 
 @router.get("/{evaluation_id}", response_model=EvaluationWithDetails)
@@ -314,15 +434,38 @@ def read_user_evaluations(
     """
     Get evaluations submitted by the current user.
     """
-    evaluations, _ = get_evaluations(
+    evaluations, _ = get_evaluation_rows(
         db=db,
         page=skip // limit + 1 if limit > 0 else 1,
         limit=limit,
-        user_id=current_user.id,
-        include_service=True
+        user_id=current_user.id
     )
     
-    return evaluations
+    return FastJSONResponse(evaluations)
+
+
+@router.get("/stats/bulk", response_model=List[ServiceRatingStats])
+def get_bulk_evaluation_stats(
+    service_ids: List[UUID] = Query(..., description="Service IDs (repeat the parameter for each service)"),
+    evaluation_status: Optional[EvaluationStatus] = Query(
+        None, alias="status", description="Only count evaluations with this status"
+    ),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    Get rating statistics for many services at once.
+    
+    Scores are loaded in a single query and percentiles, histograms,
+    confidence intervals, rolling averages and trend slopes are computed
+    for all services in one vectorized pass.
+    """
+    if len(service_ids) > MAX_BULK_STATS_SERVICES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_STATS_SERVICES} services can be requested at once"
+        )
+    
+    return get_bulk_rating_stats(db, service_ids, status=evaluation_status)
 
 
 @router.get("/stats/service/{service_id}", response_model=EvaluationStats)
@@ -0,0 +1,105 @@
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Path
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_admin_user, get_db
+from app.core.jobs import enqueue, registered_jobs
+from app.crud.crud_job import cancel_job, get_job_by_id, get_jobs
+from app.models.job import JobStatus
+from app.models.user import User
+from app.schemas.job import JobCreate, JobOut, JobPagination
+# Register the available jobs
+from app.services import maintenance_jobs  # noqa: F401
+
+router = APIRouter()
+
+
+@router.post("/", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
+def create_job(
+    job_in: JobCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+) -> Any:
+    """
+    Queue a background job, run by `python -m app.scripts.job_worker`.
+    Admin only.
+
+    Poll GET /jobs/{job_id} for its status and result.
+    """
+    try:
+        return enqueue(
+            db, job_in.name, job_in.payload,
+            run_at=job_in.run_at, max_attempts=job_in.max_attempts, created_by=current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/available", response_model=List[str])
+def list_available_jobs(
+    current_user: User = Depends(get_current_admin_user)
+) -> Any:
+    """
+    Names of the jobs that can be queued.
+    Admin only.
+    """
+    return sorted(registered_jobs())
+
+
+@router.get("/", response_model=JobPagination)
+def list_jobs(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+    page: int = Query(1, ge=1, description="Page number"),
+    limit: int = Query(20, ge=1, le=100, description="Items per page"),
+    job_status: Optional[JobStatus] = Query(None, alias="status", description="Filter by status"),
+    name: Optional[str] = Query(None, description="Filter by job name")
+) -> Any:
+    """
+    List jobs, most recent first.
+    Admin only.
+    """
+    skip = (page - 1) * limit
+    jobs, total = get_jobs(db, skip=skip, limit=limit, status=job_status, name=name)
+
+    return {
+        "items": jobs,
+        "total": total,
+        "page": page,
+        "limit": limit
+    }
+
+
+@router.get("/{job_id}", response_model=JobOut)
+def read_job(
+    job_id: UUID = Path(..., description="The ID of the job"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+) -> Any:
+    """
+    Get the status of a job.
+    Admin only.
+    """
+    job = get_job_by_id(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/{job_id}/cancel", response_model=Dict[str, str])
+def cancel_job_route(
+    job_id: UUID = Path(..., description="The ID of the job"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+) -> Any:
+    """
+    Cancel a job that has not started yet.
+    Admin only.
+    """
+    success, message = cancel_job(db, job_id)
+    if not success:
+        code = 404 if message == "Job not found" else status.HTTP_409_CONFLICT
+        raise HTTPException(status_code=code, detail=message)
+    return {"message": message}
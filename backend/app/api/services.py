@@ -1,12 +1,19 @@
+import asyncio
 from typing import Any, List, Optional, Dict
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.api.deps import get_db, get_current_user
-from app.crud.crud_service import get_services, get_service_by_id, create_service, update_service, delete_service
+from app.api.deps import get_db, get_current_user, parse_fields
+from app.core.config import settings
+from app.core.live_updates import LiveUpdatesFull, live_updates, sse_frame
+from app.core.responses import FastJSONResponse
+from app.crud.crud_service import SERVICE_LIST_FIELDS, SERVICE_RATING_FIELDS, SERVICE_SORT_COLUMNS, get_service_rows, get_service_by_id, create_service, update_service, delete_service
 from app.models.user import User
+from app.schemas.evaluation import SortOrder
 from app.schemas.service import ServiceOut, ServiceWithCountry, ServiceCreate, ServiceUpdate
 from app.services.google_places import GooglePlacesService
 
@@ -45,18 +52,32 @@ def read_services(
     skip: int = 0,
     limit: int = 100,
     include_country: bool = False,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,rating"),
+    category: Optional[str] = Query(None, description="Filter by service category"),
+    sort_by: Optional[str] = Query(None, description="Sort by name, rating, ranking or decayed_rating"),
+    sort_order: SortOrder = Query(SortOrder.DESC, description="Sort order (asc or desc)"),
 ) -> Any:
     """
-    Retrieve services with optional pagination and country details
+    Retrieve services with optional pagination
+    
+    `include_country` adds the country (id, name, region) to each item.
+    `fields` restricts each item to the listed fields.
+    `sort_by=ranking` orders by the confidence-adjusted ranking score, which
+    favours services with many good evaluations over a handful of perfect ones;
+    `sort_by=decayed_rating` favours recent evaluations.
     """
-    services = get_services(
-        db=db,
-        skip=skip,
-        limit=limit,
-        include_country=include_country
+    if sort_by is not None and sort_by not in SERVICE_SORT_COLUMNS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid sort_by; allowed values: {', '.join(SERVICE_SORT_COLUMNS)}"
+        )
+    
+    services = get_service_rows(
+        db=db, skip=skip, limit=limit, fields=parse_fields(fields, SERVICE_LIST_FIELDS),
+        category=category, sort_by=sort_by, sort_order=sort_order.value, include_country=include_country
     )
     
-    return services
+    return FastJSONResponse(services)
 
 
 @router.get("/{service_id}", response_model=ServiceWithCountry)
@@ -76,6 +97,63 @@ def read_service(
     return service
 
 
+@router.get("/{service_id}/live")
+async def stream_service_updates(
+    service_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Live updates of a service as Server-Sent Events:
+    - `rating`: the current rating, sent on connect and whenever it changes
+    - `evaluations`: evaluations approved since the last message
+    Updates are coalesced over LIVE_UPDATES_INTERVAL_MS.
+    """
+    if not settings.LIVE_UPDATES_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live updates are disabled")
+    # Registered (under the id stored in the outbox) before the rating is
+    # read, so that a change committed after the read reaches the viewer
+    key = str(service_id)
+    try:
+        queue = live_updates.subscribe(key)
+    except LiveUpdatesFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many live viewers, please try again later"
+        )
+    try:
+        service = await run_in_threadpool(get_service_by_id, db=db, service_id=service_id)
+        if not service:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Service not found"
+            )
+        rating = {name: getattr(service, name) for name in SERVICE_RATING_FIELDS}
+        # The session would otherwise hold a connection for the whole stream
+        await run_in_threadpool(db.close)
+    except BaseException:
+        live_updates.unsubscribe(key, queue)
+        raise
+    first = sse_frame("rating", {"service_id": key, **rating})
+
+    async def events():
+        try:
+            yield first
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), settings.LIVE_UPDATES_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+        finally:
+            live_updates.unsubscribe(key, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.put("/{service_id}", response_model=ServiceOut)
 def update_service_route(
     service_id: UUID,
@@ -4,16 +4,22 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_user, get_current_admin_user
+from app.api.deps import get_db, get_current_user, get_current_admin_user, parse_fields
+from app.core.password_pool import PasswordHashPoolBusy
+from app.core.responses import FastJSONResponse
 from app.crud.crud_auth import (
-    get_users, 
+    USER_LIST_FIELDS,
+    get_user_rows, 
     get_user_by_id, 
     get_user_by_email, 
     update_user, 
-    delete_user
+    delete_user,
+    bulk_update_users
 )
 from app.models.user import User, UserRole
-from app.schemas.user import UserOut, UserUpdate, UserPagination
+from app.schemas.user import (
+    UserOut, UserUpdate, UserPagination, UserBulkAction, UserBulkActionResult
+)
 
 router = APIRouter()
 
@@ -29,14 +35,16 @@ def read_users(
     role: Optional[str] = Query(None, description="Filter by role (admin or user)"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
     sort_by: str = Query("id", description="Sort by field"),
-    sort_order: str = Query("asc", description="Sort order (asc or desc)")
+    sort_order: str = Query("asc", description="Sort order (asc or desc)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,username")
 ) -> Any:
     """
     Retrieve users with pagination, filtering and sorting.
     
+    `fields` restricts each item to the listed fields.
     Only accessible to admin users.
     """
-    users, total = get_users(
+    users, total = get_user_rows(
         db=db,
         page=page,
         limit=limit,
@@ -44,15 +52,44 @@ def read_users(
         role=role,
         is_active=is_active,
         sort_by=sort_by,
-        sort_order=sort_order
+        sort_order=sort_order,
+        fields=parse_fields(fields, USER_LIST_FIELDS)
     )
     
-    return {
+    return FastJSONResponse({
         "items": users,
         "total": total,
         "page": page,
         "limit": limit
-    }
+    })
+
+
+@router.post("/bulk", response_model=UserBulkActionResult)
+def bulk_update_users_route(
+    *,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+    action_in: UserBulkAction
+) -> Any:
+    """
+    Deactivate or anonymize many users at once.
+    
+    Their evaluations, votes and reports are kept, reassigned to another
+    user or deleted according to `content`. Only accessible to admin users.
+    """
+    if current_user.id in action_in.user_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Admin users cannot include their own account"
+        )
+    
+    if action_in.reassign_to is not None and not get_user_by_id(db=db, user_id=action_in.reassign_to):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Reassignment target user not found"
+        )
+    
+    return bulk_update_users(db=db, action=action_in)
 
 
 @router.get("/{user_id}", response_model=UserOut)
@@ -69,7 +106,7 @@ def read_user(
     Admin users can access any user's information.
     """
     # Check if user is trying to access their own info or is an admin
-    if current_user.id != user_id and current_user.role != UserRole.ADMIN:
+    if current_user.id != user_id and current_user.role != UserRole.admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions to access this user's information"
@@ -100,14 +137,14 @@ def update_user_route(
     Admin users can update any user and change roles.
     """
     # Check if user is trying to update their own info or is an admin
-    if current_user.id != user_id and current_user.role != UserRole.ADMIN:
+    if current_user.id != user_id and current_user.role != UserRole.admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions to update this user"
         )
     
     # Regular users cannot change their role
-    if current_user.role != UserRole.ADMIN and user_in.role is not None:
+    if current_user.role != UserRole.admin and user_in.role is not None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Regular users cannot change their role"
@@ -146,6 +183,8 @@ def update_user_route(
                 detail="User not found"
             )
         return updated_user
+    except (HTTPException, PasswordHashPoolBusy):
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
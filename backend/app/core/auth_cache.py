@@ -0,0 +1,112 @@
+"""
+In-process cache of verified access tokens.
+
+Maps a bearer token to a small snapshot of the user it authenticates
+(id, role, is_active) so that authenticated requests can skip both the JWT
+verification and the user lookup query. Entries live for at most
+AUTH_CACHE_TTL_SECONDS (and never beyond the token expiry) and are dropped
+explicitly when the user is updated or deleted.
+
+The cache is per process: with several workers, another worker may serve a
+stale snapshot for up to the TTL after a change.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Set
+
+from app.core.config import settings
+
+
+class CachedUser(NamedTuple):
+    id: Any
+    role: Any
+    is_active: bool
+    expires_at: float
+
+
+class TokenUserCache:
+    """Thread-safe LRU cache of token -> CachedUser with a time-to-live"""
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, CachedUser]" = OrderedDict()
+        self._tokens_by_user: Dict[Any, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, token: str) -> Optional[CachedUser]:
+        """Return the cached snapshot for a token, or None if absent/expired"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(token)
+                return None
+            self._entries.move_to_end(token)
+            return entry
+
+    def set(
+        self,
+        token: str,
+        user_id: Any,
+        role: Any,
+        is_active: bool,
+        token_exp: Optional[float] = None
+    ) -> None:
+        """Cache a user snapshot for a token, bounded by the token expiry (unix time)"""
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, float(token_exp) - time.time())
+        if ttl <= 0:
+            return
+
+        entry = CachedUser(user_id, role, is_active, time.monotonic() + ttl)
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = entry
+            self._tokens_by_user.setdefault(user_id, set()).add(token)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate_user(self, user_id: Any) -> None:
+        """Drop every cached token of a user (after update, role change or deletion)"""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, token: str) -> None:
+        # Caller must hold the lock
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry.id]
+
+
+token_user_cache = TokenUserCache(
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    max_size=settings.AUTH_CACHE_MAX_SIZE
+)
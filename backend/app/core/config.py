@@ -11,12 +11,112 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ALGORITHM: str = "HS256"
+    # Token -> user snapshot cache used by get_current_user (0 disables it)
+    AUTH_CACHE_TTL_SECONDS: int = 30
+    AUTH_CACHE_MAX_SIZE: int = 10000
     
+    # Password hashing (see app.core.password_pool)
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2  # 0 hashes in the calling thread
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 16
+    
+    # Expose request metrics on /metrics (see app.core.metrics)
+    METRICS_ENABLED: bool = True
+    
+    # SQL profiler with N+1 detection (see app.core.query_profiler)
+    SQL_PROFILER_ENABLED: bool = False
+    SQL_PROFILER_ALLOW_HEADER: bool = False  # enable per request with "X-Profile-SQL: 1"
+    SQL_PROFILER_N_PLUS_ONE_THRESHOLD: int = 5
+    
+    # Rows fetched per round trip by streaming exports (see app.core.export)
+    EXPORT_BATCH_SIZE: int = 1000
+    
+    # Confidence-adjusted ranking (see app.core.ranking)
+    RANKING_PRIOR_WEIGHT: float = 10.0  # pseudo-evaluations at the category mean
+    RANKING_DEFAULT_PRIOR: float = 5.0  # prior when there are no evaluations at all
+    RANKING_PRIOR_MIN_EVALUATIONS: int = 50  # below this a category uses the global mean
+    RANKING_PRIOR_TTL_SECONDS: int = 300
+    # Half-life of an evaluation's weight in the decayed rating; after a change
+    # run app.scripts.recompute_rankings to rebuild the stored totals
+    RATING_DECAY_HALF_LIFE_DAYS: float = 365.0
+    
+    # Reporter reputation in the moderation queue: share of accepted reports,
+    # shrunk towards the prior as if this many reports had been filed
+    MODERATION_REPUTATION_PRIOR: float = 0.5
+    MODERATION_REPUTATION_PRIOR_WEIGHT: float = 4.0
+    
+    # Automatic spam screening of new evaluations (see app.services.spam_detection)
+    SPAM_DETECTION_ENABLED: bool = True
+    SPAM_INDEX_SIZE: int = 20000  # recent comments kept in the similarity index
+    SPAM_MIN_COMMENT_LENGTH: int = 30  # shorter comments are never duplicates
+    SPAM_SHINGLE_SIZE: int = 5  # bytes per shingle, at most 8
+    SPAM_MINHASH_PERMUTATIONS: int = 64
+    # Bands of the LSH index (must divide SPAM_MINHASH_PERMUTATIONS); comments are
+    # compared from a similarity of about (1 / bands) ** (bands / permutations)
+    SPAM_LSH_BANDS: int = 8
+    SPAM_SIMILARITY_THRESHOLD: float = 0.8  # estimated Jaccard similarity
+    SPAM_BURST_WINDOW_SECONDS: int = 600
+    SPAM_BURST_MAX_SUBMISSIONS: int = 5  # per user within the window
+    SPAM_TRACKED_USERS: int = 10000
+    SPAM_OUTLIER_MIN_EVALUATIONS: int = 20  # other evaluations needed to judge a score
+    SPAM_OUTLIER_DEVIATION: float = 6.0  # distance from the service mean, on 0-10
+    
+    # Write-behind vote buffering (see app.core.vote_buffer)
+    VOTE_WRITE_BEHIND: bool = False
+    VOTE_FLUSH_INTERVAL_MS: int = 200
+    VOTE_BUFFER_MAX_PENDING: int = 5000  # flush early beyond this many buffered votes
+
+    # Transactional outbox (see app.core.outbox): side effects of writes are
+    # applied by a dispatcher thread; disable it on processes that only serve
+    # requests as long as another process dispatches
+    OUTBOX_DISPATCHER_ENABLED: bool = True
+    OUTBOX_POLL_INTERVAL_MS: int = 200
+    OUTBOX_BATCH_SIZE: int = 200
+    OUTBOX_MAX_ATTEMPTS: int = 10  # failing events are then left for inspection
+    OUTBOX_RETRY_DELAY_SECONDS: float = 5.0  # doubled after each failed attempt
+    OUTBOX_RETENTION_HOURS: int = 24  # processed events are purged after this
+
+    # Background jobs (see app.core.jobs), run by python -m app.scripts.job_worker
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    # A running job not heard from for this long is handed to another worker
+    JOB_VISIBILITY_TIMEOUT_SECONDS: int = 300
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_DELAY_SECONDS: float = 30.0  # doubled after each failed attempt
+    JOB_RETENTION_DAYS: int = 30  # finished jobs are purged after this
+
+    # Live service updates over SSE (see app.core.live_updates)
+    LIVE_UPDATES_ENABLED: bool = True
+    LIVE_UPDATES_INTERVAL_MS: int = 1000  # updates of a service are coalesced over this window
+    LIVE_UPDATES_QUEUE_SIZE: int = 16  # messages kept for a slow viewer
+    LIVE_UPDATES_MAX_SUBSCRIBERS: int = 10000  # per process
+    LIVE_UPDATES_KEEPALIVE_SECONDS: int = 15
+
+    # Per-client rate limiting of expensive routes (see app.core.rate_limit)
+    RATE_LIMIT_ENABLED: bool = True
+    # "METHOD path" under API_V1_STR -> "count/second|minute|hour|day"
+    RATE_LIMITS: Dict[str, str] = {
+        "POST /auth/login": "10/minute",
+        "POST /auth/signup": "5/minute",
+        "POST /evaluations/": "20/minute",
+        "POST /evaluations/detailed/": "20/minute",
+        "POST /evaluation-votes/": "120/minute",
+        "POST /evaluation-reports/": "20/minute",
+    }
+    RATE_LIMIT_MAX_BUCKETS: int = 100000  # per process
+    # Identify clients by the first X-Forwarded-For address (behind a trusted proxy only)
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False
+
     # Database settings
     DATABASE_URL: Optional[str] = None
     
     # Google Places API settings
     GOOGLE_PLACES_API_KEY: Optional[str] = None
+    # live | record | replay | synthetic (see app.services.places_fixtures)
+    GOOGLE_PLACES_MODE: str = "live"
+    GOOGLE_PLACES_FIXTURES_PATH: str = "places_fixtures.jsonl.gz"
+    GOOGLE_PLACES_REPLAY_LATENCY_MS: float = 0.0
+    GOOGLE_PLACES_SYNTHETIC_COUNT: int = 1000
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,281 @@
+"""
+Database-backed background jobs.
+
+Heavy maintenance work (rating reconciliation, exports, Places imports...)
+is queued as rows of the jobs table with `enqueue` and run by worker
+processes started with ``python -m app.scripts.job_worker``; no broker is
+needed besides the application database.
+
+A worker claims the oldest due job (SKIP LOCKED, then a conditional UPDATE
+so that two workers never start the same attempt), leases it for
+JOB_VISIBILITY_TIMEOUT_SECONDS and renews the lease while the job runs. If
+the worker dies, the lease expires and another worker runs the job again:
+jobs must tolerate being re-run. A failed attempt is retried with an
+exponential backoff until the job's max_attempts is reached.
+"""
+import inspect
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.responses import dumps
+from app.models.job import Job, JobStatus
+
+
+logger = logging.getLogger(__name__)
+
+JobFunction = Callable[..., Optional[Dict[str, Any]]]
+
+_jobs: Dict[str, JobFunction] = {}
+
+
+def job(name: str) -> Callable[[JobFunction], JobFunction]:
+    """
+    Register a job function under a name
+
+    It is called as ``function(db, **payload)`` with a session of its own,
+    which it commits; the dict it returns is stored as the job's result.
+    """
+    def register(function: JobFunction) -> JobFunction:
+        _jobs[name] = function
+        return function
+    return register
+
+
+def registered_jobs() -> Dict[str, JobFunction]:
+    return dict(_jobs)
+
+
+def _to_json(value: Any) -> Any:
+    return json.loads(dumps(value))
+
+
+def enqueue(
+    db: Session,
+    name: str,
+    payload: Optional[Dict[str, Any]] = None,
+    run_at: Optional[datetime] = None,
+    max_attempts: Optional[int] = None,
+    created_by: Optional[UUID] = None
+) -> Job:
+    """
+    Queue a job and commit it
+
+    Raises ValueError for an unknown job name or a payload that does not
+    match the job function's parameters.
+    """
+    payload = payload or {}
+    function = _jobs.get(name)
+    if function is None:
+        raise ValueError(f"Unknown job: {name}")
+    try:
+        inspect.signature(function).bind(None, **payload)
+    except TypeError as e:
+        raise ValueError(f"Invalid payload for job {name}: {e}")
+
+    now = datetime.utcnow()
+    db_job = Job(
+        name=name,
+        payload=_to_json(payload),
+        status=JobStatus.QUEUED,
+        attempts=0,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        created_by=created_by,
+        created_at=now,
+        run_at=run_at or now,
+    )
+    try:
+        db.add(db_job)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    db.refresh(db_job)
+    return db_job
+
+
+class JobWorker:
+    """Claims due jobs one at a time and runs them"""
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None,
+                 worker_id: Optional[str] = None, visibility_timeout: Optional[int] = None,
+                 poll_interval: Optional[float] = None):
+        if session_factory is None:
+            from app.database import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.visibility_timeout = visibility_timeout or settings.JOB_VISIBILITY_TIMEOUT_SECONDS
+        self.poll_interval = poll_interval if poll_interval is not None else settings.JOB_POLL_INTERVAL_SECONDS
+        self._stopping = threading.Event()
+
+        # Metrics
+        self.succeeded = 0
+        self.failed = 0
+
+    def _lease(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=self.visibility_timeout)
+
+    def claim(self, db: Session) -> Optional[Job]:
+        """Lease the oldest due job (queued, or running with an expired lease), or None"""
+        while True:
+            now = datetime.utcnow()
+            claimable = or_(
+                Job.status == JobStatus.QUEUED,
+                and_(Job.status == JobStatus.RUNNING, Job.locked_until < now),
+            )
+            candidate = db.query(Job.id, Job.attempts, Job.max_attempts).filter(
+                claimable, Job.run_at <= now
+            ).order_by(Job.run_at, Job.id).limit(1).with_for_update(skip_locked=True).first()
+            if candidate is None:
+                db.commit()
+                return None
+
+            job_id, attempts, max_attempts = candidate
+            if attempts >= max_attempts:
+                # Its last worker died while running it
+                values = {
+                    Job.status: JobStatus.FAILED, Job.finished_at: now, Job.locked_until: None,
+                    Job.last_error: "Lease expired on the last attempt",
+                }
+            else:
+                values = {
+                    Job.status: JobStatus.RUNNING, Job.attempts: Job.attempts + 1,
+                    Job.worker_id: self.worker_id, Job.started_at: now, Job.locked_until: self._lease(now),
+                }
+            # Conditional on the row still being claimable, for databases without row locks
+            claimed = db.query(Job).filter(Job.id == job_id, claimable, Job.attempts == attempts).update(
+                values, synchronize_session=False
+            )
+            db.commit()
+            if claimed and attempts < max_attempts:
+                return db.get(Job, job_id)
+
+    def _heartbeat(self, job_id: UUID, done: threading.Event) -> None:
+        """Renew the lease of a running job until `done` is set"""
+        while not done.wait(self.visibility_timeout / 3):
+            db = self.session_factory()
+            try:
+                db.query(Job).filter(
+                    Job.id == job_id, Job.worker_id == self.worker_id, Job.status == JobStatus.RUNNING
+                ).update({Job.locked_until: self._lease(datetime.utcnow())}, synchronize_session=False)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Could not renew the lease of job {job_id}: {str(e)}")
+            finally:
+                db.close()
+
+    def _finish(self, db: Session, job_id: UUID, attempt: int, values: Dict[Any, Any]) -> None:
+        # Only if the lease was not lost to another worker in the meantime
+        db.query(Job).filter(
+            Job.id == job_id, Job.worker_id == self.worker_id,
+            Job.status == JobStatus.RUNNING, Job.attempts == attempt
+        ).update(values, synchronize_session=False)
+        db.commit()
+
+    def execute(self, db: Session, claimed: Job) -> JobStatus:
+        """Run a claimed job and record its outcome; returns its new status"""
+        job_id, name, payload = claimed.id, claimed.name, dict(claimed.payload or {})
+        attempt, max_attempts = claimed.attempts, claimed.max_attempts
+        # Do not keep a transaction open on the control session while the job runs
+        db.commit()
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, done), name=f"job-lease-{job_id}", daemon=True)
+        heartbeat.start()
+
+        work_db = self.session_factory()
+        started = time.perf_counter()
+        try:
+            function = _jobs.get(name)
+            if function is None:
+                raise LookupError(f"Unknown job: {name}")
+            result = function(work_db, **payload)
+            work_db.commit()
+        except Exception as e:
+            work_db.rollback()
+            error = f"{type(e).__name__}: {e}"[:2000]
+            now = datetime.utcnow()
+            if attempt >= max_attempts:
+                status = JobStatus.FAILED
+                values = {Job.status: status, Job.finished_at: now}
+                logger.error(f"Job {name} ({job_id}) failed after {attempt} attempts: {error}")
+            else:
+                status = JobStatus.QUEUED
+                delay = settings.JOB_RETRY_DELAY_SECONDS * 2 ** (attempt - 1)
+                values = {Job.status: status, Job.run_at: now + timedelta(seconds=delay)}
+                logger.warning(f"Job {name} ({job_id}) failed, attempt {attempt}: {error}")
+            values.update({Job.last_error: error, Job.locked_until: None})
+            self.failed += 1
+        else:
+            status = JobStatus.SUCCEEDED
+            values = {
+                Job.status: status, Job.result: _to_json(result) if result is not None else None,
+                Job.finished_at: datetime.utcnow(), Job.locked_until: None,
+            }
+            logger.info(f"Job {name} ({job_id}) succeeded in {time.perf_counter() - started:.1f} s")
+            self.succeeded += 1
+        finally:
+            done.set()
+            work_db.close()
+
+        self._finish(db, job_id, attempt, values)
+        heartbeat.join()
+        return status
+
+    def run_once(self) -> bool:
+        """Claim and run one due job; returns False when none was due"""
+        db = self.session_factory()
+        try:
+            claimed = self.claim(db)
+            if claimed is None:
+                return False
+            self.execute(db, claimed)
+            return True
+        finally:
+            db.close()
+
+    def purge(self) -> int:
+        """Delete finished jobs older than JOB_RETENTION_DAYS"""
+        db = self.session_factory()
+        try:
+            cutoff = datetime.utcnow() - timedelta(days=settings.JOB_RETENTION_DAYS)
+            deleted = db.query(Job).filter(
+                Job.status.in_([JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED]),
+                Job.finished_at < cutoff
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+    def run(self, max_jobs: Optional[int] = None) -> int:
+        """Run jobs until stopped (or `max_jobs` ran); returns the number of jobs run"""
+        ran = 0
+        last_purge = 0.0
+        while not self._stopping.is_set() and (max_jobs is None or ran < max_jobs):
+            try:
+                if time.monotonic() - last_purge >= 3600:
+                    last_purge = time.monotonic()
+                    self.purge()
+                if self.run_once():
+                    ran += 1
+                    continue
+            except Exception as e:
+                logger.error(f"Job worker {self.worker_id} error: {str(e)}")
+            self._stopping.wait(self.poll_interval)
+        return ran
+
+    def stop(self) -> None:
+        """Stop after the current job"""
+        self._stopping.set()
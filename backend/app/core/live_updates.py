@@ -0,0 +1,227 @@
+"""
+Live service updates pushed to viewers over Server-Sent Events.
+
+Writes that change a service's rating or approve evaluations add
+service.rating_changed / evaluation.approved events to the outbox (see
+app.core.outbox) in the same transaction, so the outbox table doubles as a
+change feed that every worker process can read.
+
+Each process keeps one registry of viewers per service. A single task per
+process tails the feed every LIVE_UPDATES_INTERVAL_MS, and only while it has
+viewers, reading only the events of the services being watched. Everything
+that happened to a service within the interval is coalesced: the latest
+rating, and the evaluations approved in that interval in one message. Each
+message is serialized once and put on the queue of every viewer, so idle
+viewers cost one queue and one open connection each.
+"""
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.responses import dumps
+from app.models.evaluation import Evaluation, EvaluationStatus
+from app.models.outbox_event import OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+LIVE_TOPICS = ("service.rating_changed", "evaluation.approved")
+
+# Each poll reads again the events after the cursor of this many seconds ago,
+# since a transaction can commit an event after one with a higher id was read
+REREAD_SECONDS = 10
+
+
+class LiveUpdatesFull(Exception):
+    """Raised when the process already serves LIVE_UPDATES_MAX_SUBSCRIBERS viewers"""
+
+
+def sse_frame(event: str, data: Any) -> bytes:
+    """A Server-Sent Events message"""
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+class LiveUpdateHub:
+    """Per-process registry of service viewers (by service id string), fed from the outbox"""
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None,
+                 interval_ms: Optional[int] = None, queue_size: Optional[int] = None,
+                 max_subscribers: Optional[int] = None):
+        self.session_factory = session_factory
+        self.interval = (interval_ms or settings.LIVE_UPDATES_INTERVAL_MS) / 1000.0
+        self.queue_size = queue_size or settings.LIVE_UPDATES_QUEUE_SIZE
+        self.max_subscribers = max_subscribers or settings.LIVE_UPDATES_MAX_SUBSCRIBERS
+        self._subscribers: Dict[Any, Set[asyncio.Queue]] = {}
+        self._count = 0
+        self._cursor: Optional[int] = None
+        # Cursor at each recent poll, and the events read since the oldest one
+        self._marks: Deque[Tuple[datetime, int]] = deque()
+        self._seen: Set[int] = set()
+        self._rating_event: Dict[Any, int] = {}  # last rating event sent per service
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.polls = 0
+        self.messages = 0
+        self.dropped = 0
+
+    # Viewers (event loop only)
+
+    def subscribe(self, service_id: Any) -> asyncio.Queue:
+        if self._count >= self.max_subscribers:
+            raise LiveUpdatesFull()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(service_id, set()).add(queue)
+        self._count += 1
+        return queue
+
+    def unsubscribe(self, service_id: Any, queue: asyncio.Queue) -> None:
+        viewers = self._subscribers.get(service_id)
+        if viewers is None or queue not in viewers:
+            return
+        viewers.discard(queue)
+        self._count -= 1
+        if not viewers:
+            del self._subscribers[service_id]
+
+    def broadcast(self, frames: Dict[Any, List[bytes]]) -> None:
+        """Queue messages for the viewers of each service, dropping the oldest for slow viewers"""
+        for service_id, service_frames in frames.items():
+            for queue in self._subscribers.get(service_id, ()):
+                for frame in service_frames:
+                    if queue.full():
+                        queue.get_nowait()
+                        self.dropped += 1
+                    queue.put_nowait(frame)
+                    self.messages += 1
+
+    # Change feed
+
+    def poll(self, db: Session, service_ids: List[Any]) -> Dict[Any, List[bytes]]:
+        """Read the new events of the given services and build one set of messages per service"""
+        now = datetime.utcnow()
+        recent = now - timedelta(seconds=REREAD_SECONDS)
+        if self._cursor is None:
+            # Start from the events of the last REREAD_SECONDS rather than the
+            # end of the feed: a change committed after a new viewer read the
+            # rating, but before this first poll, is still sent
+            self._cursor = db.query(func.max(OutboxEvent.id)).filter(OutboxEvent.created_at < recent).scalar() or 0
+            self._marks.append((recent, self._cursor))
+
+        # Read again from the cursor of REREAD_SECONDS ago, skipping the events already seen
+        while len(self._marks) > 1 and self._marks[1][0] <= recent:
+            self._marks.popleft()
+        low = self._marks[0][1]
+        self._seen = {event_id for event_id in self._seen if event_id > low}
+        watched = set(service_ids)
+        self._rating_event = {
+            service_id: event_id for service_id, event_id in self._rating_event.items() if service_id in watched
+        }
+        rows = []
+        for start in range(0, len(service_ids), 1000):
+            rows.extend(db.query(
+                OutboxEvent.id, OutboxEvent.topic, OutboxEvent.aggregate_id, OutboxEvent.payload
+            ).filter(
+                OutboxEvent.id > low,
+                OutboxEvent.topic.in_(LIVE_TOPICS),
+                OutboxEvent.aggregate_id.in_(service_ids[start:start + 1000]),
+            ).all())
+        rows.sort(key=lambda row: row[0])
+        self._cursor = max([self._cursor, *(row[0] for row in rows)])
+        self._marks.append((now, self._cursor))
+
+        ratings: Dict[Any, Dict[str, Any]] = {}
+        approved: Dict[Any, List[Any]] = {}
+        for event_id, topic, aggregate_id, payload in rows:
+            if event_id in self._seen:
+                continue
+            service_id = str(aggregate_id)
+            self._seen.add(event_id)
+            if topic == "service.rating_changed":
+                # Only the latest rating is sent, and never an older one late
+                if event_id > self._rating_event.get(service_id, 0):
+                    self._rating_event[service_id] = event_id
+                    ratings[service_id] = payload
+            else:
+                approved.setdefault(service_id, []).extend(payload["evaluation_ids"])
+        frames: Dict[Any, List[bytes]] = {}
+        for service_id, rating in ratings.items():
+            frames.setdefault(service_id, []).append(sse_frame("rating", {"service_id": service_id, **rating}))
+        if approved:
+            evaluations: Dict[Any, List[Dict[str, Any]]] = {}
+            evaluation_ids = [evaluation_id for ids in approved.values() for evaluation_id in ids]
+            for start in range(0, len(evaluation_ids), 1000):
+                for row in db.query(
+                    Evaluation.id, Evaluation.service_id, Evaluation.user_id,
+                    Evaluation.score, Evaluation.comment, Evaluation.timestamp
+                ).filter(
+                    Evaluation.id.in_(evaluation_ids[start:start + 1000]),
+                    Evaluation.status == EvaluationStatus.APPROVED
+                ):
+                    evaluations.setdefault(str(row.service_id), []).append(row._asdict())
+            for service_id, items in evaluations.items():
+                items.sort(key=lambda item: item["timestamp"] or datetime.min)
+                frames.setdefault(service_id, []).append(sse_frame("evaluations", items))
+        return frames
+
+    def _poll_with_session(self, service_ids: List[Any]) -> Dict[Any, List[bytes]]:
+        if self.session_factory is None:
+            from app.database import SessionLocal
+            self.session_factory = SessionLocal
+        db = self.session_factory()
+        try:
+            return self.poll(db, service_ids)
+        finally:
+            db.close()
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self._subscribers:
+                # Nobody is watching: nothing is read, and the feed is
+                # picked up from REREAD_SECONDS ago when someone connects
+                self._cursor = None
+                self._marks.clear()
+                self._seen.clear()
+                self._rating_event.clear()
+                continue
+            try:
+                frames = await run_in_threadpool(self._poll_with_session, list(self._subscribers))
+                self.polls += 1
+                self.broadcast(frames)
+            except Exception as e:
+                logger.error(f"Live updates poll failed: {str(e)}")
+
+    def start(self) -> None:
+        """Start tailing the feed (from the running event loop)"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of hub metrics"""
+        return {
+            "subscribers": self._count,
+            "services": len(self._subscribers),
+            "polls": self.polls,
+            "messages": self.messages,
+            "dropped": self.dropped,
+        }
+
+
+live_updates = LiveUpdateHub()
@@ -0,0 +1,292 @@
+"""
+Transactional outbox and in-process event bus.
+
+Writes record the side effects they imply (service ratings, moderation queue
+counters, spam screening...) as rows of the outbox_events table, added to
+the same session as the entity change with `publish` and therefore committed
+or rolled back with it. The request only pays for the primary write.
+
+A dispatcher thread polls the table every OUTBOX_POLL_INTERVAL_MS, locks a
+batch of due events (SKIP LOCKED, so several processes can dispatch), hands
+them in id order to the handlers registered with `subscribe` (each run of
+consecutive events of a topic in one call), and marks them processed in the
+same transaction as the handlers' writes. Delivery is
+at least once: a batch whose handlers fail is rolled back and retried one
+event at a time, and a failing event is retried with an exponential backoff
+up to OUTBOX_MAX_ATTEMPTS times. Handlers must therefore be idempotent and
+must not commit. Handlers applying deltas get idempotence from
+`first_deliveries`, which records the events each consumer has applied in
+the applied_outbox_events table, in the handler's transaction.
+"""
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.responses import dumps
+from app.models.outbox_event import AppliedOutboxEvent, OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Session, List[OutboxEvent]], None]
+
+_handlers: Dict[str, List[Handler]] = {}
+
+# Seconds between purges of processed events
+PURGE_INTERVAL_SECONDS = 60.0
+
+
+def publish(db: Session, topic: str, aggregate_id: Any = None, payload: Optional[Dict[str, Any]] = None) -> OutboxEvent:
+    """
+    Add an event to the session, to be committed with the caller's changes
+
+    The payload is stored as JSON (UUIDs and datetimes as strings).
+    """
+    event = OutboxEvent(
+        topic=topic,
+        aggregate_id=aggregate_id,
+        payload=json.loads(dumps(payload or {})),
+        created_at=datetime.utcnow(),
+        available_at=datetime.utcnow(),
+        attempts=0,
+    )
+    db.add(event)
+    return event
+
+
+def subscribe(topic: str) -> Callable[[Handler], Handler]:
+    """Register a handler for a topic; handlers of a topic run in registration order"""
+    def register(handler: Handler) -> Handler:
+        _handlers.setdefault(topic, []).append(handler)
+        return handler
+    return register
+
+
+def handlers_for(topic: str) -> List[Handler]:
+    return list(_handlers.get(topic, ()))
+
+
+def mark_applied(db: Session, consumer: str, event_ids: Iterable[int]) -> Set[int]:
+    """
+    Record events as applied by `consumer`, in the caller's transaction
+
+    Returns the ids that were not recorded yet.
+    """
+    event_ids = set(event_ids)
+    if not event_ids:
+        return set()
+    applied = {
+        event_id for (event_id,) in db.query(AppliedOutboxEvent.event_id).filter(
+            AppliedOutboxEvent.consumer == consumer, AppliedOutboxEvent.event_id.in_(event_ids)
+        )
+    }
+    fresh = event_ids - applied
+    if fresh:
+        now = datetime.utcnow()
+        db.execute(
+            insert(AppliedOutboxEvent),
+            [{"consumer": consumer, "event_id": event_id, "applied_at": now} for event_id in sorted(fresh)]
+        )
+    return fresh
+
+
+def first_deliveries(db: Session, consumer: str, events: List[OutboxEvent]) -> List[OutboxEvent]:
+    """
+    The events `consumer` has not applied yet, now recorded as applied
+
+    For handlers applying deltas: a replayed event, or one already folded in
+    by a recompute (see mark_applied), is skipped.
+    """
+    fresh = mark_applied(db, consumer, [event.id for event in events])
+    return [event for event in events if event.id in fresh]
+
+
+class OutboxDispatcher:
+    """Delivers due outbox events to their handlers in batches, from a thread"""
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None,
+                 interval_ms: Optional[int] = None, batch_size: Optional[int] = None,
+                 max_attempts: Optional[int] = None):
+        self.session_factory = session_factory
+        self.interval = (interval_ms or settings.OUTBOX_POLL_INTERVAL_MS) / 1000.0
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.max_attempts = max_attempts or settings.OUTBOX_MAX_ATTEMPTS
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_purge = 0.0
+
+        # Metrics
+        self.batches = 0
+        self.delivered = 0
+        self.failures = 0
+        self.total_dispatch_seconds = 0.0
+
+    def _session(self) -> Session:
+        if self.session_factory is None:
+            from app.database import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    def _claim(self, db: Session, now: datetime, event_ids: Optional[List[int]] = None) -> List[OutboxEvent]:
+        query = db.query(OutboxEvent).filter(
+            OutboxEvent.processed_at.is_(None),
+            OutboxEvent.available_at <= now,
+            OutboxEvent.attempts < self.max_attempts,
+        )
+        if event_ids is not None:
+            query = query.filter(OutboxEvent.id.in_(event_ids))
+        return query.order_by(OutboxEvent.id).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+    def _deliver(self, db: Session, events: List[OutboxEvent], now: datetime) -> None:
+        # Events are applied in the order they were written (deltas of a
+        # service do not commute); consecutive events of a topic are batched
+        for topic, run in groupby(events, key=lambda event: event.topic):
+            topic_events = list(run)
+            for handler in handlers_for(topic):
+                handler(db, topic_events)
+        db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_([event.id for event in events]))
+            .values(processed_at=now, attempts=OutboxEvent.attempts + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    def _record_failure(self, db: Session, event_id: int, error: Exception) -> None:
+        event = db.get(OutboxEvent, event_id)
+        if event is None:
+            return
+        event.attempts += 1
+        event.last_error = f"{type(error).__name__}: {error}"[:2000]
+        event.available_at = datetime.utcnow() + timedelta(
+            seconds=settings.OUTBOX_RETRY_DELAY_SECONDS * 2 ** (event.attempts - 1)
+        )
+        if event.attempts >= self.max_attempts:
+            logger.error(f"Giving up on outbox event {event_id} ({event.topic}) after {event.attempts} attempts: {error}")
+        else:
+            logger.warning(f"Outbox event {event_id} ({event.topic}) failed, attempt {event.attempts}: {error}")
+        db.commit()
+        with self._lock:
+            self.failures += 1
+
+    def run_once(self, db: Optional[Session] = None) -> int:
+        """Deliver one batch of due events; returns the number of events processed"""
+        own_session = db is None
+        if own_session:
+            db = self._session()
+        started = time.perf_counter()
+        try:
+            now = datetime.utcnow()
+            events = self._claim(db, now)
+            if not events:
+                db.commit()
+                return 0
+            event_ids = [event.id for event in events]
+            try:
+                self._deliver(db, events, now)
+                delivered = len(event_ids)
+            except Exception as e:
+                db.rollback()
+                delivered = 0
+                if len(event_ids) == 1:
+                    self._record_failure(db, event_ids[0], e)
+                else:
+                    # Isolate the failing events by delivering them one at a time
+                    for event_id in event_ids:
+                        single = self._claim(db, now, [event_id])
+                        if not single:
+                            db.commit()
+                            continue
+                        try:
+                            self._deliver(db, single, now)
+                            delivered += 1
+                        except Exception as single_error:
+                            db.rollback()
+                            self._record_failure(db, event_id, single_error)
+            with self._lock:
+                self.batches += 1
+                self.delivered += delivered
+                self.total_dispatch_seconds += time.perf_counter() - started
+            return len(event_ids)
+        finally:
+            if own_session:
+                db.close()
+
+    def drain(self, db: Optional[Session] = None) -> int:
+        """Deliver every due event; returns the number of events processed"""
+        processed = 0
+        while True:
+            count = self.run_once(db)
+            processed += count
+            if count < self.batch_size:
+                return processed
+
+    def purge(self, db: Optional[Session] = None) -> int:
+        """Delete processed events older than OUTBOX_RETENTION_HOURS, and their applied records"""
+        own_session = db is None
+        if own_session:
+            db = self._session()
+        try:
+            cutoff = datetime.utcnow() - timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+            deleted = db.query(OutboxEvent).filter(
+                OutboxEvent.processed_at.isnot(None), OutboxEvent.processed_at < cutoff
+            ).delete(synchronize_session=False)
+            # Events still pending may be delivered later, their records are kept
+            pending = db.query(OutboxEvent.id).filter(OutboxEvent.processed_at.is_(None))
+            db.query(AppliedOutboxEvent).filter(
+                AppliedOutboxEvent.applied_at < cutoff, AppliedOutboxEvent.event_id.notin_(pending.scalar_subquery())
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            if own_session:
+                db.close()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.drain()
+                if time.monotonic() - self._last_purge >= PURGE_INTERVAL_SECONDS:
+                    self._last_purge = time.monotonic()
+                    self.purge()
+            except Exception as e:
+                logger.error(f"Outbox dispatch failed: {str(e)}")
+            self._stopping.wait(self.interval)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the dispatching thread; undelivered events stay in the table"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping.set()
+            thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of dispatcher metrics"""
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "delivered": self.delivered,
+                "failures": self.failures,
+                "total_dispatch_seconds": self.total_dispatch_seconds,
+            }
+
+
+outbox_dispatcher = OutboxDispatcher()
@@ -0,0 +1,110 @@
+"""
+Dedicated process pool for password hashing.
+
+bcrypt is deliberately slow (~100-300 ms of CPU per call). Running it inline
+in request handlers lets a burst of logins/signups occupy the shared
+threadpool and stall unrelated requests. Hashing is instead dispatched to a
+small process pool with its own concurrency limit; callers beyond
+PASSWORD_HASH_MAX_QUEUE are rejected immediately with PasswordHashPoolBusy,
+which bounds how many request threads can ever be parked on hashing.
+"""
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+
+class PasswordHashPoolBusy(Exception):
+    """Raised when too many password hashing requests are already waiting"""
+
+
+class PasswordHashPool:
+    """Bounded executor for CPU-heavy password hashing"""
+
+    def __init__(self, workers: int, max_concurrency: int, max_queue: int):
+        self.workers = workers
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        # Metrics
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(*args) in the pool, waiting for a free slot if needed"""
+        with self._lock:
+            if self.waiting + self.in_flight >= self.max_concurrency + self.max_queue:
+                self.rejected += 1
+                raise PasswordHashPoolBusy("Too many password hashing requests in progress")
+            self.waiting += 1
+
+        queued_at = time.perf_counter()
+        self._slots.acquire()
+        started_at = time.perf_counter()
+        with self._lock:
+            self.waiting -= 1
+            self.in_flight += 1
+            self.total_wait_seconds += started_at - queued_at
+
+        try:
+            if self.workers <= 0:
+                return fn(*args)
+            return self._get_executor().submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A worker died: start a fresh pool for the next caller
+            self._reset_executor()
+            raise
+        finally:
+            self._slots.release()
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.total_run_seconds += time.perf_counter() - started_at
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue metrics"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "waiting": self.waiting,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "total_wait_seconds": self.total_wait_seconds,
+                "total_run_seconds": self.total_run_seconds,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        with self._lock:
+            self._executor = None
+
+
+password_pool = PasswordHashPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_concurrency=settings.PASSWORD_HASH_MAX_CONCURRENCY,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
@@ -0,0 +1,180 @@
+"""
+SQL query profiler with N+1 detection.
+
+When enabled for a request (globally with SQL_PROFILER_ENABLED, or per
+request with the ``X-Profile-SQL: 1`` header when SQL_PROFILER_ALLOW_HEADER
+is set), every statement executed while handling the request is recorded
+and logged. Statements are grouped by shape (whitespace collapsed, IN lists
+folded); a shape repeated at least SQL_PROFILER_N_PLUS_ONE_THRESHOLD times
+is reported as a likely N+1 pattern, typically a lazy load inside a loop.
+
+``record_queries`` attaches the same recorder to an engine for an explicit
+block of code and backs the ``query_budget`` pytest fixture.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile-sql"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:\?|%s|:\w+|%\(\w+\)s)\s*,?)+\)", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalise a SQL statement so that repeated executions compare equal"""
+    shape = _WHITESPACE_RE.sub(" ", statement).strip()
+    shape = _STRING_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    return _IN_LIST_RE.sub("IN (...)", shape)
+
+
+class QueryProfile:
+    """Statements recorded during a request or a block of code"""
+
+    def __init__(self, n_plus_one_threshold: Optional[int] = None):
+        self.statements: List[Tuple[str, float]] = []
+        self.n_plus_one_threshold = (
+            n_plus_one_threshold
+            if n_plus_one_threshold is not None
+            else settings.SQL_PROFILER_N_PLUS_ONE_THRESHOLD
+        )
+
+    def record(self, statement: str, duration: float) -> None:
+        self.statements.append((statement, duration))
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_time(self) -> float:
+        return sum(duration for _, duration in self.statements)
+
+    def repeated_shapes(self) -> List[Tuple[str, int]]:
+        """Statement shapes executed at least n_plus_one_threshold times"""
+        counts = Counter(statement_shape(statement) for statement, _ in self.statements)
+        return [
+            (shape, count)
+            for shape, count in counts.most_common()
+            if count >= self.n_plus_one_threshold
+        ]
+
+    def report(self) -> str:
+        lines = [f"{self.count} statements in {self.total_time * 1000:.1f} ms"]
+        for index, (statement, duration) in enumerate(self.statements, start=1):
+            lines.append(f"  {index:3d}. [{duration * 1000:.2f} ms] {_WHITESPACE_RE.sub(' ', statement)}")
+        for shape, count in self.repeated_shapes():
+            lines.append(f"  possible N+1: {count}x {shape}")
+        return "\n".join(lines)
+
+
+current_query_profile: ContextVar[Optional[QueryProfile]] = ContextVar(
+    "current_query_profile", default=None
+)
+
+
+def install_query_profiler(engine: Engine) -> None:
+    """Record statements into the active request profile, if any"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_query_profile.get() is not None:
+            conn.info.setdefault("profiler_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = current_query_profile.get()
+        if profile is not None and conn.info.get("profiler_start_time"):
+            started = conn.info["profiler_start_time"].pop()
+            profile.record(statement, time.perf_counter() - started)
+
+
+@contextmanager
+def record_queries(engine: Engine, n_plus_one_threshold: Optional[int] = None) -> Iterator[QueryProfile]:
+    """
+    Record every statement executed on `engine` inside the block, from any thread
+
+    Usage:
+    ```
+    with record_queries(engine) as profile:
+        client.get("/api/v1/services/")
+    assert profile.count <= 2
+    ```
+    """
+    profile = QueryProfile(n_plus_one_threshold)
+    start_times: List[float] = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        start_times.append(time.perf_counter())
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        started = start_times.pop() if start_times else time.perf_counter()
+        profile.record(statement, time.perf_counter() - started)
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    try:
+        yield profile
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+        event.remove(engine, "after_cursor_execute", after)
+
+
+class QueryProfilerMiddleware:
+    """ASGI middleware enabling the profiler per request and logging the result"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _is_enabled(self, scope) -> bool:
+        if settings.SQL_PROFILER_ENABLED:
+            return True
+        if not settings.SQL_PROFILER_ALLOW_HEADER:
+            return False
+        for name, value in scope.get("headers", []):
+            if name == PROFILE_HEADER.encode("latin-1"):
+                return value.strip() in (b"1", b"true")
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._is_enabled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+        token = current_query_profile.set(profile)
+
+        async def send_wrapper(message):
+            # Response headers are sent before the body: report what ran so far
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-sql-query-count", str(profile.count).encode("latin-1")))
+                headers.append((b"x-sql-time-ms", f"{profile.total_time * 1000:.1f}".encode("latin-1")))
+                if profile.repeated_shapes():
+                    headers.append((b"x-sql-n-plus-one", b"1"))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_profile.reset(token)
+            request_line = f"{scope.get('method')} {scope.get('path')}"
+            if profile.repeated_shapes():
+                logger.warning(f"Possible N+1 queries in {request_line}\n{profile.report()}")
+            else:
+                logger.info(f"SQL profile for {request_line}: {profile.report()}")
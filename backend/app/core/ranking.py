@@ -0,0 +1,116 @@
+"""
+Confidence-adjusted scores used to rank services and evaluations.
+
+* Services are ranked by a Bayesian average: the mean score shrunk towards
+  the mean of their category, as if RANKING_PRIOR_WEIGHT extra evaluations
+  at the category mean had been submitted. A single 10/10 no longer outranks
+  thousands of 9.2/10.
+* The decayed rating is a mean in which each evaluation weighs half as much
+  every RATING_DECAY_HALF_LIFE_DAYS. Services store the decayed weight and
+  score sum as of a reference time; a write decays both to the current time
+  and adds its own contribution, so it stays O(1), and since both decay at
+  the same rate their ratio (the stored decayed rating) is valid until the
+  next write.
+* Evaluations are ranked by the Wilson score lower bound of their share of
+  helpful votes, which favours many consistent votes over a lone one.
+
+Both are stored in indexed columns and maintained incrementally by the CRUD
+layer (see crud_service.apply_service_score_delta and
+crud_evaluation_vote), so ranking queries are plain index scans.
+"""
+import math
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+# z for a 95% confidence level
+WILSON_Z = 1.959964
+
+
+def bayesian_average(score_sum: float, count: int, prior_mean: float, prior_weight: Optional[float] = None) -> float:
+    """Mean of `count` scores summing to `score_sum`, shrunk towards `prior_mean`"""
+    weight = settings.RANKING_PRIOR_WEIGHT if prior_weight is None else prior_weight
+    if count + weight <= 0:
+        return prior_mean
+    return (weight * prior_mean + score_sum) / (weight + count)
+
+
+def decay_factor(elapsed: timedelta) -> float:
+    """Weight left to an evaluation after `elapsed` (1 for future timestamps)"""
+    half_lives = max(elapsed.total_seconds(), 0.0) / (settings.RATING_DECAY_HALF_LIFE_DAYS * 86400)
+    return 0.5 ** half_lives
+
+
+def wilson_lower_bound(positive: int, total: int, z: float = WILSON_Z) -> float:
+    """Lower bound of the Wilson score interval for a proportion (0 without votes)"""
+    if total <= 0:
+        return 0.0
+    phat = positive / total
+    z2 = z * z
+    centre = phat + z2 / (2 * total)
+    margin = z * math.sqrt((phat * (1 - phat) + z2 / (4 * total)) / total)
+    return max(0.0, (centre - margin) / (1 + z2 / total))
+
+
+class CategoryPriors:
+    """
+    Per-category mean score used as the Bayesian prior, cached in process
+
+    Computed from the evaluation counters stored on services (one aggregate
+    per category, refreshed every RANKING_PRIOR_TTL_SECONDS). Categories with
+    fewer than RANKING_PRIOR_MIN_EVALUATIONS evaluations fall back to the
+    global mean, and an empty database to RANKING_DEFAULT_PRIOR.
+    """
+
+    def __init__(self):
+        self._priors: Dict[Optional[str], float] = {}
+        self._global: Optional[float] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, category: Optional[str]) -> float:
+        with self._lock:
+            if time.monotonic() >= self._expires_at:
+                self._priors, self._global = self._load(db)
+                self._expires_at = time.monotonic() + settings.RANKING_PRIOR_TTL_SECONDS
+            return self._priors.get(category, self._global)
+
+    def all(self, db: Session) -> Tuple[Dict[Optional[str], float], float]:
+        """Fresh priors for every category and the global fallback"""
+        priors, global_prior = self._load(db)
+        with self._lock:
+            self._priors, self._global = priors, global_prior
+            self._expires_at = time.monotonic() + settings.RANKING_PRIOR_TTL_SECONDS
+        return priors, global_prior
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._expires_at = 0.0
+
+    @staticmethod
+    def _load(db: Session) -> Tuple[Dict[Optional[str], float], float]:
+        from app.models.service import Service
+
+        rows = db.query(
+            Service.category, func.sum(Service.score_sum), func.sum(Service.evaluation_count)
+        ).group_by(Service.category).all()
+
+        total_sum = sum(float(score_sum or 0) for _, score_sum, _ in rows)
+        total_count = sum(int(count or 0) for _, _, count in rows)
+        global_prior = total_sum / total_count if total_count else settings.RANKING_DEFAULT_PRIOR
+
+        priors = {
+            category: float(score_sum) / int(count)
+            for category, score_sum, count in rows
+            if count and int(count) >= settings.RANKING_PRIOR_MIN_EVALUATIONS
+        }
+        return priors, global_prior
+
+
+category_priors = CategoryPriors()
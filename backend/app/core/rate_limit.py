@@ -0,0 +1,171 @@
+"""
+Per-client rate limiting of the expensive routes.
+
+Each limited route ("POST /auth/login", see RATE_LIMITS) has a rate such as
+"10/minute", and every client gets its own token bucket on each route: the
+user when the bearer token is in the auth cache (app.core.auth_cache, so the
+token has been verified), else the client address. Unverified tokens share
+the address bucket, so sending a new token with each request does not get
+around the limit. A bucket holds up to `count` tokens and refills
+continuously at the rate; a request finding it empty is answered 429 with
+Retry-After, before reaching the route.
+
+A bucket is stored as a single float, the time at which it will be full
+again (the "theoretical arrival time" of GCRA, which behaves as a token
+bucket), in a dict that drops full buckets as it grows. Checking a request
+costs a tuple lookup, a dict lookup and a few float operations.
+
+Buckets are per process: with several workers a client may get up to that
+many times the rate. Another store (shared between processes) can be given
+to RateLimiter, with the same acquire() method as MemoryBucketStore.
+"""
+import math
+import time
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.core.auth_cache import token_user_cache
+from app.core.config import settings
+
+PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0, "day": 86400.0}
+
+
+class RateLimit(NamedTuple):
+    count: int
+    period: float  # seconds
+
+    @property
+    def interval(self) -> float:
+        """Seconds to refill one token"""
+        return self.period / self.count
+
+
+def parse_rate(value: str) -> RateLimit:
+    """Parse a rate such as "10/minute" """
+    count, _, unit = value.partition("/")
+    try:
+        limit = RateLimit(int(count), PERIODS[unit.strip().lower()])
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid rate limit {value!r}, expected e.g. '10/minute'")
+    if limit.count <= 0:
+        raise ValueError(f"Invalid rate limit {value!r}, the count must be positive")
+    return limit
+
+
+class MemoryBucketStore:
+    """In-process token buckets (event loop only, not thread-safe)"""
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size or settings.RATE_LIMIT_MAX_BUCKETS
+        self._full_at: Dict[Hashable, float] = {}
+
+    def acquire(self, key: Hashable, now: float, interval: float, capacity: int) -> float:
+        """
+        Take a token from a bucket.
+
+        Returns 0 when granted, else the seconds until a token is available.
+        """
+        full_at = self._full_at.get(key, now)
+        if full_at < now:
+            full_at = now
+        full_at += interval
+        wait = full_at - now - capacity * interval
+        if wait > 0:
+            return wait
+        self._full_at[key] = full_at
+        if len(self._full_at) > self.max_size:
+            self._prune(now)
+        return 0.0
+
+    def _prune(self, now: float) -> None:
+        # A full bucket is the same as no bucket
+        self._full_at = {key: full_at for key, full_at in self._full_at.items() if full_at > now}
+        excess = len(self._full_at) - self.max_size // 2
+        if excess > 0:
+            # Still too many clients: forget the buckets closest to full
+            for key in sorted(self._full_at, key=self._full_at.__getitem__)[:excess]:
+                del self._full_at[key]
+
+    def __len__(self) -> int:
+        return len(self._full_at)
+
+
+class RateLimiter:
+    """Rate limits of the routes, checked against a bucket store"""
+
+    def __init__(self, limits: Optional[Dict[str, str]] = None, store: Any = None,
+                 prefix: Optional[str] = None):
+        self.store = store if store is not None else MemoryBucketStore()
+        self.trust_forwarded_for = settings.RATE_LIMIT_TRUST_FORWARDED_FOR
+        prefix = settings.API_V1_STR if prefix is None else prefix
+        # (method, path without trailing slash) -> (route, refill interval, capacity)
+        self._rules: Dict[Tuple[str, str], Tuple[str, float, int]] = {}
+        for route, rate in (settings.RATE_LIMITS if limits is None else limits).items():
+            method, _, path = route.strip().partition(" ")
+            limit = parse_rate(rate)
+            self._rules[(method.upper(), (prefix + path.strip()).rstrip("/"))] = (route, limit.interval, limit.count)
+
+        # Metrics
+        self.limited = 0
+
+    def _client(self, scope) -> Hashable:
+        forwarded = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    cached = token_user_cache.get(token)
+                    if cached is not None:
+                        return ("user", cached.id)
+            elif name == b"x-forwarded-for" and self.trust_forwarded_for:
+                forwarded = value.split(b",")[0].strip().decode("latin-1")
+        if forwarded:
+            return ("ip", forwarded)
+        client = scope.get("client")
+        return ("ip", client[0] if client else None)
+
+    def check(self, scope) -> float:
+        """Take a token for the request; returns 0 when allowed, else the seconds to wait"""
+        rule = self._rules.get((scope["method"], scope["path"].rstrip("/")))
+        if rule is None:
+            return 0.0
+        route, interval, capacity = rule
+        wait = self.store.acquire((route, self._client(scope)), time.time(), interval, capacity)
+        if wait > 0:
+            self.limited += 1
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of rate limiter metrics"""
+        return {
+            "limited": self.limited,
+            "buckets": len(self.store) if isinstance(self.store, MemoryBucketStore) else 0,
+        }
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 once a client has used up its bucket on a route"""
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter if limiter is not None else rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        wait = self.limiter.check(scope)
+        if wait <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse(
+            status_code=429,
+            content={"detail": "Too many requests, please retry later"},
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+        await response(scope, receive, send)
+
+
+rate_limiter = RateLimiter()
@@ -1,10 +1,18 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.password_pool import password_pool
 
 
 # JWT token creation and verification
@@ -21,24 +29,115 @@ def create_access_token(subject: Union[str, Any], expires_delta: Optional[timede
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify a JWT token and return the subject (user ID)"""
+# HMAC algorithms verified without going through jose
+_HMAC_DIGESTS = {
+    "HS256": hashlib.sha256,
+    "HS384": hashlib.sha384,
+    "HS512": hashlib.sha512,
+}
+
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _decode_hmac_token(token: str, digestmod) -> Optional[Dict[str, Any]]:
+    """Verify an HMAC-signed JWT with the standard library and return its claims"""
+    try:
+        header_segment, payload_segment, signature_segment = token.split(".")
+        header = json.loads(_b64url_decode(header_segment))
+        if header.get("alg") != settings.ALGORITHM:
+            return None
+
+        signing_input = f"{header_segment}.{payload_segment}".encode("ascii")
+        expected = hmac.new(settings.SECRET_KEY.encode("utf-8"), signing_input, digestmod).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature_segment)):
+            return None
+
+        payload = json.loads(_b64url_decode(payload_segment))
+        if not isinstance(payload, dict):
+            return None
+
+        now = time.time()
+        if "exp" in payload and float(payload["exp"]) <= now:
+            return None
+        if "nbf" in payload and float(payload["nbf"]) > now:
+            return None
+    except (ValueError, TypeError, UnicodeError, binascii.Error):
+        return None
+
+    return payload
+
+
+def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
+    """Verify a JWT token and return its claims, or None if invalid or expired"""
+    digestmod = _HMAC_DIGESTS.get(settings.ALGORITHM)
+    if digestmod is not None:
+        return _decode_hmac_token(token, digestmod)
+
     try:
-        payload = jwt.decode(
+        return jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        return payload.get("sub")
     except jwt.JWTError:
         return None
 
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 
+def verify_token(token: str) -> Optional[str]:
+    """Verify a JWT token and return the subject (user ID)"""
+    payload = decode_access_token(token)
+    if payload is None:
+        return None
+    return payload.get("sub")
 
-def get_password_hash(password: str) -> str:
-    """Generate a hashed password"""
+pwd_context = CryptContext(
+    schemes=['bcrypt'],
+    deprecated='auto',
+    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    # Hashes using any other work factor are flagged for rehash on login
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
+
+
+def _hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash"""
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def _verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    """Generate a hashed password (runs in the password hashing pool)"""
+    return password_pool.run(_hash_password, password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash (runs in the password hashing pool)"""
+    return password_pool.run(_verify_password, plain_password, hashed_password)
+
+
+def verify_password_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and return a new hash if the stored one uses an
+    outdated scheme or work factor (None otherwise)
+    """
+    return password_pool.run(_verify_and_update_password, plain_password, hashed_password)
+
+
+def hash_passwords(passwords: List[str], workers: int) -> List[str]:
+    """
+    Hash many passwords in parallel, for offline bulk jobs
+
+    Uses its own process pool rather than the request-serving one so that
+    bulk imports cannot starve logins.
+    """
+    if workers <= 1:
+        return [_hash_password(password) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_hash_password, passwords, chunksize=16))
@@ -0,0 +1,190 @@
+"""
+Write-behind buffer for evaluation votes.
+
+Helpful/unhelpful clicks are high-volume and low-value, so with
+VOTE_WRITE_BEHIND enabled they are not written by the request: each click
+records the voter's latest choice in memory, coalesced per
+(evaluation_id, voter_id), and a background thread writes the accumulated
+changes in one transaction every VOTE_FLUSH_INTERVAL_MS (or as soon as
+VOTE_BUFFER_MAX_PENDING keys are waiting).
+
+Until a change is written, readers add the buffer's pending counter deltas to
+the stored counters and see the buffered choice as the voter's vote, so votes
+read back immediately in the process that accepted them. The buffer is per
+process and lost if the process is killed; it is flushed on shutdown.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+VoteKey = Tuple[Any, Any]  # (evaluation_id, voter_id)
+
+
+def vote_contribution(state: Optional[bool]) -> Tuple[int, int]:
+    """(helpful, unhelpful) counted for a vote state, None meaning no vote"""
+    if state is None:
+        return 0, 0
+    return (1, 0) if state else (0, 1)
+
+
+class BufferedVote:
+    """The latest choice of a voter, and their vote as last written"""
+
+    __slots__ = ("base", "desired", "vote_id", "timestamp")
+
+    def __init__(self, base: Optional[bool], desired: Optional[bool], vote_id: Any, timestamp: datetime):
+        self.base = base
+        self.desired = desired
+        self.vote_id = vote_id
+        self.timestamp = timestamp
+
+
+class VoteBuffer:
+    """Coalesces vote changes in memory and writes them in batches from a thread"""
+
+    def __init__(self, writer: Callable[[Dict[VoteKey, BufferedVote]], None],
+                 interval_ms: int, max_pending: int):
+        self.writer = writer
+        self.interval = interval_ms / 1000.0
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pending: Dict[VoteKey, BufferedVote] = {}
+        self._flushing: Dict[VoteKey, BufferedVote] = {}
+        # Net (helpful, unhelpful) change per evaluation of everything not yet written
+        self._deltas: Dict[Any, List[int]] = {}
+
+        # Metrics
+        self.accepted = 0
+        self.flushes = 0
+        self.written = 0
+        self.failures = 0
+        self.total_flush_seconds = 0.0
+
+    def _add_delta(self, evaluation_id: Any, old: Optional[bool], new: Optional[bool]) -> None:
+        old_helpful, old_unhelpful = vote_contribution(old)
+        new_helpful, new_unhelpful = vote_contribution(new)
+        delta = self._deltas.setdefault(evaluation_id, [0, 0])
+        delta[0] += new_helpful - old_helpful
+        delta[1] += new_unhelpful - old_unhelpful
+        if delta == [0, 0]:
+            del self._deltas[evaluation_id]
+
+    def submit(self, evaluation_id: Any, voter_id: Any, is_helpful: Optional[bool],
+               stored: Optional[bool], vote_id: Any) -> Tuple[BufferedVote, Optional[bool]]:
+        """
+        Record a voter's latest choice (None removes their vote)
+
+        `stored` and `vote_id` describe the vote as read from the database; they
+        are ignored when a change for the same voter is already buffered.
+        Returns the entry and the voter's previous choice.
+        """
+        key = (evaluation_id, voter_id)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                in_flight = self._flushing.get(key)
+                if in_flight is not None:
+                    # Being written: it will be the stored vote
+                    stored, vote_id = in_flight.desired, in_flight.vote_id
+                entry = self._pending[key] = BufferedVote(stored, stored, vote_id, datetime.utcnow())
+            previous = entry.desired
+            self._add_delta(evaluation_id, previous, is_helpful)
+            entry.desired = is_helpful
+            entry.timestamp = datetime.utcnow()
+            self.accepted += 1
+            pending = len(self._pending)
+        if pending >= self.max_pending:
+            self._wake.set()
+        return entry, previous
+
+    def pending_vote(self, evaluation_id: Any, voter_id: Any) -> Optional[BufferedVote]:
+        """The buffered change of a voter, if any (not yet written)"""
+        key = (evaluation_id, voter_id)
+        with self._lock:
+            return self._pending.get(key) or self._flushing.get(key)
+
+    def pending_counts(self, evaluation_id: Any) -> Tuple[int, int]:
+        """(helpful, unhelpful) to add to the stored counters of an evaluation"""
+        with self._lock:
+            helpful, unhelpful = self._deltas.get(evaluation_id, (0, 0))
+        return helpful, unhelpful
+
+    def flush(self) -> int:
+        """Write every buffered change now; returns the number of votes written"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._flushing, self._pending = self._pending, {}
+                batch = self._flushing
+
+            started = time.perf_counter()
+            try:
+                self.writer(batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} buffered votes: {str(e)}")
+                with self._lock:
+                    # Put the batch back, under any newer change for the same voter
+                    for key, entry in batch.items():
+                        newer = self._pending.get(key)
+                        if newer is not None:
+                            newer.base, newer.vote_id = entry.base, entry.vote_id
+                        else:
+                            self._pending[key] = entry
+                    self._flushing = {}
+                    self.failures += 1
+                return 0
+
+            with self._lock:
+                for (evaluation_id, _), entry in batch.items():
+                    self._add_delta(evaluation_id, entry.desired, entry.base)
+                self._flushing = {}
+                self.flushes += 1
+                self.written += len(batch)
+                self.total_flush_seconds += time.perf_counter() - started
+            return len(batch)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="vote-buffer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flushing thread and write what is left"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            thread.join()
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of buffer metrics"""
+        with self._lock:
+            return {
+                "pending": len(self._pending) + len(self._flushing),
+                "accepted": self.accepted,
+                "flushes": self.flushes,
+                "written": self.written,
+                "failures": self.failures,
+                "total_flush_seconds": self.total_flush_seconds,
+            }
@@ -1,12 +1,56 @@
+import re
 from typing import Any, Dict, Optional, Union, Tuple, List
 from uuid import UUID
 
-from sqlalchemy import func, or_
+from sqlalchemy import String, exists, func, literal, or_, select, type_coerce
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.models.user import User, UserRole
-from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.models.evaluation import Evaluation
+from app.models.evaluation_criteria import EvaluationCriteriaScore
+from app.models.evaluation_report import EvaluationReport
+from app.models.evaluation_vote import EvaluationVote
+from app.schemas.user import (
+    UserCreate, UserUpdate, UserBulkAction, UserBulkActionType, UserContentPolicy
+)
+from app.crud.crud_evaluation_report import recompute_report_counters
+from app.crud.crud_evaluation_vote import recompute_evaluation_helpfulness
+from app.crud.crud_service import publish_rating_changes, recompute_service_ratings
+from app.core.security import get_password_hash, verify_password, verify_password_and_update
+from app.core.auth_cache import token_user_cache
+
+
+class DuplicateUserError(ValueError):
+    """Raised when a unique user field (email or username) is already taken"""
+    
+    def __init__(self, field: str):
+        super().__init__(f"A user with this {field} already exists")
+        self.field = field
+
+
+# Unique indexes/constraints of the users table -> field. MySQL names an
+# unnamed unique constraint after its column.
+USER_UNIQUE_KEYS = {
+    "ix_users_email": "email",
+    "email": "email",
+    "ix_users_username": "username",
+    "username": "username",
+}
+
+# MySQL: "Duplicate entry 'x' for key 'users.ix_users_email'" (no table prefix before 8.0)
+_MYSQL_DUPLICATE_KEY = re.compile(r"Duplicate entry '.*' for key '(?:users\.)?(\w+)'", re.DOTALL)
+# SQLite: "UNIQUE constraint failed: users.email"
+_SQLITE_UNIQUE_FAILED = re.compile(r"UNIQUE constraint failed: users\.(\w+)")
+
+
+def _duplicate_user_field(error: IntegrityError) -> Optional[str]:
+    """Return the unique field violated by an insert/update, if recognisable"""
+    message = str(error.orig)
+    match = _MYSQL_DUPLICATE_KEY.search(message) or _SQLITE_UNIQUE_FAILED.search(message)
+    if match is None:
+        return None
+    return USER_UNIQUE_KEYS.get(match.group(1))
 
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
@@ -19,21 +63,14 @@ def get_user_by_id(db: Session, user_id: UUID) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
 
 
-def get_users(
-    db: Session, 
-    *, 
-    page: int = 1, 
-    limit: int = 10,
+def _filter_users(
+    query,
+    *,
     search: Optional[str] = None,
     role: Optional[str] = None,
-    is_active: Optional[bool] = None,
-    sort_by: str = "id",
-    sort_order: str = "asc"
-) -> Tuple[List[User], int]:
-    """Get users with pagination, filtering, and sorting"""
-    query = db.query(User)
-    
-    # Apply filters
+    is_active: Optional[bool] = None
+):
+    """Apply the list filters shared by get_users and get_user_rows"""
     if search:
         search_term = f"%{search}%"
         query = query.filter(
@@ -49,16 +86,38 @@ def get_users(
     if is_active is not None:
         query = query.filter(User.is_active == is_active)
     
-    # Get total count before pagination
-    total = query.count()
-    
-    # Apply sorting
+    return query
+
+
+def _sort_users(query, sort_by: str, sort_order: str):
     if sort_by and hasattr(User, sort_by):
         column = getattr(User, sort_by)
         if sort_order.lower() == "desc":
             query = query.order_by(column.desc())
         else:
             query = query.order_by(column.asc())
+    return query
+
+
+def get_users(
+    db: Session, 
+    *, 
+    page: int = 1, 
+    limit: int = 10,
+    search: Optional[str] = None,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    sort_by: str = "id",
+    sort_order: str = "asc"
+) -> Tuple[List[User], int]:
+    """Get users with pagination, filtering, and sorting"""
+    query = _filter_users(db.query(User), search=search, role=role, is_active=is_active)
+    
+    # Get total count before pagination
+    total = query.count()
+    
+    # Apply sorting
+    query = _sort_users(query, sort_by, sort_order)
     
     # Apply pagination
     query = query.offset((page - 1) * limit).limit(limit)
@@ -66,8 +125,47 @@ def get_users(
     return query.all(), total
 
 
+# Fields of UserOut that can be requested with `fields=`
+USER_LIST_FIELDS = ("id", "username", "email", "full_name", "is_active", "role")
+
+
+def get_user_rows(
+    db: Session, 
+    *, 
+    page: int = 1, 
+    limit: int = 10,
+    search: Optional[str] = None,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    sort_by: str = "id",
+    sort_order: str = "asc",
+    fields: Optional[List[str]] = None
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Same filters as get_users, returning UserOut-shaped dicts
+    
+    Only the serialized columns (or the requested subset of USER_LIST_FIELDS)
+    are selected, never hashed_password, so the result can be rendered
+    directly by FastJSONResponse.
+    """
+    fields = list(fields or USER_LIST_FIELDS)
+    filters = dict(search=search, role=role, is_active=is_active)
+    total = _filter_users(db.query(func.count(User.id)), **filters).scalar()
+    
+    query = _filter_users(db.query(*(getattr(User, name) for name in fields)), **filters)
+    query = _sort_users(query, sort_by, sort_order)
+    rows = query.offset((page - 1) * limit).limit(limit).all()
+    
+    return [row._asdict() for row in rows], total
+
+
 def create_user(db: Session, user: UserCreate) -> User:
-    """Create a new user"""
+    """
+    Create a new user
+    
+    Uniqueness of email and username is enforced by the database indexes;
+    a violation raises DuplicateUserError instead of requiring lookups first.
+    """
     try:
         # Hash the password
         hashed_password = get_password_hash(user.password)
@@ -82,12 +180,21 @@ def create_user(db: Session, user: UserCreate) -> User:
             role=UserRole(user.role.value) if user.role is not None else UserRole.user
         )
         
-        # Add to database
+        # Add to database. All columns get client-side defaults, so the
+        # instance is complete after flush: detach it before committing so
+        # it is not expired and reading it back needs no extra SELECT.
         db.add(db_user)
+        db.flush()
+        db.expunge(db_user)
         db.commit()
-        db.refresh(db_user)
         
         return db_user
+    except IntegrityError as e:
+        db.rollback()
+        field = _duplicate_user_field(e)
+        if field is not None:
+            raise DuplicateUserError(field) from e
+        raise e
     except Exception as e:
         db.rollback()
         # Re-raise the exception after rollback
@@ -120,29 +227,179 @@ def update_user(
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
+        
+        # Role or active status may have changed: drop cached tokens
+        token_user_cache.invalidate_user(db_user.id)
         return db_user
     except Exception as e:
         db.rollback()
         raise e
 
 
+def update_password_hash(db: Session, user: User, hashed_password: str) -> User:
+    """Replace a user's password hash (e.g. after a work factor change)"""
+    try:
+        user.hashed_password = hashed_password
+        db.add(user)
+        db.commit()
+        return user
+    except Exception as e:
+        db.rollback()
+        raise e
+
+
+def user_has_evaluations(db: Session, user_id: UUID) -> bool:
+    """Check whether a user has at least one evaluation (EXISTS, no rows loaded)"""
+    return db.query(exists().where(Evaluation.user_id == user_id)).scalar()
+
+
 def delete_user(db: Session, user_id: UUID) -> Tuple[bool, str]:
     """Delete a user"""
     try:
-        user = get_user_by_id(db, user_id)
-        if not user:
+        if not db.query(exists().where(User.id == user_id)).scalar():
             return False, "User not found"
         
-        # Check if user has evaluations
-        if user.evaluations and len(user.evaluations) > 0:
-            return False, f"Cannot delete user with ID {user_id} because it has {len(user.evaluations)} evaluations"
+        # Check if user has evaluations (count only computed for the error message)
+        if user_has_evaluations(db, user_id):
+            count = db.query(func.count(Evaluation.id)).filter(Evaluation.user_id == user_id).scalar()
+            return False, f"Cannot delete user with ID {user_id} because it has {count} evaluations"
         
-        db.delete(user)
+        # Detach votes and reports with set-based updates rather than letting
+        # the ORM load both collections to null their foreign keys
+        db.query(EvaluationVote).filter(EvaluationVote.voter_id == user_id).update(
+            {EvaluationVote.voter_id: None}, synchronize_session=False
+        )
+        db.query(EvaluationReport).filter(EvaluationReport.reporter_id == user_id).update(
+            {EvaluationReport.reporter_id: None}, synchronize_session=False
+        )
+        db.query(User).filter(User.id == user_id).delete(synchronize_session=False)
         db.commit()
+        token_user_cache.invalidate_user(user_id)
         return True, ""
     except Exception as e:
         db.rollback()
         return False, str(e)
 
 
+# Maximum number of ids per IN (...) list in bulk statements
+BULK_CHUNK_SIZE = 1000
+
+
+def _chunks(items: List[Any], size: int = BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def bulk_update_users(db: Session, action: UserBulkAction) -> Dict[str, int]:
+    """
+    Deactivate or anonymize many users at once
+    
+    Every change is a set-based UPDATE/DELETE over chunks of ids, all in a
+    single transaction. The content policy decides what happens to the
+    evaluations, votes and reports of those users:
+    
+    * keep: left untouched
+    * reassign: evaluations move to `reassign_to`, votes and reports are
+      detached (voter/reporter set to NULL) so counts are preserved
+    * delete: evaluations (with their scores, votes and reports), votes cast
+      and reports filed by the users are deleted
+    
+    Ratings of services whose evaluations were deleted, and helpfulness
+    scores and moderation queue counters of evaluations whose votes or
+    pending reports were deleted, are recomputed once at the end.
+    """
+    user_ids = list(dict.fromkeys(action.user_ids))
+    result = {
+        "users_updated": 0,
+        "evaluations_affected": 0,
+        "votes_affected": 0,
+        "reports_affected": 0,
+        "services_recomputed": 0,
+    }
+    affected_services = set()
+    voted_evaluations = set()
+    reported_evaluations = set()
+    
+    try:
+        for chunk in _chunks(user_ids):
+            users = db.query(User).filter(User.id.in_(chunk))
+            
+            if action.action == UserBulkActionType.deactivate:
+                values = {User.is_active: False}
+            else:
+                user_id_text = type_coerce(User.id, String)
+                values = {
+                    User.is_active: False,
+                    User.username: literal("deleted-", String) + user_id_text,
+                    User.email: literal("deleted-", String) + user_id_text + literal("@anonymized.invalid", String),
+                    User.full_name: "Deleted user",
+                    # Not a valid bcrypt hash: no password can ever match
+                    User.hashed_password: "!",
+                }
+            result["users_updated"] += users.update(values, synchronize_session=False)
+            
+            if action.content == UserContentPolicy.keep:
+                continue
+            
+            evaluations = db.query(Evaluation).filter(Evaluation.user_id.in_(chunk))
+            votes = db.query(EvaluationVote).filter(EvaluationVote.voter_id.in_(chunk))
+            reports = db.query(EvaluationReport).filter(EvaluationReport.reporter_id.in_(chunk))
+            
+            if action.content == UserContentPolicy.reassign:
+                result["evaluations_affected"] += evaluations.update(
+                    {Evaluation.user_id: action.reassign_to}, synchronize_session=False
+                )
+                result["votes_affected"] += votes.update(
+                    {EvaluationVote.voter_id: None}, synchronize_session=False
+                )
+                result["reports_affected"] += reports.update(
+                    {EvaluationReport.reporter_id: None}, synchronize_session=False
+                )
+            else:
+                affected_services.update(
+                    service_id for (service_id,) in
+                    db.query(Evaluation.service_id).filter(Evaluation.user_id.in_(chunk)).distinct()
+                )
+                voted_evaluations.update(
+                    evaluation_id for (evaluation_id,) in
+                    db.query(EvaluationVote.evaluation_id).filter(EvaluationVote.voter_id.in_(chunk)).distinct()
+                )
+                reported_evaluations.update(
+                    evaluation_id for (evaluation_id,) in
+                    db.query(EvaluationReport.evaluation_id).filter(
+                        EvaluationReport.reporter_id.in_(chunk), EvaluationReport.resolved == False
+                    ).distinct()
+                )
+                evaluation_ids = select(Evaluation.id).where(Evaluation.user_id.in_(chunk))
+                db.query(EvaluationCriteriaScore).filter(
+                    EvaluationCriteriaScore.evaluation_id.in_(evaluation_ids)
+                ).delete(synchronize_session=False)
+                result["votes_affected"] += db.query(EvaluationVote).filter(
+                    or_(EvaluationVote.voter_id.in_(chunk), EvaluationVote.evaluation_id.in_(evaluation_ids))
+                ).delete(synchronize_session=False)
+                result["reports_affected"] += db.query(EvaluationReport).filter(
+                    or_(EvaluationReport.reporter_id.in_(chunk), EvaluationReport.evaluation_id.in_(evaluation_ids))
+                ).delete(synchronize_session=False)
+                result["evaluations_affected"] += evaluations.delete(synchronize_session=False)
+        
+        if voted_evaluations:
+            # Deleted evaluations are simply skipped
+            recompute_evaluation_helpfulness(db, list(voted_evaluations), commit=False)
+        if reported_evaluations:
+            recompute_report_counters(db, list(reported_evaluations), commit=False)
+        if affected_services:
+            result["services_recomputed"] = recompute_service_ratings(db, list(affected_services), commit=False)
+            publish_rating_changes(db, list(affected_services))
+        
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    for user_id in user_ids:
+        token_user_cache.invalidate_user(user_id)
+    
+    return result
+
+
 # Les fonctions verify_password et get_password_hash sont maintenant importées depuis app.core.security
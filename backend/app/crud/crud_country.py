@@ -73,6 +73,11 @@ def get_country_by_name(db: Session, name: str) -> Optional[Country]:
     return db.query(Country).filter(Country.name == name).first()
 
 
+def get_country_by_code(db: Session, code: str) -> Optional[Country]:
+    """Get a country by its code"""
+    return db.query(Country).filter(Country.code == code).first()
+
+
 def create_country(db: Session, country: CountryCreate) -> Country:
     """Create a new country"""
     db_country = Country(
@@ -1,20 +1,33 @@
-from typing import Any, Dict, Optional, Union, List, Tuple
+from typing import Any, Dict, Iterator, Optional, Sequence, Union, List, Tuple
 from datetime import datetime, timedelta
 from uuid import UUID
 
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import asc, desc, func, or_, and_, cast, Float
+from sqlalchemy.orm import Session, aliased, joinedload
+from sqlalchemy import asc, desc, func, or_, and_, case, cast, Float, select, true
 from sqlalchemy.sql import expression
 
 from app.models.evaluation import Evaluation, EvaluationStatus
 from app.models.user import User
+from app.models.service import Service
 from app.models.evaluation_vote import EvaluationVote
-from app.schemas.evaluation import EvaluationCreate, EvaluationUpdate
-from app.crud.crud_service import update_service_rating, get_service_by_id
+from app.schemas.evaluation import (
+    EvaluationCreate, EvaluationUpdate, EvaluationBulkModeration, EvaluationModerationAction
+)
+from app.core.outbox import first_deliveries, publish, subscribe
+from app.crud.crud_service import (
+    RATING_DELTA_CONSUMER, apply_service_score_delta, get_service_by_id, publish_rating_changes,
+    recompute_service_ratings
+)
+from app.crud.crud_evaluation_vote import vote_buffer
 
 
 def create_evaluation(db: Session, evaluation: EvaluationCreate, user_id: UUID) -> Evaluation:
-    """Create a new evaluation and update service rating"""
+    """
+    Create a new evaluation
+    
+    The service rating is updated asynchronously, from the evaluation.created
+    event committed with it (see apply_rating_deltas).
+    """
     # Déterminer si l'évaluation doit être automatiquement approuvée ou mise en attente
     # Par défaut, les évaluations sont en attente de modération
     status = EvaluationStatus.PENDING
@@ -33,14 +46,15 @@ def create_evaluation(db: Session, evaluation: EvaluationCreate, user_id: UUID)
         status=status
     )
     
-    # Add to database
+    # Add to database, with the event for the derived data in the same commit
     db.add(db_evaluation)
+    db.flush()
+    publish(db, "evaluation.created", db_evaluation.id, _rating_delta(db_evaluation, 1, evaluation.score))
+    if status == EvaluationStatus.APPROVED:
+        publish(db, "evaluation.approved", evaluation.service_id, {"evaluation_ids": [db_evaluation.id]})
     db.commit()
     db.refresh(db_evaluation)
     
-    # Update service rating (average of all evaluations)
-    _update_service_average_rating(db, evaluation.service_id)
-    
     return db_evaluation
 
 
@@ -59,20 +73,21 @@ def update_evaluation(
         return None
     
     # Update fields if provided
+    score_delta = 0.0
     if evaluation_update.score is not None:
+        score_delta = evaluation_update.score - db_evaluation.score
         db_evaluation.score = evaluation_update.score
     
     if evaluation_update.comment is not None:
         db_evaluation.comment = evaluation_update.comment
     
-    # Save changes
+    # Save changes (and the rating refresh event in the same transaction)
     db.add(db_evaluation)
+    if score_delta and db_evaluation.status != EvaluationStatus.REJECTED:
+        publish(db, "evaluation.updated", db_evaluation.id, _rating_delta(db_evaluation, 0, score_delta))
     db.commit()
     db.refresh(db_evaluation)
     
-    # Update service rating
-    _update_service_average_rating(db, db_evaluation.service_id)
-    
     return db_evaluation
 
 
@@ -89,29 +104,127 @@ def delete_evaluation(db: Session, evaluation_id: UUID, user_id: UUID, is_admin:
     if not is_admin and db_evaluation.user_id != user_id:
         return False, "Not authorized to delete this evaluation"
     
-    # Store service_id for rating update
-    service_id = db_evaluation.service_id
-    
-    # Delete the evaluation
+    # Delete the evaluation; the service rating is refreshed from the event
+    if db_evaluation.status != EvaluationStatus.REJECTED:
+        publish(db, "evaluation.deleted", db_evaluation.id, _rating_delta(db_evaluation, -1, -db_evaluation.score))
     db.delete(db_evaluation)
     db.commit()
     
-    # Update service rating
-    _update_service_average_rating(db, service_id)
-    
     return True, ""
 
 
+def _rating_delta(db_evaluation: Evaluation, count_delta: int, sum_delta: float) -> Dict[str, Any]:
+    """Payload of the events changing the service totals (see apply_service_score_delta)"""
+    return {
+        "service_id": db_evaluation.service_id,
+        "count_delta": count_delta,
+        "sum_delta": sum_delta,
+        "evaluated_at": db_evaluation.timestamp,
+    }
+
+
+@subscribe("evaluation.created")
+@subscribe("evaluation.updated")
+@subscribe("evaluation.deleted")
+def apply_rating_deltas(db: Session, events: List[Any]) -> None:
+    """
+    Outbox handler: fold evaluation writes into their services' running totals
+    
+    Each event's delta is applied once (see first_deliveries): a replayed
+    event, or one already counted by a recompute of the moderation paths,
+    is skipped.
+    """
+    service_ids = []
+    for event in first_deliveries(db, RATING_DELTA_CONSUMER, events):
+        payload = event.payload
+        service_id = UUID(payload["service_id"])
+        evaluated_at = payload.get("evaluated_at")
+        apply_service_score_delta(
+            db, service_id, payload["count_delta"], payload["sum_delta"], commit=False,
+            evaluated_at=datetime.fromisoformat(evaluated_at) if evaluated_at else None
+        )
+        service_ids.append(service_id)
+    if service_ids:
+        publish_rating_changes(db, list(dict.fromkeys(service_ids)))
+
+
 def get_evaluation_by_id(db: Session, evaluation_id: UUID) -> Optional[Evaluation]:
     """Get an evaluation by ID"""
     return db.query(Evaluation).filter(Evaluation.id == evaluation_id).first()
 
 
-def get_evaluations(
-    db: Session,
+def bulk_moderate_evaluations(db: Session, moderation: EvaluationBulkModeration) -> Dict[str, int]:
+    """
+    Approve or reject many evaluations at once
+    
+    The selection (ids and/or filters, restricted to `current_status`) is
+    changed with set-based UPDATEs over chunks of 1000 ids, all in a single
+    transaction. Rejected evaluations do not count towards ratings, so when
+    evaluations enter or leave the rejected status the rating of each
+    affected service is recomputed once at the end.
+    """
+    target = (
+        EvaluationStatus.APPROVED if moderation.action == EvaluationModerationAction.approve
+        else EvaluationStatus.REJECTED
+    )
+    query = _filter_evaluations(
+        db.query(Evaluation),
+        service_id=moderation.service_id,
+        min_score=moderation.min_score,
+        max_score=moderation.max_score,
+        date_from=moderation.date_from,
+        date_to=moderation.date_to,
+        status=moderation.current_status
+    ).filter(Evaluation.status != target)
+    
+    if moderation.evaluation_ids is not None:
+        evaluation_ids = list(dict.fromkeys(moderation.evaluation_ids))
+        selections = [
+            query.filter(Evaluation.id.in_(evaluation_ids[start:start + 1000]))
+            for start in range(0, len(evaluation_ids), 1000)
+        ]
+    else:
+        selections = [query]
+    
+    result = {"evaluations_updated": 0, "services_recomputed": 0}
+    affected_services = set()
+    try:
+        for selection in selections:
+            # Approving pending evaluations leaves ratings unchanged
+            rating_changes = selection if target == EvaluationStatus.REJECTED else selection.filter(
+                Evaluation.status == EvaluationStatus.REJECTED
+            )
+            affected_services.update(
+                service_id for (service_id,) in rating_changes.with_entities(Evaluation.service_id).distinct()
+            )
+            if target == EvaluationStatus.APPROVED:
+                # Live viewers of the services receive the newly approved evaluations
+                approved: Dict[Any, List[Any]] = {}
+                for evaluation_id, service_id in selection.with_entities(Evaluation.id, Evaluation.service_id):
+                    approved.setdefault(service_id, []).append(evaluation_id)
+                for service_id, evaluation_ids in approved.items():
+                    for start in range(0, len(evaluation_ids), 1000):
+                        publish(db, "evaluation.approved", service_id,
+                                {"evaluation_ids": evaluation_ids[start:start + 1000]})
+            result["evaluations_updated"] += selection.update(
+                {Evaluation.status: target}, synchronize_session=False
+            )
+        
+        if affected_services:
+            result["services_recomputed"] = recompute_service_ratings(db, list(affected_services), commit=False)
+            publish_rating_changes(db, list(affected_services))
+        
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    return result
+
+
+def _filter_evaluations(
+    query,
     *,
-    page: int = 1,
-    limit: int = 10,
     service_id: Optional[UUID] = None,
     user_id: Optional[UUID] = None,
     min_score: Optional[float] = None,
@@ -119,17 +232,9 @@ def get_evaluations(
     search_comment: Optional[str] = None,
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
-    status: Optional[EvaluationStatus] = None,
-    sort_by: str = "timestamp",
-    sort_order: str = "desc",
-    include_user: bool = True,
-    include_service: bool = True,
-    include_votes: bool = True
-) -> Tuple[List[Evaluation], int]:
-    """Get evaluations with advanced filtering, sorting and pagination"""
-    query = db.query(Evaluation)
-    
-    # Apply filters
+    status: Optional[EvaluationStatus] = None
+):
+    """Apply the list filters shared by get_evaluations and get_evaluation_rows"""
     if service_id is not None:
         query = query.filter(Evaluation.service_id == service_id)
     
@@ -154,6 +259,74 @@ def get_evaluations(
     if status is not None:
         query = query.filter(Evaluation.status == status)
     
+    return query
+
+
+def _sort_evaluations(query, sort_by: str, sort_order: str):
+    if sort_by and hasattr(Evaluation, sort_by):
+        column = getattr(Evaluation, sort_by)
+        # The id tie-break makes the order total, as keyset pagination requires
+        if sort_order.lower() == "desc":
+            query = query.order_by(column.desc(), Evaluation.id.desc())
+        else:
+            query = query.order_by(column.asc(), Evaluation.id.asc())
+    return query
+
+
+# Sort fields usable with keyset pagination, with the parser of their cursor value
+KEYSET_SORT_FIELDS = {
+    "timestamp": datetime.fromisoformat,
+    "score": float,
+    "helpfulness": float,
+}
+
+
+def _after_key(query, sort_by: str, sort_order: str, after: Sequence[Any]):
+    """Keep the rows that follow the (sort value, id) key of the previous page"""
+    try:
+        value = KEYSET_SORT_FIELDS[sort_by](after[0])
+        last_id = UUID(str(after[1]))
+    except (KeyError, IndexError, TypeError, ValueError):
+        raise ValueError(f"Invalid cursor for sort_by={sort_by}")
+    
+    column = getattr(Evaluation, sort_by)
+    if sort_order.lower() == "desc":
+        return query.filter(or_(column < value, and_(column == value, Evaluation.id < last_id)))
+    return query.filter(or_(column > value, and_(column == value, Evaluation.id > last_id)))
+
+
+def get_evaluations(
+    db: Session,
+    *,
+    page: int = 1,
+    limit: int = 10,
+    service_id: Optional[UUID] = None,
+    user_id: Optional[UUID] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    search_comment: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    status: Optional[EvaluationStatus] = None,
+    sort_by: str = "timestamp",
+    sort_order: str = "desc",
+    include_user: bool = True,
+    include_service: bool = True,
+    include_votes: bool = True
+) -> Tuple[List[Evaluation], int]:
+    """Get evaluations with advanced filtering, sorting and pagination"""
+    query = _filter_evaluations(
+        db.query(Evaluation),
+        service_id=service_id,
+        user_id=user_id,
+        min_score=min_score,
+        max_score=max_score,
+        search_comment=search_comment,
+        date_from=date_from,
+        date_to=date_to,
+        status=status
+    )
+    
     # Include related data if requested
     if include_user:
         query = query.options(joinedload(Evaluation.user))
@@ -168,12 +341,7 @@ def get_evaluations(
     total = query.count()
     
     # Apply sorting
-    if sort_by and hasattr(Evaluation, sort_by):
-        column = getattr(Evaluation, sort_by)
-        if sort_order.lower() == "desc":
-            query = query.order_by(column.desc())
-        else:
-            query = query.order_by(column.asc())
+    query = _sort_evaluations(query, sort_by, sort_order)
     
     # Apply pagination
     query = query.offset((page - 1) * limit).limit(limit)
@@ -181,6 +349,188 @@ def get_evaluations(
     return query.all(), total
 
 
+# Fields of EvaluationWithDetails that can be requested with `fields=`
+EVALUATION_LIST_FIELDS = (
+    "id", "user_id", "service_id", "score", "comment", "timestamp", "status", "helpfulness",
+    "user", "service", "helpful_votes", "unhelpful_votes",
+)
+_USER_FIELDS = ("id", "username", "email", "full_name", "is_active", "role")
+_SERVICE_FIELDS = ("id", "name", "category", "country_id", "rating")
+
+
+def get_evaluation_rows(
+    db: Session,
+    *,
+    page: int = 1,
+    limit: int = 10,
+    service_id: Optional[UUID] = None,
+    user_id: Optional[UUID] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    search_comment: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    status: Optional[EvaluationStatus] = None,
+    sort_by: str = "timestamp",
+    sort_order: str = "desc",
+    include_votes: bool = True,
+    fields: Optional[List[str]] = None,
+    after: Optional[Sequence[Any]] = None,
+    include_total: bool = True,
+    voter_id: Optional[UUID] = None
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    Same filters as get_evaluations, returning EvaluationWithDetails-shaped dicts
+    
+    Only plain columns are selected (the page of evaluations joined to users,
+    services and aggregated vote counts in a single statement), so no ORM
+    objects or Pydantic models are built: the dicts can be rendered directly
+    by FastJSONResponse.
+    
+    `fields` (a subset of EVALUATION_LIST_FIELDS) restricts the returned keys;
+    the user/service joins and the vote aggregate are skipped when not needed.
+    
+    `after` switches to keyset pagination: the (sort value, id) of the last
+    row already returned, for a sort_by in KEYSET_SORT_FIELDS; `page` is then
+    ignored. Raises ValueError for an unusable key. With `include_total=False`
+    the COUNT(*) is skipped and None is returned as total.
+    
+    With `voter_id`, each item also gets `my_vote`: that user's vote on it
+    (True/False, None if they did not vote), from the same statement.
+    """
+    fields = list(fields or EVALUATION_LIST_FIELDS)
+    filters = dict(
+        service_id=service_id,
+        user_id=user_id,
+        min_score=min_score,
+        max_score=max_score,
+        search_comment=search_comment,
+        date_from=date_from,
+        date_to=date_to,
+        status=status
+    )
+    total = None
+    if include_total:
+        total = _filter_evaluations(db.query(func.count(Evaluation.id)), **filters).scalar()
+    
+    # Paginate evaluations first so that joins and vote counts only run for the page
+    page_query = _filter_evaluations(db.query(*Evaluation.__table__.columns), **filters)
+    page_query = _sort_evaluations(page_query, sort_by, sort_order)
+    if after is not None:
+        page_query = _after_key(page_query, sort_by, sort_order, after)
+    else:
+        page_query = page_query.offset((page - 1) * limit)
+    page_rows = page_query.limit(limit).subquery()
+    
+    columns = [page_rows.c[name] for name in fields if name in page_rows.c]
+    if "user" in fields:
+        columns.extend(getattr(User, name).label(f"user__{name}") for name in _USER_FIELDS)
+    if "service" in fields:
+        columns.extend(getattr(Service, name).label(f"service__{name}") for name in _SERVICE_FIELDS)
+    
+    query = db.query(*columns).select_from(page_rows)
+    if "user" in fields:
+        query = query.join(User, User.id == page_rows.c.user_id)
+    if "service" in fields:
+        query = query.join(Service, Service.id == page_rows.c.service_id)
+    
+    vote_fields = [name for name in ("helpful_votes", "unhelpful_votes") if name in fields]
+    if include_votes and vote_fields:
+        # One aggregate over the votes of the page, instead of a lookup per row
+        vote_counts = (
+            select(
+                EvaluationVote.evaluation_id,
+                func.sum(case((EvaluationVote.is_helpful == true(), 1), else_=0)).label("helpful_votes"),
+                func.sum(case((EvaluationVote.is_helpful == true(), 0), else_=1)).label("unhelpful_votes"),
+            )
+            .where(EvaluationVote.evaluation_id.in_(select(page_rows.c.id)))
+            .group_by(EvaluationVote.evaluation_id)
+            .subquery()
+        )
+        query = query.outerjoin(vote_counts, vote_counts.c.evaluation_id == page_rows.c.id).add_columns(
+            *(vote_counts.c[name] for name in vote_fields)
+        )
+    
+    if voter_id is not None:
+        my_vote = aliased(EvaluationVote)
+        query = query.outerjoin(
+            my_vote, and_(my_vote.evaluation_id == page_rows.c.id, my_vote.voter_id == voter_id)
+        ).add_columns(my_vote.is_helpful.label("my_vote"), page_rows.c.id.label("my_vote__evaluation_id"))
+    
+    # Subquery order is not preserved by the outer select
+    sort_column = page_rows.c.get(sort_by)
+    if sort_column is not None:
+        if sort_order.lower() == "desc":
+            query = query.order_by(sort_column.desc(), page_rows.c.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), page_rows.c.id.asc())
+    rows = query.all()
+    
+    items = []
+    for row in rows:
+        values = row._mapping
+        item = {name: values[name] for name in fields if name in page_rows.c}
+        if "user" in fields:
+            item["user"] = {name: values[f"user__{name}"] for name in _USER_FIELDS}
+        if "service" in fields:
+            item["service"] = {name: values[f"service__{name}"] for name in _SERVICE_FIELDS}
+            item["service"]["rating"] = item["service"]["rating"] or 0.0
+        for name in vote_fields:
+            item[name] = (values[name] or 0) if include_votes else 0
+        if voter_id is not None:
+            # Votes still in the write-behind buffer
+            pending = vote_buffer.pending_vote(values["my_vote__evaluation_id"], voter_id)
+            item["my_vote"] = pending.desired if pending is not None else values["my_vote"]
+        items.append(item)
+    return items, total
+
+
+# Columns of the rows yielded by iter_evaluation_export_rows
+EVALUATION_EXPORT_COLUMNS = (
+    "id", "service_id", "service_name", "user_id", "username",
+    "score", "comment", "status", "timestamp",
+)
+
+
+def iter_evaluation_export_rows(
+    db: Session,
+    *,
+    batch_size: int = 1000,
+    service_id: Optional[UUID] = None,
+    user_id: Optional[UUID] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    status: Optional[EvaluationStatus] = None
+) -> Iterator[Tuple]:
+    """
+    Stream evaluations matching the list filters as tuples of EVALUATION_EXPORT_COLUMNS
+    
+    Rows are read through a server-side cursor `batch_size` at a time, so the
+    whole result is never held in memory.
+    """
+    query = (
+        db.query(
+            Evaluation.id, Evaluation.service_id, Service.name, Evaluation.user_id, User.username,
+            Evaluation.score, Evaluation.comment, Evaluation.status, Evaluation.timestamp
+        )
+        .join(Service, Service.id == Evaluation.service_id)
+        .join(User, User.id == Evaluation.user_id)
+    )
+    query = _filter_evaluations(
+        query,
+        service_id=service_id,
+        user_id=user_id,
+        min_score=min_score,
+        max_score=max_score,
+        date_from=date_from,
+        date_to=date_to,
+        status=status
+    )
+    yield from query.order_by(Evaluation.timestamp, Evaluation.id).yield_per(batch_size)
+
+
 def get_evaluations_by_service(
     db: Session, 
     service_id: UUID,
@@ -298,12 +648,3 @@ def check_user_has_evaluated_service(db: Session, user_id: UUID, service_id: UUI
         Evaluation.service_id == service_id
     ).first()
 
-
-def _update_service_average_rating(db: Session, service_id: UUID) -> None:
-    """Update a service's rating based on the average of all evaluations"""
-    # Calculate average score
-    result = db.query(func.avg(Evaluation.score)).filter(Evaluation.service_id == service_id).scalar()
-    
-    # Update service rating
-    if result is not None:
-        update_service_rating(db, service_id, float(result))
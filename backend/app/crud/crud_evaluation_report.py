@@ -1,44 +1,70 @@
-from typing import List, Optional, Tuple, Dict, Any
+from typing import List, Optional, Sequence, Tuple, Dict, Any
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, desc, asc
+from uuid import UUID
 
-from app.models.evaluation_report import EvaluationReport, ReportReason
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, and_, or_, desc, asc, bindparam, update
+
+from app.core.config import settings
+from app.core.outbox import first_deliveries, mark_applied, publish, subscribe
+from app.core.ranking import bayesian_average
+from app.crud.crud_service import publish_rating_changes, recompute_service_ratings
+from app.models.evaluation_report import EvaluationReport, ReportReason, ReportResolution
 from app.models.evaluation import Evaluation, EvaluationStatus
+from app.models.outbox_event import OutboxEvent
 from app.models.user import User
 from app.schemas.evaluation import EvaluationReportCreate
 
 
+# Consumer name of apply_report_counters in the applied outbox events
+REPORT_COUNTER_CONSUMER = "report_counters"
+
+
+def reporter_reputation(accepted: int, rejected: int) -> float:
+    """
+    Weight of a reporter's reports in the moderation queue, between 0 and 1
+    
+    The share of their past reports that were accepted, shrunk towards
+    MODERATION_REPUTATION_PRIOR so that new reporters start in the middle.
+    """
+    return bayesian_average(
+        accepted, accepted + rejected,
+        settings.MODERATION_REPUTATION_PRIOR, settings.MODERATION_REPUTATION_PRIOR_WEIGHT
+    )
+
+
 def create_evaluation_report(
-    db: Session, report: EvaluationReportCreate, reporter_id: int
+    db: Session, report: EvaluationReportCreate, reporter_id: UUID
 ) -> EvaluationReport:
     """
     Create a new evaluation report.
+    
+    The evaluation's queue counters are incremented asynchronously, from the
+    evaluation.reported event committed with the report (see
+    apply_report_counters).
     """
+    counts = db.query(User.reports_accepted, User.reports_rejected).filter(User.id == reporter_id).first()
+    weight = reporter_reputation(*counts) if counts else settings.MODERATION_REPUTATION_PRIOR
+    now = datetime.utcnow()
+    
     db_report = EvaluationReport(
         evaluation_id=report.evaluation_id,
         reporter_id=reporter_id,
         reason=report.reason,
         description=report.description,
-        timestamp=datetime.utcnow(),
-        resolved=0
+        created_at=now,
+        resolved=False,
+        weight=weight
     )
     
-    # Automatically flag the evaluation if it has multiple reports
-    evaluation = db.query(Evaluation).filter(Evaluation.id == report.evaluation_id).first()
-    if evaluation:
-        reports_count = db.query(EvaluationReport).filter(
-            EvaluationReport.evaluation_id == report.evaluation_id,
-            EvaluationReport.resolved == 0
-        ).count()
-        
-        # If this is at least the second unresolved report, flag the evaluation
-        if reports_count >= 1:
-            evaluation.status = EvaluationStatus.FLAGGED
-            db.add(evaluation)
+    try:
+        db.add(db_report)
+        publish(db, "evaluation.reported", report.evaluation_id, {"weight": weight, "reported_at": now})
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
     
-    db.add(db_report)
-    db.commit()
     db.refresh(db_report)
     return db_report
 
@@ -47,8 +73,8 @@ def get_evaluation_reports(
     db: Session,
     skip: int = 0,
     limit: int = 100,
-    evaluation_id: Optional[int] = None,
-    reporter_id: Optional[int] = None,
+    evaluation_id: Optional[UUID] = None,
+    reporter_id: Optional[UUID] = None,
     reason: Optional[ReportReason] = None,
     resolved: Optional[int] = None,
     sort_by: str = "timestamp",
@@ -56,8 +82,12 @@ def get_evaluation_reports(
 ) -> Tuple[List[EvaluationReport], int]:
     """
     Get evaluation reports with filtering and sorting options.
+    
+    `resolved`: 0 = pending, 1 = accepted, 2 = rejected.
     """
-    query = db.query(EvaluationReport)
+    query = db.query(EvaluationReport).options(
+        joinedload(EvaluationReport.reporter), joinedload(EvaluationReport.evaluation)
+    )
     
     # Apply filters
     if evaluation_id is not None:
@@ -66,8 +96,11 @@ def get_evaluation_reports(
         query = query.filter(EvaluationReport.reporter_id == reporter_id)
     if reason is not None:
         query = query.filter(EvaluationReport.reason == reason)
-    if resolved is not None:
-        query = query.filter(EvaluationReport.resolved == resolved)
+    if resolved == 0:
+        query = query.filter(EvaluationReport.resolved == False)
+    elif resolved is not None:
+        resolution = ReportResolution.accepted if resolved == 1 else ReportResolution.rejected
+        query = query.filter(EvaluationReport.resolution == resolution)
     
     # Count total before pagination
     total = query.count()
@@ -84,15 +117,224 @@ def get_evaluation_reports(
     return reports, total
 
 
-def get_evaluation_report_by_id(db: Session, report_id: int) -> Optional[EvaluationReport]:
+def get_evaluation_report_by_id(db: Session, report_id: UUID) -> Optional[EvaluationReport]:
     """
     Get an evaluation report by ID.
     """
     return db.query(EvaluationReport).filter(EvaluationReport.id == report_id).first()
 
 
+# Moderation queue order, backed by ix_evaluations_moderation_queue:
+# (column, descending) pairs, the id making the order total
+MODERATION_QUEUE_ORDER = (
+    (Evaluation.unresolved_report_count, True),
+    (Evaluation.report_weight, True),
+    (Evaluation.first_reported_at, False),
+    (Evaluation.id, False),
+)
+
+
+def _after(order: Sequence[Tuple[Any, bool]], key: Sequence[Any]):
+    """Rows that follow `key` in a mixed-direction lexicographic `order`"""
+    condition = None
+    for (column, descending), value in reversed(list(zip(order, key))):
+        step = column < value if descending else column > value
+        condition = step if condition is None else or_(step, and_(column == value, condition))
+    return condition
+
+
+def get_moderation_queue(
+    db: Session, limit: int = 50, after: Optional[Sequence[Any]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[List[Any]]]:
+    """
+    Get evaluations with unresolved reports in moderation order
+    
+    Most reported first, then highest reporter reputation, then oldest
+    report. Keyset paginated: `after` is the key returned with the previous
+    page (None at the end of the queue). Raises ValueError for an invalid key.
+    """
+    query = db.query(
+        Evaluation.id.label("evaluation_id"), Evaluation.service_id, Evaluation.user_id,
+        Evaluation.score, Evaluation.comment, Evaluation.status, Evaluation.timestamp,
+        Evaluation.unresolved_report_count, Evaluation.report_weight, Evaluation.first_reported_at,
+    ).filter(Evaluation.unresolved_report_count > 0)
+    
+    if after is not None:
+        try:
+            key = [int(after[0]), float(after[1]), datetime.fromisoformat(after[2]), UUID(str(after[3]))]
+        except (IndexError, TypeError, ValueError):
+            raise ValueError("Invalid moderation queue cursor")
+        query = query.filter(_after(MODERATION_QUEUE_ORDER, key))
+    
+    query = query.order_by(*(column.desc() if descending else column.asc()
+                             for column, descending in MODERATION_QUEUE_ORDER))
+    items = [row._asdict() for row in query.limit(limit).all()]
+    
+    next_key = None
+    if len(items) == limit:
+        last = items[-1]
+        next_key = [
+            last["unresolved_report_count"], last["report_weight"], last["first_reported_at"], last["evaluation_id"]
+        ]
+    return items, next_key
+
+
+def recompute_report_counters(db: Session, evaluation_ids: List[Any], commit: bool = True) -> int:
+    """
+    Rebuild the moderation queue counters of many evaluations
+    
+    One grouped aggregate over their unresolved reports and one executemany
+    UPDATE per chunk. Returns the number of evaluations updated.
+    
+    The pending evaluation.reported events of these evaluations are counted
+    by the rebuild, so they are recorded as applied in the same transaction.
+    """
+    updated = 0
+    for start in range(0, len(evaluation_ids), 1000):
+        chunk = evaluation_ids[start:start + 1000]
+        mark_applied(db, REPORT_COUNTER_CONSUMER, [
+            event_id for (event_id,) in db.query(OutboxEvent.id).filter(
+                OutboxEvent.topic == "evaluation.reported", OutboxEvent.processed_at.is_(None),
+                OutboxEvent.aggregate_id.in_(chunk)
+            )
+        ])
+        counters = {
+            evaluation_id: (count, weight, first_reported_at)
+            for evaluation_id, count, weight, first_reported_at in db.query(
+                EvaluationReport.evaluation_id, func.count(EvaluationReport.id),
+                func.sum(EvaluationReport.weight), func.min(EvaluationReport.created_at)
+            ).filter(
+                EvaluationReport.evaluation_id.in_(chunk), EvaluationReport.resolved == False
+            ).group_by(EvaluationReport.evaluation_id)
+        }
+        params = []
+        for (evaluation_id,) in db.query(Evaluation.id).filter(Evaluation.id.in_(chunk)):
+            count, weight, first_reported_at = counters.get(evaluation_id, (0, 0.0, None))
+            params.append({
+                "id": evaluation_id,
+                "unresolved_report_count": count,
+                "report_weight": float(weight or 0.0),
+                "first_reported_at": first_reported_at,
+            })
+        if params:
+            db.execute(update(Evaluation), params)
+        updated += len(params)
+    
+    if commit:
+        db.commit()
+    return updated
+
+
+@subscribe("evaluation.reported")
+def apply_report_counters(db: Session, events: List[Any]) -> None:
+    """
+    Outbox handler: add new reports to the queue counters of their evaluations
+    
+    Each event is applied once (see first_deliveries): a replayed event, or
+    one already counted by recompute_report_counters, is skipped.
+    """
+    for event in first_deliveries(db, REPORT_COUNTER_CONSUMER, events):
+        reported_at = datetime.fromisoformat(event.payload["reported_at"])
+        db.execute(
+            update(Evaluation)
+            .where(Evaluation.id == event.aggregate_id)
+            .values(
+                unresolved_report_count=Evaluation.unresolved_report_count + 1,
+                report_weight=Evaluation.report_weight + event.payload["weight"],
+                first_reported_at=func.coalesce(Evaluation.first_reported_at, reported_at),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+def resolve_evaluation_reports(
+    db: Session, report_ids: List[UUID], resolution: ReportResolution, admin_id: Optional[UUID]
+) -> Dict[str, int]:
+    """
+    Resolve many reports in a single transaction
+    
+    Accepting a report rejects its evaluation (recomputing its service's
+    rating) and also accepts the other pending reports on it, which empties
+    its queue entry. Unknown or already
+    resolved ids are skipped. The queue counters of the evaluations and the
+    reputation counters of the reporters are updated once at the end.
+    """
+    report_ids = list(dict.fromkeys(report_ids))
+    now = datetime.utcnow()
+    values = {
+        EvaluationReport.resolved: True,
+        EvaluationReport.resolution: resolution,
+        EvaluationReport.resolved_at: now,
+        EvaluationReport.resolved_by: admin_id,
+    }
+    resolved: List[Tuple[Any, Any, Any]] = []
+    
+    try:
+        for start in range(0, len(report_ids), 1000):
+            chunk = report_ids[start:start + 1000]
+            pending = EvaluationReport.resolved == False
+            if resolution == ReportResolution.accepted:
+                reported = {
+                    evaluation_id for (evaluation_id,) in db.query(EvaluationReport.evaluation_id).filter(
+                        EvaluationReport.id.in_(chunk), pending
+                    )
+                }
+                # Every pending report on the rejected evaluations is upheld
+                selection = and_(EvaluationReport.evaluation_id.in_(reported), pending)
+            else:
+                selection = and_(EvaluationReport.id.in_(chunk), pending)
+            
+            rows = db.query(EvaluationReport.id, EvaluationReport.evaluation_id, EvaluationReport.reporter_id).filter(
+                selection
+            ).with_for_update().all()
+            if not rows:
+                continue
+            resolved.extend(rows)
+            db.query(EvaluationReport).filter(selection).update(values, synchronize_session=False)
+        
+        evaluation_ids = list({evaluation_id for _, evaluation_id, _ in resolved})
+        if resolution == ReportResolution.accepted and evaluation_ids:
+            rejected = db.query(Evaluation).filter(
+                Evaluation.id.in_(evaluation_ids), Evaluation.status != EvaluationStatus.REJECTED
+            )
+            # Rejected evaluations no longer count towards their service's rating
+            services = [service_id for (service_id,) in rejected.with_entities(Evaluation.service_id).distinct()]
+            rejected.update({Evaluation.status: EvaluationStatus.REJECTED}, synchronize_session=False)
+            recompute_service_ratings(db, services, commit=False)
+            publish_rating_changes(db, services)
+        recompute_report_counters(db, evaluation_ids, commit=False)
+        
+        per_reporter: Dict[Any, int] = {}
+        for _, _, reporter_id in resolved:
+            if reporter_id is not None:
+                per_reporter[reporter_id] = per_reporter.get(reporter_id, 0) + 1
+        if per_reporter:
+            counter = (
+                User.__table__.c.reports_accepted if resolution == ReportResolution.accepted
+                else User.__table__.c.reports_rejected
+            )
+            db.execute(
+                User.__table__.update()
+                .where(User.__table__.c.id == bindparam("reporter_id"))
+                .values({counter: counter + bindparam("resolved_count")}),
+                [{"reporter_id": reporter_id, "resolved_count": count} for reporter_id, count in per_reporter.items()]
+            )
+        
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    resolved_ids = {report_id for report_id, _, _ in resolved}
+    return {
+        "resolved": len(resolved),
+        "skipped": sum(1 for report_id in report_ids if report_id not in resolved_ids),
+        "evaluations_updated": len(evaluation_ids),
+    }
+
+
 def resolve_evaluation_report(
-    db: Session, report_id: int, resolution: int, admin_id: int
+    db: Session, report_id: UUID, resolution: int, admin_id: UUID
 ) -> Tuple[bool, str]:
     """
     Resolve an evaluation report.
@@ -102,34 +344,12 @@ def resolve_evaluation_report(
     if not report:
         return False, "Report not found"
     
-    if report.resolved != 0:
+    if report.resolved:
         return False, "Report already resolved"
     
-    report.resolved = resolution
-    
-    # If accepting the report, update the evaluation status
-    if resolution == 1:
-        evaluation = db.query(Evaluation).filter(Evaluation.id == report.evaluation_id).first()
-        if evaluation:
-            evaluation.status = EvaluationStatus.REJECTED
-            db.add(evaluation)
-    
-    # If rejecting the report and there are no other unresolved reports,
-    # restore the evaluation status to APPROVED
-    elif resolution == 2:
-        unresolved_reports = db.query(EvaluationReport).filter(
-            EvaluationReport.evaluation_id == report.evaluation_id,
-            EvaluationReport.resolved == 0,
-            EvaluationReport.id != report_id
-        ).count()
-        
-        if unresolved_reports == 0:
-            evaluation = db.query(Evaluation).filter(Evaluation.id == report.evaluation_id).first()
-            if evaluation and evaluation.status == EvaluationStatus.FLAGGED:
-                evaluation.status = EvaluationStatus.APPROVED
-                db.add(evaluation)
-    
-    db.add(report)
-    db.commit()
-    db.refresh(report)
+    resolve_evaluation_reports(
+        db, [report_id],
+        ReportResolution.accepted if resolution == 1 else ReportResolution.rejected,
+        admin_id
+    )
     return True, "Report resolved successfully"
@@ -1,13 +1,150 @@
 from typing import List, Optional, Tuple, Dict, Any
 from datetime import datetime
+import uuid
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, desc, asc
+from sqlalchemy import func, and_, or_, desc, asc, case, update, insert, delete, bindparam, tuple_, cast, Integer
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 
+from app.core.config import settings
+from app.core.ranking import wilson_lower_bound
+from app.core.vote_buffer import BufferedVote, VoteBuffer, VoteKey, vote_contribution
+from app.database import SessionLocal
 from app.models.evaluation_vote import EvaluationVote
 from app.models.evaluation import Evaluation
+from app.models.user import User
 from app.schemas.evaluation import EvaluationVoteCreate
 
 
+def _apply_vote_deltas(db: Session, deltas: Dict[Any, Tuple[int, int]]) -> None:
+    """
+    Update the vote counters and Wilson helpfulness score of evaluations
+    
+    `deltas` maps evaluation ids to (helpful, unhelpful) increments. The
+    counters are incremented atomically; the UPDATE keeps the rows locked
+    until commit, so the scores computed from the values read back are
+    consistent with them.
+    """
+    deltas = {evaluation_id: delta for evaluation_id, delta in deltas.items() if delta != (0, 0)}
+    if not deltas:
+        return
+    table = Evaluation.__table__
+    db.execute(
+        table.update()
+        .where(table.c.id == bindparam("evaluation_id"))
+        .values({
+            table.c.helpful_count: table.c.helpful_count + bindparam("helpful_delta"),
+            table.c.unhelpful_count: table.c.unhelpful_count + bindparam("unhelpful_delta"),
+        }),
+        [
+            {"evaluation_id": evaluation_id, "helpful_delta": helpful, "unhelpful_delta": unhelpful}
+            for evaluation_id, (helpful, unhelpful) in deltas.items()
+        ]
+    )
+    evaluation_ids = list(deltas)
+    params = []
+    for start in range(0, len(evaluation_ids), 1000):
+        chunk = evaluation_ids[start:start + 1000]
+        for evaluation_id, helpful, unhelpful in db.query(
+            Evaluation.id, Evaluation.helpful_count, Evaluation.unhelpful_count
+        ).filter(Evaluation.id.in_(chunk)):
+            params.append({"id": evaluation_id, "helpfulness": wilson_lower_bound(helpful, helpful + unhelpful)})
+    if params:
+        db.execute(update(Evaluation), params)
+
+
+def _apply_vote_delta(db: Session, evaluation_id, helpful_delta: int, unhelpful_delta: int) -> None:
+    """Update one evaluation's vote counters and helpfulness score"""
+    _apply_vote_deltas(db, {evaluation_id: (helpful_delta, unhelpful_delta)})
+
+
+def recompute_evaluation_helpfulness(db: Session, evaluation_ids: List[Any], commit: bool = True) -> int:
+    """
+    Rebuild the vote counters and helpfulness score of many evaluations
+    
+    Used after set-based vote deletions that bypass delete_evaluation_vote.
+    Returns the number of evaluations updated.
+    """
+    updated = 0
+    for start in range(0, len(evaluation_ids), 1000):
+        chunk = evaluation_ids[start:start + 1000]
+        counts = {
+            evaluation_id: (int(helpful or 0), int(unhelpful or 0))
+            for evaluation_id, helpful, unhelpful in db.query(
+                EvaluationVote.evaluation_id,
+                func.sum(case((EvaluationVote.is_helpful == True, 1), else_=0)),
+                func.sum(case((EvaluationVote.is_helpful == True, 0), else_=1)),
+            ).filter(EvaluationVote.evaluation_id.in_(chunk)).group_by(EvaluationVote.evaluation_id)
+        }
+        params = []
+        for (evaluation_id,) in db.query(Evaluation.id).filter(Evaluation.id.in_(chunk)):
+            helpful, unhelpful = counts.get(evaluation_id, (0, 0))
+            params.append({
+                "id": evaluation_id,
+                "helpful_count": helpful,
+                "unhelpful_count": unhelpful,
+                "helpfulness": wilson_lower_bound(helpful, helpful + unhelpful),
+            })
+        if params:
+            db.execute(update(Evaluation), params)
+        updated += len(params)
+    
+    if commit:
+        db.commit()
+    return updated
+
+
+def upsert_evaluation_vote(
+    db: Session, evaluation_id: Any, voter_id: Any, is_helpful: bool, timestamp: Optional[datetime] = None
+) -> Tuple[bool, Optional[bool]]:
+    """
+    Insert or update a voter's vote in a single statement
+    
+    Relies on the unique (evaluation_id, voter_id) constraint, so concurrent
+    votes from the same voter can never create two rows. Returns whether the
+    vote was created and the voter's previous choice (None if created), from
+    which the counters are adjusted:
+    
+    - SQLite/PostgreSQL: INSERT ... ON CONFLICT DO UPDATE, updating only a
+      flipped vote; RETURNING yields the id (ours if created) or no row if
+      the vote was unchanged.
+    - MySQL: INSERT ... ON DUPLICATE KEY UPDATE, where LAST_INSERT_ID(old + 1)
+      reports the previous value through the insert id (0 when inserted).
+    """
+    timestamp = timestamp or datetime.utcnow()
+    vote_id = uuid.uuid4()
+    values = dict(
+        id=vote_id, evaluation_id=evaluation_id, voter_id=voter_id, is_helpful=is_helpful, timestamp=timestamp
+    )
+    dialect = db.get_bind().dialect.name
+    
+    if dialect in ("sqlite", "postgresql"):
+        insert_ = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert_(EvaluationVote).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[EvaluationVote.evaluation_id, EvaluationVote.voter_id],
+            set_={"is_helpful": stmt.excluded.is_helpful, "timestamp": stmt.excluded.timestamp},
+            where=EvaluationVote.is_helpful != stmt.excluded.is_helpful
+        ).returning(EvaluationVote.id)
+        row = db.execute(stmt).first()
+        if row is None:
+            return False, is_helpful
+        if row[0] == vote_id:
+            return True, None
+        return False, not is_helpful
+    
+    stmt = mysql.insert(EvaluationVote).values(**values)
+    # is_helpful is assigned first, so the old value is the one read
+    result = db.execute(stmt.on_duplicate_key_update(
+        is_helpful=func.last_insert_id(cast(EvaluationVote.is_helpful, Integer) + 1) * 0
+        + cast(stmt.inserted.is_helpful, Integer),
+        timestamp=stmt.inserted.timestamp
+    ))
+    previous = result.lastrowid
+    if not previous:
+        return True, None
+    return False, previous == 2
+
+
 def create_or_update_evaluation_vote(
     db: Session, vote: EvaluationVoteCreate, voter_id: int
 ) -> Tuple[EvaluationVote, bool]:
@@ -15,32 +152,24 @@ def create_or_update_evaluation_vote(
     Create a new evaluation vote or update an existing one.
     Returns the vote and a boolean indicating if it was created (True) or updated (False).
     """
-    # Check if the user has already voted on this evaluation
-    existing_vote = db.query(EvaluationVote).filter(
+    try:
+        created, previous = upsert_evaluation_vote(db, vote.evaluation_id, voter_id, vote.is_helpful)
+        if previous != vote.is_helpful:
+            # New vote, or moved between counters
+            old_helpful, old_unhelpful = vote_contribution(previous)
+            _apply_vote_delta(
+                db, vote.evaluation_id, int(vote.is_helpful) - old_helpful, int(not vote.is_helpful) - old_unhelpful
+            )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    db_vote = db.query(EvaluationVote).filter(
         EvaluationVote.evaluation_id == vote.evaluation_id,
         EvaluationVote.voter_id == voter_id
-    ).first()
-    
-    if existing_vote:
-        # Update existing vote
-        existing_vote.is_helpful = vote.is_helpful
-        existing_vote.timestamp = datetime.utcnow()
-        db.add(existing_vote)
-        db.commit()
-        db.refresh(existing_vote)
-        return existing_vote, False
-    else:
-        # Create new vote
-        db_vote = EvaluationVote(
-            evaluation_id=vote.evaluation_id,
-            voter_id=voter_id,
-            is_helpful=vote.is_helpful,
-            timestamp=datetime.utcnow()
-        )
-        db.add(db_vote)
-        db.commit()
-        db.refresh(db_vote)
-        return db_vote, True
+    ).one()
+    return db_vote, created
 
 
 def delete_evaluation_vote(
@@ -48,17 +177,36 @@ def delete_evaluation_vote(
 ) -> Tuple[bool, str]:
     """
     Delete an evaluation vote.
+    
+    The vote is locked while it is read, and the counters only move if this
+    request actually deleted it, so concurrent deletions count once. The
+    DELETE also matches the value that was read: where the read cannot lock
+    (SQLite), a vote changed in between is read again instead of being
+    removed from the wrong counter.
     """
-    vote = db.query(EvaluationVote).filter(
-        EvaluationVote.evaluation_id == evaluation_id,
-        EvaluationVote.voter_id == voter_id
-    ).first()
+    deleted = 0
+    try:
+        for _ in range(3):
+            vote = db.query(EvaluationVote.id, EvaluationVote.is_helpful).filter(
+                EvaluationVote.evaluation_id == evaluation_id,
+                EvaluationVote.voter_id == voter_id
+            ).with_for_update().first()
+            if not vote:
+                break
+            
+            deleted = db.query(EvaluationVote).filter(
+                EvaluationVote.id == vote.id, EvaluationVote.is_helpful == vote.is_helpful
+            ).delete(synchronize_session=False)
+            if deleted:
+                _apply_vote_delta(db, evaluation_id, -int(vote.is_helpful), -int(not vote.is_helpful))
+                break
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
     
-    if not vote:
+    if not deleted:
         return False, "Vote not found"
-    
-    db.delete(vote)
-    db.commit()
     return True, "Vote deleted successfully"
 
 
@@ -87,15 +235,14 @@ def get_evaluation_vote_counts(db: Session, evaluation_id: int) -> Dict[str, int
     """
     Get the count of helpful and unhelpful votes for an evaluation.
     """
-    helpful_count = db.query(EvaluationVote).filter(
-        EvaluationVote.evaluation_id == evaluation_id,
-        EvaluationVote.is_helpful == True
-    ).count()
-    
-    unhelpful_count = db.query(EvaluationVote).filter(
-        EvaluationVote.evaluation_id == evaluation_id,
-        EvaluationVote.is_helpful == False
-    ).count()
+    counts = db.query(Evaluation.helpful_count, Evaluation.unhelpful_count).filter(
+        Evaluation.id == evaluation_id
+    ).first()
+    helpful_count, unhelpful_count = counts if counts is not None else (0, 0)
+    # Votes still in the write-behind buffer
+    helpful_pending, unhelpful_pending = vote_buffer.pending_counts(evaluation_id)
+    helpful_count += helpful_pending
+    unhelpful_count += unhelpful_pending
     
     return {
         "helpful": helpful_count,
@@ -103,13 +250,179 @@ def get_evaluation_vote_counts(db: Session, evaluation_id: int) -> Dict[str, int
     }
 
 
+# Largest list of evaluations accepted by get_user_votes_for_evaluations
+MAX_VOTE_LOOKUP_EVALUATIONS = 500
+
+
+def get_user_votes_for_evaluations(db: Session, evaluation_ids: List[Any], voter_id: Any) -> Dict[Any, bool]:
+    """
+    Get a user's votes on many evaluations at once
+    
+    One query on the (evaluation_id, voter_id) unique index per 1000 ids,
+    with the votes still in the write-behind buffer applied on top. Returns
+    {evaluation_id: is_helpful} for the evaluations the user voted on.
+    """
+    evaluation_ids = list(dict.fromkeys(evaluation_ids))
+    votes = {}
+    for start in range(0, len(evaluation_ids), 1000):
+        votes.update(db.query(EvaluationVote.evaluation_id, EvaluationVote.is_helpful).filter(
+            EvaluationVote.evaluation_id.in_(evaluation_ids[start:start + 1000]),
+            EvaluationVote.voter_id == voter_id
+        ).all())
+    for evaluation_id in evaluation_ids:
+        pending = vote_buffer.pending_vote(evaluation_id, voter_id)
+        if pending is not None:
+            if pending.desired is None:
+                votes.pop(evaluation_id, None)
+            else:
+                votes[evaluation_id] = pending.desired
+    return votes
+
+
 def get_user_vote_for_evaluation(
     db: Session, evaluation_id: int, voter_id: int
 ) -> Optional[EvaluationVote]:
     """
     Get a user's vote for a specific evaluation.
     """
+    pending = vote_buffer.pending_vote(evaluation_id, voter_id)
+    if pending is not None:
+        if pending.desired is None:
+            return None
+        return EvaluationVote(
+            id=pending.vote_id, evaluation_id=evaluation_id, voter_id=voter_id,
+            is_helpful=pending.desired, timestamp=pending.timestamp
+        )
+    
     return db.query(EvaluationVote).filter(
         EvaluationVote.evaluation_id == evaluation_id,
         EvaluationVote.voter_id == voter_id
     ).first()
+
+
+def write_evaluation_votes(db: Session, batch: Dict[VoteKey, BufferedVote]) -> int:
+    """
+    Write buffered vote changes in one transaction
+    
+    Each voter's latest choice is compared with the stored vote (not with
+    what the buffer assumed): new votes are inserted, flipped ones updated
+    and removed ones deleted with one statement each, and the counters of
+    every evaluation are adjusted once. Votes on evaluations or by users that
+    no longer exist are dropped. Returns the number of rows changed.
+    """
+    keys = list(batch)
+    stored: Dict[VoteKey, Tuple[Any, bool]] = {}
+    evaluation_ids = list({evaluation_id for evaluation_id, _ in keys})
+    voter_ids = list({voter_id for _, voter_id in keys})
+    existing_evaluations = set()
+    existing_voters = set()
+    
+    for start in range(0, len(keys), 1000):
+        chunk = keys[start:start + 1000]
+        for vote_id, evaluation_id, voter_id, is_helpful in db.query(
+            EvaluationVote.id, EvaluationVote.evaluation_id, EvaluationVote.voter_id, EvaluationVote.is_helpful
+        ).filter(tuple_(EvaluationVote.evaluation_id, EvaluationVote.voter_id).in_(chunk)):
+            stored[(evaluation_id, voter_id)] = (vote_id, is_helpful)
+    for start in range(0, len(evaluation_ids), 1000):
+        existing_evaluations.update(
+            evaluation_id for (evaluation_id,) in
+            db.query(Evaluation.id).filter(Evaluation.id.in_(evaluation_ids[start:start + 1000]))
+        )
+    for start in range(0, len(voter_ids), 1000):
+        existing_voters.update(
+            voter_id for (voter_id,) in db.query(User.id).filter(User.id.in_(voter_ids[start:start + 1000]))
+        )
+    
+    inserts, updates, deletes = [], [], []
+    deltas: Dict[Any, Tuple[int, int]] = {}
+    for (evaluation_id, voter_id), entry in batch.items():
+        if evaluation_id not in existing_evaluations or voter_id not in existing_voters:
+            continue
+        vote_id, current = stored.get((evaluation_id, voter_id), (None, None))
+        if current == entry.desired:
+            continue
+        if entry.desired is None:
+            deletes.append(vote_id)
+        elif current is None:
+            inserts.append({
+                "id": entry.vote_id or uuid.uuid4(), "evaluation_id": evaluation_id, "voter_id": voter_id,
+                "is_helpful": entry.desired, "timestamp": entry.timestamp,
+            })
+        else:
+            updates.append({"id": vote_id, "is_helpful": entry.desired, "timestamp": entry.timestamp})
+        old_helpful, old_unhelpful = vote_contribution(current)
+        new_helpful, new_unhelpful = vote_contribution(entry.desired)
+        helpful, unhelpful = deltas.get(evaluation_id, (0, 0))
+        deltas[evaluation_id] = (helpful + new_helpful - old_helpful, unhelpful + new_unhelpful - old_unhelpful)
+    
+    try:
+        if inserts:
+            db.execute(insert(EvaluationVote), inserts)
+        if updates:
+            db.execute(update(EvaluationVote), updates)
+        for start in range(0, len(deletes), 1000):
+            db.execute(
+                delete(EvaluationVote).where(EvaluationVote.id.in_(deletes[start:start + 1000]))
+                .execution_options(synchronize_session=False)
+            )
+        _apply_vote_deltas(db, deltas)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    return len(inserts) + len(updates) + len(deletes)
+
+
+def _write_buffered_votes(batch: Dict[VoteKey, BufferedVote]) -> None:
+    db = SessionLocal()
+    try:
+        write_evaluation_votes(db, batch)
+    finally:
+        db.close()
+
+
+# Write-behind buffer used when VOTE_WRITE_BEHIND is enabled (see app.core.vote_buffer)
+vote_buffer = VoteBuffer(
+    _write_buffered_votes,
+    interval_ms=settings.VOTE_FLUSH_INTERVAL_MS,
+    max_pending=settings.VOTE_BUFFER_MAX_PENDING
+)
+
+
+def _buffer_vote(
+    db: Session, evaluation_id: Any, voter_id: Any, is_helpful: Optional[bool]
+) -> Tuple[BufferedVote, Optional[bool]]:
+    """Buffer a voter's choice; returns the entry and their previous vote"""
+    stored_id, stored = None, None
+    if vote_buffer.pending_vote(evaluation_id, voter_id) is None:
+        row = db.query(EvaluationVote.id, EvaluationVote.is_helpful).filter(
+            EvaluationVote.evaluation_id == evaluation_id,
+            EvaluationVote.voter_id == voter_id
+        ).first()
+        if row is not None:
+            stored_id, stored = row
+    return vote_buffer.submit(evaluation_id, voter_id, is_helpful, stored, stored_id or uuid.uuid4())
+
+
+def buffer_evaluation_vote(db: Session, vote: EvaluationVoteCreate, voter_id: Any) -> EvaluationVote:
+    """
+    Record a vote in the write-behind buffer instead of writing it
+    
+    Returns the vote as it will be stored (not attached to the session).
+    """
+    entry, _ = _buffer_vote(db, vote.evaluation_id, voter_id, vote.is_helpful)
+    return EvaluationVote(
+        id=entry.vote_id, evaluation_id=vote.evaluation_id, voter_id=voter_id,
+        is_helpful=vote.is_helpful, timestamp=entry.timestamp
+    )
+
+
+def buffer_evaluation_vote_removal(db: Session, evaluation_id: Any, voter_id: Any) -> Tuple[bool, str]:
+    """
+    Record the removal of a vote in the write-behind buffer.
+    """
+    _, previous = _buffer_vote(db, evaluation_id, voter_id, None)
+    if previous is None:
+        return False, "Vote not found"
+    return True, "Vote deleted successfully"
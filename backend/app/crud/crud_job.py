@@ -0,0 +1,54 @@
+from typing import List, Optional, Tuple
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+from sqlalchemy import desc
+
+from app.models.job import Job, JobStatus
+
+
+def get_jobs(
+    db: Session,
+    skip: int = 0,
+    limit: int = 20,
+    status: Optional[JobStatus] = None,
+    name: Optional[str] = None
+) -> Tuple[List[Job], int]:
+    """Get jobs, most recently created first, with optional filters"""
+    query = db.query(Job)
+
+    if status is not None:
+        query = query.filter(Job.status == status)
+    if name is not None:
+        query = query.filter(Job.name == name)
+
+    total = query.count()
+    jobs = query.order_by(desc(Job.created_at), Job.id).offset(skip).limit(limit).all()
+
+    return jobs, total
+
+
+def get_job_by_id(db: Session, job_id: UUID) -> Optional[Job]:
+    """Get a job by ID"""
+    return db.query(Job).filter(Job.id == job_id).first()
+
+
+def cancel_job(db: Session, job_id: UUID) -> Tuple[bool, str]:
+    """
+    Cancel a job that has not started yet
+
+    A running job cannot be interrupted; a job waiting for a retry can be
+    cancelled.
+    """
+    if get_job_by_id(db, job_id) is None:
+        return False, "Job not found"
+
+    cancelled = db.query(Job).filter(Job.id == job_id, Job.status == JobStatus.QUEUED).update(
+        {Job.status: JobStatus.CANCELLED, Job.finished_at: datetime.utcnow()}, synchronize_session=False
+    )
+    db.commit()
+
+    if not cancelled:
+        return False, "Only queued jobs can be cancelled"
+    return True, "Job cancelled"
@@ -1,11 +1,18 @@
+from datetime import datetime
 from typing import Any, Dict, Optional, Union, List, Tuple
 from uuid import UUID
 
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import asc, desc, func
+from sqlalchemy import asc, case, desc, func, update
 from sqlalchemy.sql.expression import or_
 
+from app.core.outbox import mark_applied, publish
+from app.core.ranking import bayesian_average, category_priors, decay_factor
+from app.core.config import settings
+from app.models.country import Country
 from app.models.service import Service
+from app.models.evaluation import Evaluation, EvaluationStatus
+from app.models.outbox_event import OutboxEvent
 from app.schemas.service import ServiceCreate, ServiceUpdate
 
 
@@ -16,6 +23,62 @@ def get_services(db: Session, skip: int = 0, limit: int = 100, include_country:
     return query.offset(skip).limit(limit).all()
 
 
+# Fields of ServiceOut that can be requested with `fields=`
+SERVICE_LIST_FIELDS = (
+    "id", "name", "category", "country_id", "rating", "evaluation_count", "ranking_score", "decayed_rating",
+)
+
+# Country columns nested under "country" with include_country (CountryOut)
+SERVICE_COUNTRY_FIELDS = ("id", "name", "region")
+
+# Orderings accepted by get_service_rows; "ranking" uses ix_services_ranking_score
+# (or ix_services_category_ranking_score when filtering by category)
+SERVICE_SORT_COLUMNS = {
+    "name": Service.name,
+    "rating": Service.rating,
+    "ranking": Service.ranking_score,
+    "decayed_rating": Service.decayed_rating,
+}
+
+
+def get_service_rows(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[List[str]] = None,
+    category: Optional[str] = None,
+    sort_by: Optional[str] = None,
+    sort_order: str = "desc",
+    include_country: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Get services as ServiceOut-shaped dicts, selecting only the requested columns
+    
+    With `include_country` each dict also has a "country" dict
+    (SERVICE_COUNTRY_FIELDS), read in the same query.
+    """
+    fields = list(fields or SERVICE_LIST_FIELDS)
+    query = db.query(*(getattr(Service, name) for name in fields))
+    if include_country:
+        query = query.join(Service.country).add_columns(
+            *(getattr(Country, name).label(f"country__{name}") for name in SERVICE_COUNTRY_FIELDS)
+        )
+    if category is not None:
+        query = query.filter(Service.category == category)
+    if sort_by is not None:
+        direction = asc if sort_order == "asc" else desc
+        query = query.order_by(direction(SERVICE_SORT_COLUMNS[sort_by]), direction(Service.id))
+    rows = query.offset(skip).limit(limit).all()
+    items = [row._asdict() for row in rows]
+    if include_country:
+        for item in items:
+            item["country"] = {name: item.pop(f"country__{name}") for name in SERVICE_COUNTRY_FIELDS}
+    if "rating" in fields:
+        for item in items:
+            item["rating"] = item["rating"] or 0.0
+    return items
+
+
 def get_service_by_id(db: Session, service_id: UUID, include_country: bool = False) -> Optional[Service]:
     """Get a service by ID with optional country details"""
     query = db.query(Service)
@@ -32,7 +95,8 @@ def create_service(db: Session, service: ServiceCreate) -> Service:
         name=service.name,
         category=service.category,
         country_id=service.country_id,
-        rating=service.rating if service.rating is not None else 0.0
+        rating=service.rating if service.rating is not None else 0.0,
+        ranking_score=category_priors.get(db, service.category)
     )
     
     db.add(db_service)
@@ -55,6 +119,170 @@ def update_service_rating(db: Session, service_id: UUID, new_rating: float) -> O
     return db_service
 
 
+def apply_service_score_delta(
+    db: Session,
+    service_id: UUID,
+    count_delta: int,
+    sum_delta: float,
+    commit: bool = True,
+    evaluated_at: Optional[datetime] = None,
+    now: Optional[datetime] = None
+) -> None:
+    """
+    Apply an evaluation change to a service's running totals
+    
+    `count_delta`/`sum_delta` are +1/+score for a new evaluation, 0/new-old
+    for a score change and -1/-score for a deletion; rejected evaluations
+    are not part of the totals. Rating and ranking
+    score are recomputed in the same UPDATE from the stored totals, so
+    concurrent writers never lose an evaluation and no AVG() scan is needed.
+    A service left without evaluations keeps its rating, as before.
+    
+    The decayed totals are brought forward to `now` and the change is
+    weighted by the age of the evaluation (`evaluated_at`, default now). The
+    service row is locked while they are computed.
+    """
+    now = now or datetime.utcnow()
+    state = (
+        db.query(Service.category, Service.decayed_weight, Service.decayed_score_sum, Service.decay_reference)
+        .filter(Service.id == service_id)
+        .with_for_update()
+        .first()
+    )
+    if state is None:
+        return
+    category, decayed_weight, decayed_sum, reference = state
+    prior = category_priors.get(db, category)
+    weight = settings.RANKING_PRIOR_WEIGHT
+    
+    elapsed = decay_factor(now - reference) if reference is not None else 1.0
+    contribution = decay_factor(now - (evaluated_at or now))
+    decayed_weight = (decayed_weight or 0.0) * elapsed + count_delta * contribution
+    decayed_sum = (decayed_sum or 0.0) * elapsed + sum_delta * contribution
+    if decayed_weight > 1e-12:
+        decayed_rating = decayed_sum / decayed_weight
+    else:
+        decayed_weight, decayed_sum, decayed_rating = 0.0, 0.0, Service.decayed_rating
+    
+    count = Service.evaluation_count + count_delta
+    total = Service.score_sum + sum_delta
+    # Every expression reads the old totals: the counters are assigned last
+    # because MySQL applies SET assignments from left to right
+    statement = (
+        update(Service)
+        .where(Service.id == service_id)
+        .ordered_values(
+            (Service.rating, case((count > 0, total / count), else_=Service.rating)),
+            (Service.ranking_score, (weight * prior + total) / (weight + count)),
+            (Service.decayed_rating, decayed_rating),
+            (Service.decayed_weight, decayed_weight),
+            (Service.decayed_score_sum, decayed_sum),
+            (Service.decay_reference, now),
+            (Service.score_sum, case((count > 0, total), else_=0.0)),
+            (Service.evaluation_count, count),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(statement)
+    if commit:
+        db.commit()
+
+
+# Outbox events carrying the evaluation deltas of the service totals, applied
+# by crud_evaluation.apply_rating_deltas under the RATING_DELTA_CONSUMER name
+RATING_DELTA_TOPICS = ("evaluation.created", "evaluation.updated", "evaluation.deleted")
+RATING_DELTA_CONSUMER = "service_ratings"
+
+
+def recompute_service_ratings(db: Session, service_ids: Optional[List[UUID]] = None, commit: bool = True) -> int:
+    """
+    Rebuild the evaluation totals, rating, ranking score and decayed rating
+    of many services
+    
+    Rejected evaluations are not counted. One pass over the scores and one
+    executemany UPDATE per chunk of 1000 services; `service_ids=None` refreshes every service (and the category
+    priors, which drift as evaluations accumulate). Services without any
+    evaluation keep their current ratings, as in update_service_rating.
+    Returns the number of services updated.
+    
+    The rebuilt totals include the evaluation writes whose delta events are
+    still pending, so these events are recorded as applied in the same
+    transaction (and read from the same snapshot as the scores).
+    """
+    now = datetime.utcnow()
+    pending = db.query(OutboxEvent.id, OutboxEvent.payload).filter(
+        OutboxEvent.topic.in_(RATING_DELTA_TOPICS), OutboxEvent.processed_at.is_(None)
+    ).all()
+    if service_ids is not None:
+        selected = {str(service_id) for service_id in service_ids}
+        pending = [(event_id, payload) for event_id, payload in pending if payload.get("service_id") in selected]
+    mark_applied(db, RATING_DELTA_CONSUMER, [event_id for event_id, _ in pending])
+    
+    priors, global_prior = category_priors.all(db)
+    if service_ids is None:
+        service_ids = [service_id for (service_id,) in db.query(Service.id)]
+    
+    updated = 0
+    for start in range(0, len(service_ids), 1000):
+        chunk = service_ids[start:start + 1000]
+        # service_id -> [count, score sum, decayed weight, decayed score sum]
+        totals: Dict[UUID, List[float]] = {}
+        scores = db.query(
+            Evaluation.service_id, Evaluation.score, func.coalesce(Evaluation.timestamp, Evaluation.created_at)
+        ).filter(Evaluation.service_id.in_(chunk), Evaluation.status != EvaluationStatus.REJECTED)
+        for service_id, score, evaluated_at in scores.yield_per(10000):
+            weight = decay_factor(now - evaluated_at) if evaluated_at is not None else 1.0
+            total = totals.setdefault(service_id, [0, 0.0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += score
+            total[2] += weight
+            total[3] += weight * score
+        
+        params = []
+        for service_id, category, rating, decayed_rating in db.query(
+            Service.id, Service.category, Service.rating, Service.decayed_rating
+        ).filter(Service.id.in_(chunk)):
+            count, score_sum, decayed_weight, decayed_sum = totals.get(service_id, (0, 0.0, 0.0, 0.0))
+            params.append({
+                "id": service_id,
+                "evaluation_count": count,
+                "score_sum": score_sum,
+                "rating": score_sum / count if count else rating,
+                "ranking_score": bayesian_average(score_sum, count, priors.get(category, global_prior)),
+                "decayed_weight": decayed_weight,
+                "decayed_score_sum": decayed_sum,
+                "decay_reference": now,
+                "decayed_rating": decayed_sum / decayed_weight if decayed_weight > 1e-12 else decayed_rating,
+            })
+        if params:
+            db.execute(update(Service), params)
+        updated += len(params)
+    
+    if commit:
+        db.commit()
+    return updated
+
+
+# Service columns sent to live viewers (see app.core.live_updates)
+SERVICE_RATING_FIELDS = ("rating", "evaluation_count", "ranking_score", "decayed_rating")
+
+
+def publish_rating_changes(db: Session, service_ids: List[UUID]) -> None:
+    """
+    Add a service.rating_changed event with the current ratings of each service
+    
+    Call it in the transaction that changed the ratings, after the change:
+    the events are committed (or rolled back) with it.
+    """
+    for start in range(0, len(service_ids), 1000):
+        chunk = service_ids[start:start + 1000]
+        rows = db.query(Service.id, *(getattr(Service, name) for name in SERVICE_RATING_FIELDS)).filter(
+            Service.id.in_(chunk)
+        )
+        for service_id, *values in rows:
+            publish(db, "service.rating_changed", service_id, dict(zip(SERVICE_RATING_FIELDS, values)))
+
+
 def update_service(db: Session, service_id: UUID, service_update: ServiceUpdate) -> Optional[Service]:
     """Update a service's details"""
     db_service = get_service_by_id(db, service_id)
@@ -1,19 +1,37 @@
 # Import compatibility module first to patch Pydantic for Python 3.13+
 from app.core.compat import patch_pydantic_parameter
 
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.core.config import settings
+from app.core.live_updates import live_updates
+from app.core.outbox import outbox_dispatcher
+from app.core.metrics import MetricsMiddleware, instrument_engine, register_gauges, render_metrics
+from app.core.password_pool import PasswordHashPoolBusy, password_pool
+from app.core.rate_limit import RateLimitMiddleware, rate_limiter
+from app.core.query_profiler import QueryProfilerMiddleware, install_query_profiler
+from app.core.responses import FastJSONResponse
+from app.crud.crud_evaluation_vote import vote_buffer
+from app.database import engine
 # Importer les routes depuis le bon emplacement
 from app.api import auth, countries, services, evaluations, users
-from app.api import evaluation_reports, evaluation_votes, evaluation_criteria
+from app.api import evaluation_reports, evaluation_votes, evaluation_criteria, jobs
+# Outbox handlers outside of the CRUD modules imported by the routes
+from app.services import spam_detection  # noqa: F401
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=FastJSONResponse
 )
 
+# Per-client rate limits on expensive routes, inside CORS so that 429
+# responses still carry its headers
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 # Set up CORS
 # Update CORS configuration to allow requests from the Next.js frontend
 app.add_middleware(
@@ -27,6 +45,96 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request metrics (latency, DB time, query count, response size per route)
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    app.add_middleware(MetricsMiddleware)
+    if settings.RATE_LIMIT_ENABLED:
+        register_gauges(lambda: {
+            f"rate_limit_{name}": value
+            for name, value in rate_limiter.stats().items()
+        })
+    register_gauges(lambda: {
+        f"password_hash_pool_{name}": value
+        for name, value in password_pool.stats().items()
+    })
+
+    @app.get("/metrics", include_in_schema=False, response_class=PlainTextResponse)
+    def metrics():
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+# SQL profiler: logs statements per request and flags N+1 patterns
+if settings.SQL_PROFILER_ENABLED or settings.SQL_PROFILER_ALLOW_HEADER:
+    install_query_profiler(engine)
+    app.add_middleware(QueryProfilerMiddleware)
+
+
+# Password hashing overload: ask the client to retry instead of queueing forever
+@app.exception_handler(PasswordHashPoolBusy)
+async def password_pool_busy_handler(request: Request, exc: PasswordHashPoolBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Authentication service is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.on_event("shutdown")
+def shutdown_password_pool():
+    password_pool.shutdown()
+
+
+# Write-behind vote buffering: flushed by a background thread, and on shutdown
+if settings.VOTE_WRITE_BEHIND:
+    if settings.METRICS_ENABLED:
+        register_gauges(lambda: {
+            f"vote_buffer_{name}": value
+            for name, value in vote_buffer.stats().items()
+        })
+
+    @app.on_event("startup")
+    def start_vote_buffer():
+        vote_buffer.start()
+
+    @app.on_event("shutdown")
+    def stop_vote_buffer():
+        vote_buffer.stop()
+
+# Outbox dispatcher: applies the side effects of committed writes (ratings,
+# moderation counters, spam screening) from a background thread
+if settings.OUTBOX_DISPATCHER_ENABLED:
+    if settings.METRICS_ENABLED:
+        register_gauges(lambda: {
+            f"outbox_{name}": value
+            for name, value in outbox_dispatcher.stats().items()
+        })
+
+    @app.on_event("startup")
+    def start_outbox_dispatcher():
+        outbox_dispatcher.start()
+
+    @app.on_event("shutdown")
+    def stop_outbox_dispatcher():
+        outbox_dispatcher.stop()
+
+# Live service updates: one task per process tails the outbox for the
+# services being watched and pushes the changes to their viewers
+if settings.LIVE_UPDATES_ENABLED:
+    if settings.METRICS_ENABLED:
+        register_gauges(lambda: {
+            f"live_updates_{name}": value
+            for name, value in live_updates.stats().items()
+        })
+
+    @app.on_event("startup")
+    async def start_live_updates():
+        live_updates.start()
+
+    @app.on_event("shutdown")
+    async def stop_live_updates():
+        await live_updates.stop()
+
 # Create API router
 api_router = APIRouter()
 
@@ -47,6 +155,9 @@ api_router.include_router(evaluation_reports.router, prefix="/evaluation-reports
 api_router.include_router(evaluation_votes.router, prefix="/evaluation-votes", tags=["evaluation-votes"])
 api_router.include_router(evaluation_criteria.router, prefix="/evaluation-criteria", tags=["evaluation-criteria"])
 
+# Background jobs (admin)
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+
 # Add global prefix
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
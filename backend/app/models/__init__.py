@@ -3,5 +3,7 @@ from app.models.country import Country
 from app.models.service import Service
 from app.models.evaluation import Evaluation
 from app.models.evaluation_criteria import EvaluationCriteria, EvaluationCriteriaScore
-from app.models.evaluation_report import EvaluationReport, ReportReason
+from app.models.evaluation_report import EvaluationReport, ReportReason, ReportResolution
 from app.models.evaluation_vote import EvaluationVote
+from app.models.outbox_event import AppliedOutboxEvent, OutboxEvent
+from app.models.job import Job, JobStatus
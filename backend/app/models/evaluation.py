@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, DateTime, String, Enum, Float
+from sqlalchemy import Column, ForeignKey, DateTime, String, Enum, Float, Integer, Index
 from sqlalchemy.orm import relationship
 import uuid
 import enum
@@ -11,6 +11,8 @@ from app.models.utils import UUID
 class EvaluationStatus(str, enum.Enum):
     PENDING = "pending"
     APPROVED = "approved"
+    # Pending, and marked by the automatic spam screening (app.services.spam_detection)
+    FLAGGED = "flagged"
     REJECTED = "rejected"
 
 
@@ -25,6 +27,16 @@ class Evaluation(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
     status = Column(Enum(EvaluationStatus), default=EvaluationStatus.PENDING, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Vote counters and Wilson lower bound of the helpful share (see app.core.ranking)
+    helpful_count = Column(Integer, default=0, nullable=False)
+    unhelpful_count = Column(Integer, default=0, nullable=False)
+    # Double precision: keyset cursors compare the stored value exactly
+    helpfulness = Column(Float(precision=53), default=0.0, nullable=False)
+    # Moderation queue: unresolved reports, sum of their reporters' reputation
+    # and the date of the oldest one (see crud_evaluation_report)
+    unresolved_report_count = Column(Integer, default=0, nullable=False)
+    report_weight = Column(Float(precision=53), default=0.0, nullable=False)
+    first_reported_at = Column(DateTime)
     
     # Relationships
     user = relationship("User", back_populates="evaluations")
@@ -32,3 +44,14 @@ class Evaluation(Base):
     criteria_scores = relationship("EvaluationCriteriaScore", back_populates="evaluation", cascade="all, delete-orphan")
     reports = relationship("EvaluationReport", back_populates="evaluation", cascade="all, delete-orphan")
     votes = relationship("EvaluationVote", back_populates="evaluation", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Most useful reviews of a service first (the primary key is implicitly
+        # part of every InnoDB secondary index, which serves the id tie-break)
+        Index("ix_evaluations_service_id_helpfulness", "service_id", "helpfulness"),
+        # Moderation queue order: most reports, most trusted reporters, oldest first
+        Index(
+            "ix_evaluations_moderation_queue",
+            unresolved_report_count.desc(), report_weight.desc(), first_reported_at, id
+        ),
+    )
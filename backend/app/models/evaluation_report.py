@@ -1,5 +1,5 @@
-from sqlalchemy import Column, ForeignKey, DateTime, Text, Enum, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, ForeignKey, DateTime, Text, Enum, Boolean, Float
+from sqlalchemy.orm import relationship, synonym
 import enum
 import uuid
 from datetime import datetime
@@ -16,6 +16,11 @@ class ReportReason(str, enum.Enum):
     other = "other"
 
 
+class ReportResolution(str, enum.Enum):
+    accepted = "accepted"  # the evaluation is rejected
+    rejected = "rejected"  # the report is dismissed
+
+
 class EvaluationReport(Base):
     __tablename__ = "evaluation_reports"
 
@@ -26,6 +31,13 @@ class EvaluationReport(Base):
     description = Column(Text(1000))
     resolved = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Reputation of the reporter when the report was filed (see crud_evaluation_report)
+    weight = Column(Float(precision=53), default=0.0, nullable=False)
+    resolution = Column(Enum(ReportResolution))
+    resolved_at = Column(DateTime)
+    resolved_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"))
+    
+    timestamp = synonym("created_at")
     
     # Relationships
     evaluation = relationship("Evaluation", back_populates="reports")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, ForeignKey, DateTime, Boolean, UniqueConstraint
 from sqlalchemy.orm import relationship
 import uuid
 from datetime import datetime
@@ -19,3 +19,8 @@ class EvaluationVote(Base):
     # Relationships
     evaluation = relationship("Evaluation", back_populates="votes")
     voter = relationship("User", back_populates="votes")
+    
+    __table_args__ = (
+        # One vote per voter and evaluation, enforced for the upsert in crud_evaluation_vote
+        UniqueConstraint("evaluation_id", "voter_id", name="uq_evaluation_votes_evaluation_voter"),
+    )
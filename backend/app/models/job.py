@@ -0,0 +1,41 @@
+from sqlalchemy import Column, ForeignKey, DateTime, Integer, String, Text, JSON, Enum, Index
+import uuid
+import enum
+from datetime import datetime
+
+from app.database import Base
+from app.models.utils import UUID
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"  # out of attempts
+    CANCELLED = "cancelled"
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String(100), nullable=False)  # registered with app.core.jobs.job
+    payload = Column(JSON, nullable=False)
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    result = Column(JSON, nullable=True)
+    last_error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, nullable=False)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Not run before this time (scheduled jobs, retry backoff)
+    run_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Visibility timeout: a running job whose lease expired is claimed again
+    locked_until = Column(DateTime, nullable=True)
+    worker_id = Column(String(100), nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
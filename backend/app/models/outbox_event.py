@@ -0,0 +1,40 @@
+from sqlalchemy import Column, DateTime, Integer, BigInteger, String, Text, JSON, Index
+from datetime import datetime
+
+from app.database import Base
+from app.models.utils import UUID
+
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+
+    # Autoincrement on SQLite needs a plain INTEGER primary key
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    topic = Column(String(100), nullable=False)
+    aggregate_id = Column(UUID(as_uuid=True), nullable=True)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Delivery state, maintained by app.core.outbox.OutboxDispatcher
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Pending events are those without processed_at
+        Index("ix_outbox_events_pending", "processed_at", "available_at"),
+    )
+
+
+class AppliedOutboxEvent(Base):
+    """An event already applied by a consumer (see app.core.outbox.first_deliveries)"""
+    __tablename__ = "applied_outbox_events"
+
+    consumer = Column(String(100), primary_key=True)
+    event_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=False)
+    applied_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_applied_outbox_events_applied_at", "applied_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Float, DateTime, Text
+from sqlalchemy import Column, String, ForeignKey, Float, DateTime, Text, Integer, Index
 from sqlalchemy.orm import relationship
 import uuid
 from datetime import datetime
@@ -15,8 +15,23 @@ class Service(Base):
     category = Column(String(100), index=True)
     country_id = Column(UUID(as_uuid=True), ForeignKey("countries.id", ondelete="CASCADE"), nullable=False)
     rating = Column(Float, default=0.0)
+    # Running totals of evaluation scores, kept in step with `rating`
+    evaluation_count = Column(Integer, default=0, nullable=False)
+    score_sum = Column(Float, default=0.0, nullable=False)
+    # Bayesian average towards the category mean (see app.core.ranking)
+    ranking_score = Column(Float, index=True)
+    # Exponentially time-decayed rating: weight and score sum decayed to
+    # decay_reference, and their ratio (see app.core.ranking)
+    decayed_weight = Column(Float(precision=53), default=0.0, nullable=False)
+    decayed_score_sum = Column(Float(precision=53), default=0.0, nullable=False)
+    decay_reference = Column(DateTime)
+    decayed_rating = Column(Float, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     country = relationship("Country", back_populates="services")
     evaluations = relationship("Evaluation", back_populates="service", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("ix_services_category_ranking_score", "category", "ranking_score"),
+    )
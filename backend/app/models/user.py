@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, String, DateTime, Enum, ForeignKey
+from sqlalchemy import Boolean, Column, String, DateTime, Enum, ForeignKey, Integer
 from sqlalchemy.orm import relationship
 import enum
 import uuid
@@ -24,6 +24,9 @@ class User(Base):
     role = Column(Enum(UserRole), default=UserRole.user, nullable=False)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Outcome of the reports filed by the user, for their reporter reputation
+    reports_accepted = Column(Integer, default=0, nullable=False)
+    reports_rejected = Column(Integer, default=0, nullable=False)
     
     # Relationships
     evaluations = relationship("Evaluation", back_populates="user")
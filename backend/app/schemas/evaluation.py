@@ -2,11 +2,11 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
 from uuid import UUID
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from app.schemas.utils import UUIDType
 
 from app.models.evaluation import EvaluationStatus
-from app.models.evaluation_report import ReportReason
+from app.models.evaluation_report import ReportReason, ReportResolution
 from app.schemas.user import UserOut
 from app.schemas.service import ServiceOut
 from app.schemas.pagination import PaginatedResponse
@@ -17,6 +17,11 @@ class SortOrder(str, Enum):
     DESC = "desc"
 
 
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
 # Base Evaluation schema (shared properties)
 class EvaluationBase(BaseModel):
     score: float = Field(..., ge=0, le=10)
@@ -51,6 +56,10 @@ class EvaluationWithDetails(EvaluationOut):
     service: ServiceOut
     helpful_votes: Optional[int] = 0
     unhelpful_votes: Optional[int] = 0
+    # Wilson lower bound of the share of helpful votes
+    helpfulness: float = 0.0
+    # The current user's vote, with GET /evaluations/?include_my_vote=true
+    my_vote: Optional[bool] = None
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -60,6 +69,37 @@ class EvaluationPagination(PaginatedResponse):
     items: List[EvaluationWithDetails]
 
 
+class EvaluationModerationAction(str, Enum):
+    approve = "approve"
+    reject = "reject"
+
+
+# Admin approval or rejection of many evaluations, by id and/or filter
+class EvaluationBulkModeration(BaseModel):
+    action: EvaluationModerationAction
+    evaluation_ids: Optional[List[UUID]] = Field(None, min_length=1, max_length=100000)
+    service_id: Optional[UUID] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    min_score: Optional[float] = Field(None, ge=0, le=10)
+    max_score: Optional[float] = Field(None, ge=0, le=10)
+    # Only evaluations currently in this status (None for any status)
+    current_status: Optional[EvaluationStatus] = EvaluationStatus.PENDING
+    
+    @model_validator(mode="after")
+    def check_selection(self):
+        selectors = (self.evaluation_ids, self.service_id, self.date_from, self.date_to,
+                     self.min_score, self.max_score)
+        if all(selector is None for selector in selectors):
+            raise ValueError("Provide evaluation_ids or at least one filter")
+        return self
+
+
+class EvaluationBulkModerationResult(BaseModel):
+    evaluations_updated: int
+    services_recomputed: int
+
+
 # Schemas for Evaluation Reports
 class EvaluationReportBase(BaseModel):
     reason: ReportReason
@@ -73,15 +113,16 @@ class EvaluationReportCreate(EvaluationReportBase, UUIDType):
 class EvaluationReportOut(EvaluationReportBase, UUIDType):
     id: UUID
     evaluation_id: UUID
-    reporter_id: UUID
+    reporter_id: Optional[UUID] = None
     timestamp: datetime
     resolved: bool = False
+    resolution: Optional[ReportResolution] = None
     
     model_config = ConfigDict(from_attributes=True)
 
 
 class EvaluationReportWithDetails(EvaluationReportOut):
-    reporter: UserOut
+    reporter: Optional[UserOut] = None
     evaluation: EvaluationOut
     
     model_config = ConfigDict(from_attributes=True)
@@ -91,6 +132,37 @@ class EvaluationReportPagination(PaginatedResponse):
     items: List[EvaluationReportWithDetails]
 
 
+# Admin resolution of many reports at once
+class EvaluationReportBatchResolve(BaseModel):
+    report_ids: List[UUID] = Field(..., min_length=1, max_length=1000)
+    resolution: ReportResolution
+
+
+class EvaluationReportBatchResult(BaseModel):
+    resolved: int
+    skipped: int  # unknown or already resolved
+    evaluations_updated: int
+
+
+# Evaluation waiting for moderation, in queue order
+class ModerationQueueItem(BaseModel):
+    evaluation_id: UUID
+    service_id: UUID
+    user_id: UUID
+    score: float
+    comment: Optional[str] = None
+    status: EvaluationStatus
+    timestamp: Optional[datetime] = None
+    unresolved_report_count: int
+    report_weight: float
+    first_reported_at: Optional[datetime] = None
+
+
+class ModerationQueuePage(BaseModel):
+    items: List[ModerationQueueItem]
+    next_cursor: Optional[str] = None
+
+
 # Schemas for Evaluation Votes
 class EvaluationVoteBase(BaseModel):
     is_helpful: bool
@@ -168,3 +240,23 @@ class EvaluationStats(BaseModel):
     average_score: float
     score_distribution: Dict[str, int]  # Distribution of scores (e.g. {"1": 5, "2": 10})
     recent_trend: Optional[float] = None  # Change in average score over recent period
+
+
+class RollingAveragePoint(BaseModel):
+    period_end: datetime
+    average: Optional[float] = None
+    count: int
+
+
+# Vectorized per-service statistics (GET /evaluations/stats/bulk)
+class ServiceRatingStats(BaseModel):
+    service_id: UUID
+    count: int
+    average_score: Optional[float] = None
+    std_dev: Optional[float] = None
+    confidence_interval: Optional[List[float]] = None  # 95% interval of the mean
+    percentiles: Dict[str, Optional[float]]  # {"p10": ..., "p50": ..., "p90": ...}
+    score_distribution: Dict[str, int]
+    recent_trend: Optional[float] = None  # last 30 days average minus previous 30 days
+    trend_slope: Optional[float] = None  # least-squares slope, in points per 30 days
+    rolling_average: List[RollingAveragePoint]
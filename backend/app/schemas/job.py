@@ -0,0 +1,38 @@
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+from uuid import UUID
+from pydantic import BaseModel, Field, ConfigDict
+from app.schemas.utils import UUIDType
+
+from app.models.job import JobStatus
+from app.schemas.pagination import PaginatedResponse
+
+
+class JobCreate(BaseModel):
+    name: str = Field(..., max_length=100)
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    run_at: Optional[datetime] = None  # UTC, now by default
+    max_attempts: Optional[int] = Field(None, ge=1, le=20)
+
+
+class JobOut(BaseModel, UUIDType):
+    id: UUID
+    name: str
+    payload: Dict[str, Any]
+    status: JobStatus
+    result: Optional[Dict[str, Any]] = None
+    last_error: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    created_by: Optional[UUID] = None
+    created_at: datetime
+    run_at: datetime
+    worker_id: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class JobPagination(PaginatedResponse):
+    items: List[JobOut]
@@ -30,6 +30,11 @@ class ServiceOut(ServiceBase, UUIDType):
     id: UUID
     country_id: UUID
     rating: float = 0.0
+    evaluation_count: int = 0
+    # Bayesian average used for ranking (rating shrunk towards the category mean)
+    ranking_score: Optional[float] = None
+    # Mean in which older evaluations weigh exponentially less
+    decayed_rating: Optional[float] = None
     
     model_config = ConfigDict(from_attributes=True)
 
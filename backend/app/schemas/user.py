@@ -3,7 +3,7 @@ from datetime import datetime
 from enum import Enum
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, model_validator
 
 from app.models.user import UserRole
 from app.schemas.pagination import PaginatedResponse
@@ -56,3 +56,38 @@ class UserOut(UserBase, UUIDType):
 # Paginated response for users
 class UserPagination(PaginatedResponse):
     items: List[UserOut]
+
+
+class UserBulkActionType(str, Enum):
+    deactivate = "deactivate"
+    anonymize = "anonymize"
+
+
+class UserContentPolicy(str, Enum):
+    keep = "keep"
+    reassign = "reassign"
+    delete = "delete"
+
+
+# Admin bulk operation on many users
+class UserBulkAction(BaseModel):
+    user_ids: List[UUID] = Field(..., min_length=1, max_length=100000)
+    action: UserBulkActionType
+    content: UserContentPolicy = UserContentPolicy.keep
+    reassign_to: Optional[UUID] = None
+    
+    @model_validator(mode="after")
+    def check_reassign_target(self):
+        if self.content == UserContentPolicy.reassign and self.reassign_to is None:
+            raise ValueError("reassign_to is required when content is 'reassign'")
+        if self.reassign_to is not None and self.reassign_to in self.user_ids:
+            raise ValueError("reassign_to cannot be one of the affected users")
+        return self
+
+
+class UserBulkActionResult(BaseModel):
+    users_updated: int
+    evaluations_affected: int
+    votes_affected: int
+    reports_affected: int
+    services_recomputed: int
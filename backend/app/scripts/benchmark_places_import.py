@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Script pour mesurer le débit du pipeline d'import Google Places hors-ligne.
+Utilisation : python -m app.scripts.benchmark_places_import [--places-mode synthetic|replay]
+              [--count 10000] [--queries 200] [--latency-ms 0]
+
+Le pipeline mesuré est celui de seed_services_from_places (recherche, détails,
+conversion en données de service), sans écriture en base.
+"""
+
+import argparse
+import os
+import sys
+import time
+from itertools import cycle, islice
+from uuid import uuid4
+
+# Ajouter le répertoire parent au path pour permettre l'import des modules app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from app.core.config import settings
+from app.services.google_places import GooglePlacesService
+from app.services.places_fixtures import ReplayTransport, SyntheticPlacesTransport
+from app.scripts.seed_services_from_places import PLACES_OF_INTEREST, build_service_data
+
+
+def _percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_benchmark(places_service: GooglePlacesService, queries: int) -> dict:
+    """Exécute `queries` recherches et importe (hors base) chaque lieu trouvé."""
+    country_id = uuid4()
+    all_queries = [place for places in PLACES_OF_INTEREST.values() for place in places]
+    per_place_ms = []
+    imported = 0
+
+    started = time.perf_counter()
+    for place_info in islice(cycle(all_queries), queries):
+        search_results = places_service.search_places(query=place_info["query"], type_=place_info["type"])
+        if search_results.get("status") != "OK":
+            continue
+
+        for place in search_results.get("results", []):
+            place_started = time.perf_counter()
+            details = places_service.get_place_details(place.get("place_id"))
+            if details.get("status") != "OK" or not details.get("result"):
+                continue
+            build_service_data(places_service, details["result"], country_id)
+            per_place_ms.append((time.perf_counter() - place_started) * 1000)
+            imported += 1
+    elapsed = time.perf_counter() - started
+
+    per_place_ms.sort()
+    return {
+        "queries": queries,
+        "places": imported,
+        "elapsed_s": elapsed,
+        "places_per_s": imported / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": _percentile(per_place_ms, 0.50),
+        "p95_ms": _percentile(per_place_ms, 0.95),
+        "p99_ms": _percentile(per_place_ms, 0.99),
+    }
+
+
+def main():
+    """Fonction principale du script."""
+    parser = argparse.ArgumentParser(description="Benchmark hors-ligne de l'import Google Places")
+    parser.add_argument("--places-mode", type=str, default="synthetic", choices=["synthetic", "replay"],
+                        help="Source des réponses Places")
+    parser.add_argument("--fixtures", type=str, default=settings.GOOGLE_PLACES_FIXTURES_PATH,
+                        help="Archive enregistrée à relire (mode replay)")
+    parser.add_argument("--count", type=int, default=10000,
+                        help="Nombre de lieux synthétiques générés (mode synthetic)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Graine du générateur synthétique")
+    parser.add_argument("--queries", type=int, default=200,
+                        help="Nombre de recherches à exécuter")
+    parser.add_argument("--latency-ms", type=float, default=settings.GOOGLE_PLACES_REPLAY_LATENCY_MS,
+                        help="Latence synthétique ajoutée à chaque appel")
+    parser.add_argument("--jitter-ms", type=float, default=0.0,
+                        help="Gigue maximale ajoutée à la latence")
+    args = parser.parse_args()
+
+    if args.places_mode == "replay":
+        transport = ReplayTransport(args.fixtures, latency_ms=args.latency_ms,
+                                    jitter_ms=args.jitter_ms, seed=args.seed)
+    else:
+        transport = SyntheticPlacesTransport(count=args.count, seed=args.seed,
+                                             latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+
+    result = run_benchmark(GooglePlacesService(transport=transport), args.queries)
+
+    print(f"Recherches: {result['queries']}")
+    print(f"Lieux importés: {result['places']} en {result['elapsed_s']:.3f} s")
+    print(f"Débit: {result['places_per_s']:.1f} lieux/s")
+    print(f"Latence par lieu: p50={result['p50_ms']:.3f} ms "
+          f"p95={result['p95_ms']:.3f} ms p99={result['p99_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
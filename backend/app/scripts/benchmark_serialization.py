@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Script pour mesurer le coût de sérialisation d'une page de GET /evaluations/.
+Utilisation : python -m app.scripts.benchmark_serialization [--evaluations 5000] [--limit 100] [--pages 50]
+              [--export-rows 10000] [--fields id,score,timestamp]
+
+Deux chemins sont comparés sur une base SQLite en mémoire :
+- « orm » : chargement des entités avec joinedload, validation EvaluationPagination
+  (from_attributes), jsonable_encoder puis json.dumps, comme le fait FastAPI avec response_model ;
+- « rows » : get_evaluation_rows (colonnes seulement) puis FastJSONResponse.
+
+Avec --export-rows, le script mesure aussi la durée et le pic mémoire (tracemalloc)
+du chargement de N lignes en entités ORM complètes, puis en projection `fields=`.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+# Ajouter le répertoire parent au path pour permettre l'import des modules app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, joinedload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.responses import FastJSONResponse, orjson
+from app.crud.crud_evaluation import EVALUATION_LIST_FIELDS, get_evaluation_rows, get_evaluations
+from app.database import Base
+from app.models import Country, Evaluation, EvaluationVote, Service, User
+from app.models.evaluation import EvaluationStatus
+from app.models.user import UserRole
+from app.schemas.evaluation import EvaluationPagination
+
+
+def populate(db: Session, evaluations: int, seed: int = 0) -> None:
+    """Crée des utilisateurs, services, évaluations et votes synthétiques."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    country = {"id": uuid.uuid4(), "name": "Benchland", "code": "BL"}
+    db.execute(Country.__table__.insert(), [country])
+
+    user_ids = [uuid.uuid4() for _ in range(max(1, evaluations // 10))]
+    db.execute(User.__table__.insert(), [
+        {
+            "id": user_id, "username": f"user{index}", "email": f"user{index}@example.com",
+            "hashed_password": "x", "full_name": f"User {index}", "role": UserRole.user,
+            "is_active": True, "created_at": now,
+        }
+        for index, user_id in enumerate(user_ids)
+    ])
+
+    service_ids = [uuid.uuid4() for _ in range(max(1, evaluations // 20))]
+    db.execute(Service.__table__.insert(), [
+        {
+            "id": service_id, "name": f"Service {index}", "category": "public",
+            "country_id": country["id"], "rating": round(rng.uniform(0, 10), 1), "created_at": now,
+        }
+        for index, service_id in enumerate(service_ids)
+    ])
+
+    evaluation_rows = [
+        {
+            "id": uuid.uuid4(), "user_id": rng.choice(user_ids), "service_id": rng.choice(service_ids),
+            "score": round(rng.uniform(0, 10), 1), "comment": "Commentaire " * rng.randint(1, 20),
+            "timestamp": now - timedelta(minutes=index), "status": EvaluationStatus.APPROVED, "created_at": now,
+        }
+        for index in range(evaluations)
+    ]
+    db.execute(Evaluation.__table__.insert(), evaluation_rows)
+
+    # Au plus un vote par votant et par évaluation (contrainte d'unicité)
+    db.execute(EvaluationVote.__table__.insert(), [
+        {
+            "id": uuid.uuid4(), "evaluation_id": row["id"], "voter_id": voter_id,
+            "is_helpful": rng.random() < 0.7, "timestamp": now,
+        }
+        for row in evaluation_rows
+        for voter_id in rng.sample(user_ids, min(rng.randint(0, 3), len(user_ids)))
+    ])
+    db.commit()
+
+
+def serialize_orm_page(db: Session, page: int, limit: int) -> bytes:
+    evaluations, total = get_evaluations(db, page=page, limit=limit)
+    validated = EvaluationPagination.model_validate(
+        {"total": total, "page": page, "limit": limit, "items": evaluations}, from_attributes=True
+    )
+    content = jsonable_encoder(validated)
+    body = json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    db.expunge_all()
+    return body
+
+
+def serialize_rows_page(db: Session, page: int, limit: int) -> bytes:
+    evaluations, total = get_evaluation_rows(db, page=page, limit=limit)
+    return FastJSONResponse({"total": total, "page": page, "limit": limit, "items": evaluations}).body
+
+
+def run_benchmark(db: Session, limit: int, pages: int) -> dict:
+    """Sérialise `pages` pages avec chaque chemin et retourne le temps moyen par page (ms)."""
+    results = {}
+    for name, serialize in (("orm", serialize_orm_page), ("rows", serialize_rows_page)):
+        serialize(db, 1, limit)  # échauffement
+        sizes = 0
+        started = time.perf_counter()
+        for page in range(1, pages + 1):
+            sizes += len(serialize(db, page, limit))
+        elapsed = time.perf_counter() - started
+        results[name] = {"ms_per_page": elapsed * 1000 / pages, "bytes_per_page": sizes / pages}
+    return results
+
+
+def _measure(load, reset) -> dict:
+    # Durée mesurée sans tracemalloc, qui ralentit fortement les allocations
+    started = time.perf_counter()
+    rows = len(load())
+    elapsed = time.perf_counter() - started
+    reset()
+
+    tracemalloc.start()
+    try:
+        load()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    reset()
+    return {"rows": rows, "ms": elapsed * 1000, "peak_mib": peak / (1024 * 1024)}
+
+
+def run_export_benchmark(db: Session, rows: int, fields) -> dict:
+    """Charge `rows` évaluations en entités ORM puis en projection ; retourne durée et pic mémoire."""
+    def load_entities():
+        return (
+            db.query(Evaluation)
+            .options(joinedload(Evaluation.user), joinedload(Evaluation.service))
+            .order_by(Evaluation.timestamp.desc())
+            .limit(rows)
+            .all()
+        )
+
+    def load_projection():
+        items, _ = get_evaluation_rows(db, page=1, limit=rows, fields=fields)
+        return items
+
+    return {
+        "entities": _measure(load_entities, db.expunge_all),
+        "projection": _measure(load_projection, db.expunge_all),
+    }
+
+
+def main():
+    """Fonction principale du script."""
+    parser = argparse.ArgumentParser(description="Benchmark de sérialisation des listes d'évaluations")
+    parser.add_argument("--evaluations", type=int, default=5000,
+                        help="Nombre d'évaluations synthétiques")
+    parser.add_argument("--limit", type=int, default=100,
+                        help="Taille de page")
+    parser.add_argument("--pages", type=int, default=50,
+                        help="Nombre de pages sérialisées par chemin")
+    parser.add_argument("--export-rows", type=int, default=0,
+                        help="Nombre de lignes pour la mesure d'export (0 pour ignorer)")
+    parser.add_argument("--fields", type=str, default="id,score,timestamp,status",
+                        help=f"Projection utilisée pour l'export, parmi : {','.join(EVALUATION_LIST_FIELDS)}")
+    args = parser.parse_args()
+    fields = [name.strip() for name in args.fields.split(",") if name.strip()]
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        populate(db, max(args.evaluations, args.export_rows))
+        pages = max(1, min(args.pages, args.evaluations // args.limit))
+        results = run_benchmark(db, args.limit, pages)
+        export_results = run_export_benchmark(db, args.export_rows, fields) if args.export_rows else None
+    finally:
+        db.close()
+
+    print(f"Encodeur JSON: {'orjson' if orjson is not None else 'json (bibliothèque standard)'}")
+    print(f"{pages} pages de {args.limit} évaluations")
+    for name, result in results.items():
+        print(f"{name:>5}: {result['ms_per_page']:.2f} ms/page ({result['bytes_per_page'] / 1024:.1f} Kio)")
+    speedup = results["orm"]["ms_per_page"] / results["rows"]["ms_per_page"]
+    print(f"Accélération: x{speedup:.1f}")
+
+    if export_results:
+        print(f"\nExport de {args.export_rows} lignes (fields={','.join(fields)})")
+        for name, result in export_results.items():
+            print(f"{name:>10}: {result['ms']:.0f} ms, pic mémoire {result['peak_mib']:.1f} Mio "
+                  f"({result['rows']} lignes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Script pour exporter un instantané analytique (Parquet) des évaluations, afin que
+les analyses lourdes tournent hors de la base de production.
+Utilisation : python -m app.scripts.export_analytics_snapshot [--output analytics_snapshot]
+              [--batch-size 50000] [--lag-seconds 60] [--full]
+
+Nécessite pyarrow (voir requirements.txt).
+
+Arborescence produite :
+- evaluations/country_id=<id>/month=<AAAA-MM>/part-<run>-<n>.parquet
+- criteria_scores/country_id=<id>/month=<AAAA-MM>/... (mois de l'évaluation)
+- votes/country_id=<id>/month=<AAAA-MM>/... (mois du vote)
+- services.parquet, countries.parquet (réécrits à chaque exécution)
+- _snapshot_state.json (dernière borne exportée)
+
+Les tables de faits sont exportées de façon incrémentale : seules les lignes créées
+depuis la borne de l'exécution précédente sont ajoutées. Les modifications
+ultérieures d'une évaluation (note, statut) ne sont reprises qu'avec --full.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Ajouter le répertoire parent au path pour permettre l'import des modules app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Country, Evaluation, EvaluationCriteria, EvaluationCriteriaScore, EvaluationVote, Service
+
+STATE_FILE = "_snapshot_state.json"
+PARTITION_COLUMNS = ["country_id", "month"]
+FACT_TABLES = ("evaluations", "criteria_scores", "votes")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit("pyarrow est requis pour cet export : pip install pyarrow")
+    return pyarrow
+
+
+def _schemas(pa) -> Dict[str, Any]:
+    timestamp = pa.timestamp("us")
+    return {
+        "evaluations": pa.schema([
+            ("id", pa.string()), ("service_id", pa.string()), ("user_id", pa.string()),
+            ("score", pa.float64()), ("comment", pa.string()), ("status", pa.string()),
+            ("timestamp", timestamp), ("created_at", timestamp),
+            ("country_id", pa.string()), ("month", pa.string()),
+        ]),
+        "criteria_scores": pa.schema([
+            ("id", pa.string()), ("evaluation_id", pa.string()), ("criteria_id", pa.string()),
+            ("criteria_name", pa.string()), ("criteria_weight", pa.float64()), ("score", pa.float64()),
+            ("country_id", pa.string()), ("month", pa.string()),
+        ]),
+        "votes": pa.schema([
+            ("id", pa.string()), ("evaluation_id", pa.string()), ("voter_id", pa.string()),
+            ("is_helpful", pa.bool_()), ("timestamp", timestamp),
+            ("country_id", pa.string()), ("month", pa.string()),
+        ]),
+        "services": pa.schema([
+            ("id", pa.string()), ("name", pa.string()), ("category", pa.string()),
+            ("country_id", pa.string()), ("rating", pa.float64()), ("created_at", timestamp),
+        ]),
+        "countries": pa.schema([
+            ("id", pa.string()), ("name", pa.string()), ("code", pa.string()),
+            ("region", pa.string()), ("population", pa.float64()),
+        ]),
+    }
+
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _month(value: Optional[datetime]) -> str:
+    return value.strftime("%Y-%m") if value is not None else "unknown"
+
+
+def load_state(output: str) -> Dict[str, Any]:
+    """Lit la borne de la dernière exécution (vide si aucun instantané)."""
+    path = os.path.join(output, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as state_file:
+        return json.load(state_file)
+
+
+def save_state(output: str, state: Dict[str, Any]) -> None:
+    path = os.path.join(output, STATE_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as state_file:
+        json.dump(state, state_file, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _window(column, since: Optional[datetime], until: datetime) -> List[Any]:
+    conditions = [column <= until]
+    if since is not None:
+        conditions.append(column > since)
+    return conditions
+
+
+def evaluation_rows(db: Session, since: Optional[datetime], until: datetime, batch_size: int) -> Iterable[Tuple]:
+    created = func.coalesce(Evaluation.created_at, Evaluation.timestamp)
+    query = (
+        db.query(
+            Evaluation.id, Evaluation.service_id, Evaluation.user_id, Evaluation.score,
+            Evaluation.comment, Evaluation.status, Evaluation.timestamp, created.label("created_at"),
+            Service.country_id,
+        )
+        .join(Service, Service.id == Evaluation.service_id)
+        .filter(*_window(created, since, until))
+    )
+    for row in query.yield_per(batch_size):
+        yield tuple(_cell(value) for value in row) + (_month(row.created_at),)
+
+
+def criteria_score_rows(db: Session, since: Optional[datetime], until: datetime, batch_size: int) -> Iterable[Tuple]:
+    created = func.coalesce(Evaluation.created_at, Evaluation.timestamp)
+    query = (
+        db.query(
+            EvaluationCriteriaScore.id, EvaluationCriteriaScore.evaluation_id, EvaluationCriteriaScore.criteria_id,
+            EvaluationCriteria.name, EvaluationCriteria.weight, EvaluationCriteriaScore.score,
+            Service.country_id, created.label("created_at"),
+        )
+        .join(Evaluation, Evaluation.id == EvaluationCriteriaScore.evaluation_id)
+        .join(EvaluationCriteria, EvaluationCriteria.id == EvaluationCriteriaScore.criteria_id)
+        .join(Service, Service.id == Evaluation.service_id)
+        .filter(*_window(created, since, until))
+    )
+    for row in query.yield_per(batch_size):
+        yield tuple(_cell(value) for value in row[:-1]) + (_month(row.created_at),)
+
+
+def vote_rows(db: Session, since: Optional[datetime], until: datetime, batch_size: int) -> Iterable[Tuple]:
+    query = (
+        db.query(
+            EvaluationVote.id, EvaluationVote.evaluation_id, EvaluationVote.voter_id,
+            EvaluationVote.is_helpful, EvaluationVote.timestamp, Service.country_id,
+        )
+        .join(Evaluation, Evaluation.id == EvaluationVote.evaluation_id)
+        .join(Service, Service.id == Evaluation.service_id)
+        .filter(*_window(EvaluationVote.timestamp, since, until))
+    )
+    for row in query.yield_per(batch_size):
+        yield tuple(_cell(value) for value in row) + (_month(row.timestamp),)
+
+
+def _batches(rows: Iterable[Tuple], size: int) -> Iterable[List[Tuple]]:
+    batch: List[Tuple] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _to_table(pa, schema, rows: Sequence[Tuple]):
+    columns = list(zip(*rows)) if rows else [[] for _ in schema.names]
+    return pa.Table.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+    )
+
+
+def write_partitioned(pa, output: str, name: str, schema, rows: Iterable[Tuple],
+                      batch_size: int, run_id: str) -> int:
+    """Ajoute les lignes au jeu de données partitionné par pays et par mois."""
+    import pyarrow.parquet as pq
+
+    written = 0
+    for index, batch in enumerate(_batches(rows, batch_size)):
+        pq.write_to_dataset(
+            _to_table(pa, schema, batch),
+            root_path=os.path.join(output, name),
+            partition_cols=PARTITION_COLUMNS,
+            basename_template=f"part-{run_id}-{index}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        written += len(batch)
+    return written
+
+
+def write_table(pa, output: str, name: str, schema, rows: Iterable[Tuple]) -> int:
+    """Réécrit entièrement une table de dimension (fichier unique)."""
+    import pyarrow.parquet as pq
+
+    table = _to_table(pa, schema, list(rows))
+    path = os.path.join(output, f"{name}.parquet")
+    pq.write_table(table, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return table.num_rows
+
+
+def _remove_run_files(output: str, run_id: str) -> None:
+    prefix = f"part-{run_id}-"
+    for name in FACT_TABLES:
+        for directory, _, files in os.walk(os.path.join(output, name)):
+            for filename in files:
+                if filename.startswith(prefix):
+                    os.remove(os.path.join(directory, filename))
+
+
+def export_snapshot(db: Session, output: str, batch_size: int = 50000, lag_seconds: int = 60,
+                    full: bool = False, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Exporte les lignes créées depuis le dernier instantané et réécrit les dimensions.
+
+    Les lignes plus récentes que `lag_seconds` sont laissées pour l'exécution
+    suivante (transactions encore en cours). Retourne le nombre de lignes par table.
+    """
+    pa = _require_pyarrow()
+    schemas = _schemas(pa)
+
+    if full:
+        for name in FACT_TABLES:
+            shutil.rmtree(os.path.join(output, name), ignore_errors=True)
+    os.makedirs(output, exist_ok=True)
+
+    state = {} if full else load_state(output)
+    since = datetime.fromisoformat(state["until"]) if state.get("until") else None
+    until = (now or datetime.utcnow()) - timedelta(seconds=lag_seconds)
+    run_id = uuid.uuid4().hex[:12]
+
+    fact_sources: Dict[str, Callable[..., Iterable[Tuple]]] = {
+        "evaluations": evaluation_rows,
+        "criteria_scores": criteria_score_rows,
+        "votes": vote_rows,
+    }
+    counts: Dict[str, int] = {}
+    try:
+        for name, source in fact_sources.items():
+            counts[name] = write_partitioned(
+                pa, output, name, schemas[name], source(db, since, until, batch_size), batch_size, run_id
+            )
+    except Exception:
+        # Ne pas laisser un export partiel qui serait dupliqué à la relance
+        _remove_run_files(output, run_id)
+        raise
+
+    services = db.query(
+        Service.id, Service.name, Service.category, Service.country_id, Service.rating, Service.created_at
+    ).yield_per(batch_size)
+    counts["services"] = write_table(
+        pa, output, "services", schemas["services"], (tuple(_cell(v) for v in row) for row in services)
+    )
+    countries = db.query(Country.id, Country.name, Country.code, Country.region, Country.population)
+    counts["countries"] = write_table(
+        pa, output, "countries", schemas["countries"], (tuple(_cell(v) for v in row) for row in countries)
+    )
+
+    state.update({"until": until.isoformat(), "last_run_id": run_id})
+    save_state(output, state)
+    return counts
+
+
+def main():
+    """Fonction principale du script."""
+    parser = argparse.ArgumentParser(description="Exporter un instantané analytique Parquet")
+    parser.add_argument("--output", type=str, default="analytics_snapshot",
+                        help="Répertoire de l'instantané")
+    parser.add_argument("--batch-size", type=int, default=50000,
+                        help="Nombre de lignes lues et écrites par lot")
+    parser.add_argument("--lag-seconds", type=int, default=60,
+                        help="Ignorer les lignes créées il y a moins de N secondes")
+    parser.add_argument("--full", action="store_true",
+                        help="Reconstruire l'instantané depuis le début")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        counts = export_snapshot(db, args.output, batch_size=args.batch_size,
+                                 lag_seconds=args.lag_seconds, full=args.full)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+
+    for name, count in counts.items():
+        print(f"{name}: {count} lignes")
+    print(f"\nInstantané écrit dans {args.output} en {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
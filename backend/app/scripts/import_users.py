@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Script pour créer en masse des comptes utilisateurs à partir d'un fichier CSV
+(intégration de nouvelles municipalités).
+Utilisation : python -m app.scripts.import_users --file comptes.csv [--chunk-size 1000] [--workers 4]
+
+Colonnes attendues : username, email, full_name, password, role (optionnelle).
+Les comptes dont l'email ou le nom d'utilisateur existe déjà sont ignorés.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+# Ajouter le répertoire parent au path pour permettre l'import des modules app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from pydantic import ValidationError
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.security import hash_passwords
+from app.database import SessionLocal
+from app.models.user import User, UserRole
+from app.schemas.user import UserCreate
+
+
+def _chunks(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def read_users_csv(path: str) -> Tuple[List[UserCreate], List[str]]:
+    """Lit et valide le fichier CSV. Retourne les comptes valides et les erreurs."""
+    users: List[UserCreate] = []
+    errors: List[str] = []
+    seen_emails = set()
+    seen_usernames = set()
+
+    with open(path, newline="", encoding="utf-8") as csv_file:
+        for line_number, row in enumerate(csv.DictReader(csv_file), start=2):
+            try:
+                user = UserCreate(
+                    username=(row.get("username") or "").strip(),
+                    email=(row.get("email") or "").strip(),
+                    full_name=(row.get("full_name") or "").strip(),
+                    password=row.get("password") or "",
+                    role=(row.get("role") or "user").strip() or "user",
+                )
+            except ValidationError as e:
+                errors.append(f"Ligne {line_number}: {e.errors()[0]['msg']}")
+                continue
+
+            if not user.username or not user.password:
+                errors.append(f"Ligne {line_number}: username et password sont obligatoires")
+                continue
+
+            # Doublons à l'intérieur du fichier
+            if user.email in seen_emails or user.username in seen_usernames:
+                errors.append(f"Ligne {line_number}: doublon dans le fichier ({user.email})")
+                continue
+            seen_emails.add(user.email)
+            seen_usernames.add(user.username)
+            users.append(user)
+
+    return users, errors
+
+
+def filter_existing_users(db: Session, users: List[UserCreate], chunk_size: int) -> Tuple[List[UserCreate], int]:
+    """Retire les comptes déjà présents en base (une requête par lot)."""
+    remaining: List[UserCreate] = []
+    skipped = 0
+
+    for chunk in _chunks(users, chunk_size):
+        emails = [user.email for user in chunk]
+        usernames = [user.username for user in chunk]
+        existing = db.query(User.email, User.username).filter(
+            or_(User.email.in_(emails), User.username.in_(usernames))
+        ).all()
+        taken_emails = {row.email for row in existing}
+        taken_usernames = {row.username for row in existing}
+
+        for user in chunk:
+            if user.email in taken_emails or user.username in taken_usernames:
+                skipped += 1
+            else:
+                remaining.append(user)
+
+    return remaining, skipped
+
+
+def import_users(db: Session, users: List[UserCreate], chunk_size: int = 1000, workers: int = 4) -> int:
+    """
+    Hache les mots de passe en parallèle puis insère les comptes par lots.
+
+    Retourne le nombre de comptes créés.
+    """
+    hashed_passwords = hash_passwords([user.password for user in users], workers)
+    now = datetime.utcnow()
+    created = 0
+
+    for offset, chunk in enumerate(_chunks(users, chunk_size)):
+        base = offset * chunk_size
+        rows: List[Dict[str, Any]] = [
+            {
+                "id": uuid.uuid4(),
+                "username": user.username,
+                "email": user.email,
+                "full_name": user.full_name,
+                "hashed_password": hashed_passwords[base + index],
+                "role": UserRole(user.role.value) if user.role is not None else UserRole.user,
+                "is_active": user.is_active if user.is_active is not None else True,
+                "created_at": now,
+            }
+            for index, user in enumerate(chunk)
+        ]
+        try:
+            db.execute(User.__table__.insert(), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        created += len(rows)
+        print(f"{created}/{len(users)} comptes créés")
+
+    return created
+
+
+def main():
+    """Fonction principale du script."""
+    parser = argparse.ArgumentParser(description="Créer des comptes utilisateurs en masse depuis un CSV")
+    parser.add_argument("--file", type=str, required=True,
+                        help="Fichier CSV (username, email, full_name, password, role)")
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="Nombre de comptes insérés par requête")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Nombre de processus pour le hachage des mots de passe")
+    args = parser.parse_args()
+
+    users, errors = read_users_csv(args.file)
+    for error in errors:
+        print(error)
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        users, skipped = filter_existing_users(db, users, args.chunk_size)
+        created = import_users(db, users, chunk_size=args.chunk_size, workers=args.workers)
+        elapsed = time.perf_counter() - started
+
+        print(f"\nImportation terminée en {elapsed:.1f} s: {created} comptes créés, "
+              f"{skipped} déjà existants, {len(errors)} lignes invalides.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
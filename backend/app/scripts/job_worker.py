@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Worker des tâches de fond (voir app.core.jobs et app.services.maintenance_jobs).
+Utilisation : python -m app.scripts.job_worker [--processes 2] [--burst] [--max-jobs N]
+
+Chaque processus prend les tâches dues une par une dans la table jobs ; plusieurs
+workers, sur une ou plusieurs machines, peuvent tourner en même temps sur la même
+base. SIGINT/SIGTERM arrêtent le worker après la tâche en cours ; une tâche
+interrompue brutalement est reprise par un autre worker à l'expiration de son bail
+(JOB_VISIBILITY_TIMEOUT_SECONDS).
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+from typing import Optional
+
+# Ajouter le répertoire parent au path pour permettre l'import des modules app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from app.core.jobs import JobWorker, registered_jobs
+# Enregistre les tâches disponibles
+from app.services import maintenance_jobs  # noqa: F401
+
+
+def work(burst: bool, max_jobs: Optional[int]) -> int:
+    """Boucle d'un processus worker ; retourne le nombre de tâches exécutées"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    worker = JobWorker()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: worker.stop())
+
+    if burst:
+        ran = 0
+        while (max_jobs is None or ran < max_jobs) and worker.run_once():
+            ran += 1
+        return ran
+    return worker.run(max_jobs=max_jobs)
+
+
+def main():
+    """Fonction principale du script."""
+    parser = argparse.ArgumentParser(description="Exécuter les tâches de fond en attente")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Nombre de processus worker")
+    parser.add_argument("--burst", action="store_true",
+                        help="S'arrêter dès qu'aucune tâche n'est due")
+    parser.add_argument("--max-jobs", type=int, default=None,
+                        help="S'arrêter après N tâches (par processus)")
+    args = parser.parse_args()
+
+    print(f"Tâches disponibles : {', '.join(sorted(registered_jobs()))}")
+    if args.processes <= 1:
+        ran = work(args.burst, args.max_jobs)
+        print(f"{ran} tâches exécutées")
+        return
+
+    # Processus démarrés à neuf : aucune connexion à la base n'est partagée
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=work, args=(args.burst, args.max_jobs), name=f"job-worker-{index}")
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Le signal est aussi reçu par les processus worker, qui finissent leur tâche
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
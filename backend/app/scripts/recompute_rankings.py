@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Script pour recalculer les totaux, la note moyenne, la note pondérée par l'ancienneté
+et le score de classement de tous les services, ainsi que le score d'utilité (Wilson)
+des évaluations.
+Utilisation : python -m app.scripts.recompute_rankings [--skip-evaluations]
+
+Les scores sont maintenus de façon incrémentale à chaque écriture ; ce script sert
+à rafraîchir les a priori par catégorie, qui dérivent à mesure que les évaluations
+s'accumulent (à lancer périodiquement, par exemple chaque nuit), et à reconstruire
+les totaux pondérés après un changement de RATING_DECAY_HALF_LIFE_DAYS.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Ajouter le répertoire parent au path pour permettre l'import des modules app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from app.crud.crud_evaluation_vote import recompute_evaluation_helpfulness
+from app.crud.crud_service import recompute_service_ratings
+from app.database import SessionLocal
+from app.models import Evaluation
+
+
+def main():
+    """Fonction principale du script."""
+    parser = argparse.ArgumentParser(description="Recalculer les scores de classement")
+    parser.add_argument("--skip-evaluations", action="store_true",
+                        help="Ne recalculer que les services")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        services = recompute_service_ratings(db)
+        print(f"{services} services recalculés")
+        if not args.skip_evaluations:
+            evaluation_ids = [evaluation_id for (evaluation_id,) in db.query(Evaluation.id)]
+            evaluations = recompute_evaluation_helpfulness(db, evaluation_ids)
+            print(f"{evaluations} évaluations recalculées")
+        print(f"\nTerminé en {time.perf_counter() - started:.1f} s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 """
 Script pour importer des services depuis Google Places API et les ajouter à la base de données.
 Utilisation : python -m app.scripts.seed_services_from_places [--country_code MA] [--limit 20]
+              [--places-mode live|record|replay|synthetic]
 """
 
 import argparse
@@ -14,8 +15,8 @@ from uuid import UUID
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
-from app.services.google_places import GooglePlacesService
+from app.database import SessionLocal
+from app.services.google_places import GooglePlacesService, build_places_transport
 from app.crud.crud_country import get_country_by_code
 from app.crud.crud_service import create_service, get_service_by_name_and_address
 from app.schemas.service import ServiceCreate
@@ -71,6 +72,32 @@ def get_country_id(db: Session, country_code: str) -> UUID:
     return country.id
 
 
+def build_service_data(places_service: GooglePlacesService, place_details: Dict[str, Any],
+                       country_id: UUID) -> Dict[str, Any]:
+    """Construit les données du service à partir des détails d'un lieu Google Places."""
+    # Déterminer la catégorie
+    category = "Autres"
+    if "types" in place_details:
+        category = places_service._map_google_type_to_category(place_details["types"])
+    
+    service_data = {
+        "name": place_details.get("name", ""),
+        "country_id": country_id,
+        "category": category,
+        "address": place_details.get("formatted_address", ""),
+        "phone": place_details.get("formatted_phone_number"),
+        "website": place_details.get("website"),
+        "latitude": place_details.get("geometry", {}).get("location", {}).get("lat"),
+        "longitude": place_details.get("geometry", {}).get("location", {}).get("lng")
+    }
+    
+    # Ajouter les heures d'ouverture si disponibles
+    if "opening_hours" in place_details and "weekday_text" in place_details["opening_hours"]:
+        service_data["opening_hours"] = ", ".join(place_details["opening_hours"]["weekday_text"])
+    
+    return service_data
+
+
 def import_services(db: Session, places_service: GooglePlacesService, 
                    country_code: str, limit: int = 20) -> List[Dict[str, Any]]:
     """
@@ -130,28 +157,9 @@ def import_services(db: Session, places_service: GooglePlacesService,
                 print(f"Service déjà existant: {name} ({address})")
                 continue
                 
-            # Déterminer la catégorie
-            category = "Autres"
-            if "types" in place_details:
-                category = places_service._map_google_type_to_category(place_details["types"])
-                
             # Créer le service
             try:
-                service_data = {
-                    "name": name,
-                    "country_id": country_id,
-                    "category": category,
-                    "address": address,
-                    "phone": place_details.get("formatted_phone_number"),
-                    "website": place_details.get("website"),
-                    "latitude": place_details.get("geometry", {}).get("location", {}).get("lat"),
-                    "longitude": place_details.get("geometry", {}).get("location", {}).get("lng")
-                }
-                
-                # Ajouter les heures d'ouverture si disponibles
-                if "opening_hours" in place_details and "weekday_text" in place_details["opening_hours"]:
-                    service_data["opening_hours"] = ", ".join(place_details["opening_hours"]["weekday_text"])
-                
+                service_data = build_service_data(places_service, place_details, country_id)
                 service_create = ServiceCreate(**service_data)
                 service = create_service(db=db, service=service_create)
                 
@@ -180,9 +188,12 @@ def main():
                         help="Code du pays (ex: MA, FR, US)")
     parser.add_argument("--limit", type=int, default=20, 
                         help="Nombre maximum de services à importer")
+    parser.add_argument("--places-mode", type=str, default=None,
+                        choices=["live", "record", "replay", "synthetic"],
+                        help="Source des réponses Places (par défaut: GOOGLE_PLACES_MODE)")
     args = parser.parse_args()
     
-    places_service = GooglePlacesService()
+    places_service = GooglePlacesService(transport=build_places_transport(args.places_mode))
     db = SessionLocal()
     
     try:
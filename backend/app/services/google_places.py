@@ -6,12 +6,64 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+PLACES_BASE_URL = "https://maps.googleapis.com/maps/api/place"
+
+
+class HttpPlacesTransport:
+    """Transport HTTP réel vers l'API Google Places"""
+    
+    def __init__(self, base_url: str = PLACES_BASE_URL):
+        self.base_url = base_url
+    
+    def get(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Exécute une requête GET sur un endpoint Places (ex: textsearch, details)
+        
+        Lève requests.RequestException en cas d'erreur HTTP.
+        """
+        response = requests.get(f"{self.base_url}/{endpoint}/json", params=params)
+        response.raise_for_status()
+        return response.json()
+
+
+def build_places_transport(mode: Optional[str] = None):
+    """
+    Construit le transport correspondant au mode configuré
+    
+    Modes: live (API réelle), record (API réelle + enregistrement des réponses),
+    replay (relecture d'une archive enregistrée), synthetic (données générées).
+    """
+    mode = (mode or settings.GOOGLE_PLACES_MODE).lower()
+    if mode == "live":
+        return HttpPlacesTransport()
+    
+    # Import local pour éviter un import circulaire
+    from app.services.places_fixtures import (
+        RecordingTransport, ReplayTransport, SyntheticPlacesTransport
+    )
+    
+    if mode == "record":
+        return RecordingTransport(HttpPlacesTransport(), settings.GOOGLE_PLACES_FIXTURES_PATH)
+    if mode == "replay":
+        return ReplayTransport(
+            settings.GOOGLE_PLACES_FIXTURES_PATH,
+            latency_ms=settings.GOOGLE_PLACES_REPLAY_LATENCY_MS
+        )
+    if mode == "synthetic":
+        return SyntheticPlacesTransport(
+            count=settings.GOOGLE_PLACES_SYNTHETIC_COUNT,
+            latency_ms=settings.GOOGLE_PLACES_REPLAY_LATENCY_MS
+        )
+    raise ValueError(f"Unknown GOOGLE_PLACES_MODE: {mode}")
+
+
 class GooglePlacesService:
     """Service pour interagir avec l'API Google Places"""
     
-    def __init__(self):
+    def __init__(self, transport=None):
         self.api_key = settings.GOOGLE_PLACES_API_KEY
-        self.base_url = "https://maps.googleapis.com/maps/api/place"
+        self.base_url = PLACES_BASE_URL
+        self.transport = transport if transport is not None else build_places_transport()
     
     def search_places(self, query: str, location: Optional[str] = None, 
                      radius: Optional[int] = None, type_: Optional[str] = None) -> Dict[str, Any]:
@@ -27,7 +79,6 @@ class GooglePlacesService:
         Returns:
             Résultats de la recherche
         """
-        endpoint = f"{self.base_url}/textsearch/json"
         params = {
             "query": query,
             "key": self.api_key
@@ -41,9 +92,7 @@ class GooglePlacesService:
             params["type"] = type_
             
         try:
-            response = requests.get(endpoint, params=params)
-            response.raise_for_status()
-            return response.json()
+            return self.transport.get("textsearch", params)
         except requests.RequestException as e:
             logger.error(f"Erreur lors de la recherche Places: {str(e)}")
             return {"status": "ERROR", "error_message": str(e)}
@@ -58,7 +107,6 @@ class GooglePlacesService:
         Returns:
             Détails du lieu
         """
-        endpoint = f"{self.base_url}/details/json"
         params = {
             "place_id": place_id,
             "fields": "name,formatted_address,formatted_phone_number,website,opening_hours,geometry,types",
@@ -66,9 +114,7 @@ class GooglePlacesService:
         }
         
         try:
-            response = requests.get(endpoint, params=params)
-            response.raise_for_status()
-            return response.json()
+            return self.transport.get("details", params)
         except requests.RequestException as e:
             logger.error(f"Erreur lors de la récupération des détails du lieu: {str(e)}")
             return {"status": "ERROR", "error_message": str(e)}
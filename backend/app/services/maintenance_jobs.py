@@ -0,0 +1,78 @@
+"""
+Tâches de maintenance exécutées en arrière-plan par les workers de tâches.
+
+Chaque tâche est enregistrée sous un nom avec app.core.jobs.job et mise en
+file via POST /jobs/ (administrateurs) ou app.core.jobs.enqueue ; elle reçoit
+sa propre session et les paramètres de la tâche. Une tâche peut être
+relancée (nouvelle tentative, ou worker arrêté en cours de route) : elles
+sont toutes idempotentes.
+"""
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.jobs import job
+from app.crud.crud_country import get_country_by_code
+from app.crud.crud_evaluation_report import recompute_report_counters
+from app.crud.crud_evaluation_vote import recompute_evaluation_helpfulness
+from app.crud.crud_service import recompute_service_ratings
+from app.models import Evaluation
+
+
+@job("recompute_rankings")
+def recompute_rankings(
+    db: Session, service_ids: Optional[List[str]] = None, include_evaluations: bool = True
+) -> Dict[str, Any]:
+    """
+    Réconcilie les totaux, notes et scores de classement des services (tous
+    par défaut) et, sauf demande contraire, le score d'utilité des évaluations
+    """
+    services = recompute_service_ratings(
+        db, [UUID(service_id) for service_id in service_ids] if service_ids is not None else None
+    )
+    result = {"services_recomputed": services}
+    if include_evaluations:
+        query = db.query(Evaluation.id)
+        if service_ids is not None:
+            query = query.filter(Evaluation.service_id.in_([UUID(service_id) for service_id in service_ids]))
+        evaluation_ids = [evaluation_id for (evaluation_id,) in query]
+        result["evaluations_recomputed"] = recompute_evaluation_helpfulness(db, evaluation_ids)
+    return result
+
+
+@job("rebuild_moderation_queue")
+def rebuild_moderation_queue(db: Session) -> Dict[str, Any]:
+    """Reconstruit les compteurs de la file de modération de toutes les évaluations"""
+    evaluation_ids = [evaluation_id for (evaluation_id,) in db.query(Evaluation.id)]
+    return {"evaluations_recomputed": recompute_report_counters(db, evaluation_ids)}
+
+
+@job("export_analytics_snapshot")
+def export_analytics_snapshot(
+    db: Session, output: str = "analytics_snapshot", batch_size: int = 50000,
+    lag_seconds: int = 60, full: bool = False
+) -> Dict[str, Any]:
+    """Exporte l'instantané analytique Parquet (voir app.scripts.export_analytics_snapshot)"""
+    from app.scripts.export_analytics_snapshot import export_snapshot
+
+    return {"rows": export_snapshot(db, output, batch_size=batch_size, lag_seconds=lag_seconds, full=full)}
+
+
+@job("import_places_services")
+def import_places_services(
+    db: Session, country_code: str = "MA", limit: int = 20, places_mode: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Importe des services depuis Google Places (voir app.scripts.seed_services_from_places) ;
+    les services déjà présents sont ignorés
+    """
+    from app.scripts.seed_services_from_places import import_services
+    from app.services.google_places import GooglePlacesService, build_places_transport
+
+    # import_services quitte le processus si le pays n'existe pas
+    if get_country_by_code(db, country_code) is None:
+        raise ValueError(f"Pays avec le code {country_code} non trouvé")
+    places_service = GooglePlacesService(transport=build_places_transport(places_mode))
+    imported = import_services(db=db, places_service=places_service, country_code=country_code, limit=limit)
+    return {"services_imported": len(imported)}
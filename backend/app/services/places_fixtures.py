@@ -0,0 +1,214 @@
+"""
+Transports hors-ligne pour GooglePlacesService.
+
+Permet d'exécuter l'enrichissement, l'import depuis Places et le script de seed
+sans clé d'API, de manière reproductible :
+
+* RecordingTransport : relaie les appels vers l'API réelle et enregistre les
+  réponses dans une archive JSON Lines compressée (gzip).
+* ReplayTransport : relit une archive enregistrée, avec une latence
+  synthétique configurable.
+* SyntheticPlacesTransport : génère des jeux de lieux volumineux et
+  déterministes pour mesurer le débit du pipeline d'import.
+"""
+import copy
+import gzip
+import json
+import logging
+import random
+import threading
+import time
+import zlib
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Paramètres ignorés pour l'identification d'une requête (secrets, etc.)
+_IGNORED_PARAMS = {"key"}
+
+_SYNTHETIC_TYPES = [
+    ["local_government_office", "point_of_interest"],
+    ["city_hall", "point_of_interest"],
+    ["courthouse", "point_of_interest"],
+    ["police", "point_of_interest"],
+    ["hospital", "health"],
+    ["school", "point_of_interest"],
+    ["university", "point_of_interest"],
+    ["post_office", "point_of_interest"],
+    ["library", "point_of_interest"],
+    ["bank", "finance"],
+]
+
+_SYNTHETIC_CITIES = [
+    ("Casablanca", 33.5731, -7.5898),
+    ("Rabat", 34.0209, -6.8416),
+    ("Paris", 48.8566, 2.3522),
+    ("Lyon", 45.7640, 4.8357),
+    ("New York", 40.7128, -74.0060),
+]
+
+
+def fixture_key(endpoint: str, params: Dict[str, Any]) -> str:
+    """Clé stable identifiant une requête (endpoint + paramètres triés, sans la clé d'API)"""
+    filtered = {k: v for k, v in params.items() if k not in _IGNORED_PARAMS}
+    return json.dumps([endpoint, filtered], sort_keys=True, default=str)
+
+
+class _SyntheticLatency:
+    """Latence simulée déterministe (base + gigue pseudo-aléatoire)"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if self.latency_ms <= 0 and self.jitter_ms <= 0:
+            return
+        with self._lock:
+            jitter = self._rng.uniform(0, self.jitter_ms) if self.jitter_ms > 0 else 0.0
+        time.sleep((self.latency_ms + jitter) / 1000.0)
+
+
+class RecordingTransport:
+    """Relaie les appels vers un transport réel et enregistre chaque réponse sur disque"""
+
+    def __init__(self, inner, path: str):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.inner.get(endpoint, params)
+        record = {
+            "key": fixture_key(endpoint, params),
+            "endpoint": endpoint,
+            "response": response,
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        # Chaque ouverture en mode "at" ajoute un membre gzip, relisible d'un bloc
+        with self._lock:
+            with gzip.open(self.path, "at", encoding="utf-8") as archive:
+                archive.write(line)
+        return response
+
+
+class ReplayTransport:
+    """Relit de manière déterministe une archive produite par RecordingTransport"""
+
+    def __init__(self, path: str, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0):
+        self.path = path
+        self.latency = _SyntheticLatency(latency_ms, jitter_ms, seed)
+        self.responses: Dict[str, Dict[str, Any]] = {}
+        self.misses = 0
+
+        with gzip.open(path, "rt", encoding="utf-8") as archive:
+            for line in archive:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                # En cas de doublon, la dernière réponse enregistrée l'emporte
+                self.responses[record["key"]] = record["response"]
+
+        logger.info(f"{len(self.responses)} réponses Places chargées depuis {path}")
+
+    def get(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        self.latency.wait()
+        response = self.responses.get(fixture_key(endpoint, params))
+        if response is None:
+            self.misses += 1
+            return {
+                "status": "NOT_FOUND",
+                "error_message": f"No recorded response for {endpoint} request"
+            }
+        return copy.deepcopy(response)
+
+
+def generate_places(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Génère `count` lieux synthétiques au format de la réponse "details" de Places
+
+    Le résultat est entièrement déterminé par `seed`.
+    """
+    rng = random.Random(seed)
+    places = []
+
+    for i in range(count):
+        city, lat, lng = _SYNTHETIC_CITIES[i % len(_SYNTHETIC_CITIES)]
+        types = _SYNTHETIC_TYPES[rng.randrange(len(_SYNTHETIC_TYPES))]
+        place_id = f"synthetic-{seed}-{i:08d}"
+        places.append({
+            "place_id": place_id,
+            "name": f"{types[0].replace('_', ' ').title()} {city} #{i}",
+            "formatted_address": f"{rng.randint(1, 250)} Rue {i}, {city}",
+            "formatted_phone_number": f"+212 5{rng.randint(10000000, 99999999)}",
+            "website": f"https://example.org/{place_id}",
+            "geometry": {
+                "location": {
+                    "lat": round(lat + rng.uniform(-0.2, 0.2), 6),
+                    "lng": round(lng + rng.uniform(-0.2, 0.2), 6),
+                }
+            },
+            "types": types,
+            "rating": round(rng.uniform(1.0, 5.0), 1),
+            "opening_hours": {
+                "weekday_text": [
+                    "Monday: 8:30 AM – 4:30 PM",
+                    "Tuesday: 8:30 AM – 4:30 PM",
+                    "Wednesday: 8:30 AM – 4:30 PM",
+                    "Thursday: 8:30 AM – 4:30 PM",
+                    "Friday: 8:30 AM – 12:00 PM",
+                ]
+            },
+        })
+
+    return places
+
+
+class SyntheticPlacesTransport:
+    """
+    Répond aux requêtes textsearch/details à partir d'un jeu de lieux généré
+
+    Une recherche renvoie une page de `page_size` lieux dont la position dépend
+    du texte de la requête, ce qui rend les résultats stables d'une exécution à l'autre.
+    """
+
+    def __init__(self, count: int = 1000, seed: int = 0, page_size: int = 20,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.places = generate_places(count, seed)
+        self.page_size = page_size
+        self.latency = _SyntheticLatency(latency_ms, jitter_ms, seed)
+        self._by_id = {place["place_id"]: place for place in self.places}
+
+    def get(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        self.latency.wait()
+
+        if endpoint == "textsearch":
+            return self._search(params)
+        if endpoint == "details":
+            place = self._by_id.get(params.get("place_id"))
+            if place is None:
+                return {"status": "NOT_FOUND"}
+            return {"status": "OK", "result": copy.deepcopy(place)}
+
+        return {"status": "INVALID_REQUEST", "error_message": f"Unknown endpoint {endpoint}"}
+
+    def _search(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.places:
+            return {"status": "ZERO_RESULTS", "results": []}
+
+        key = fixture_key("textsearch", params).encode("utf-8")
+        start = zlib.crc32(key) % len(self.places)
+        results = []
+        for offset in range(min(self.page_size, len(self.places))):
+            place = self.places[(start + offset) % len(self.places)]
+            results.append({
+                "place_id": place["place_id"],
+                "name": place["name"],
+                "formatted_address": place["formatted_address"],
+                "geometry": place["geometry"],
+                "types": place["types"],
+                "rating": place["rating"],
+            })
+        return {"status": "OK", "results": results}
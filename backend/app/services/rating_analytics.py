@@ -0,0 +1,220 @@
+"""
+Statistiques vectorisées sur les notes d'évaluation.
+
+Les colonnes (service, note, date) de plusieurs services sont chargées en une
+seule requête dans des tableaux NumPy ; toutes les statistiques (moyenne,
+intervalle de confiance, percentiles, histogramme, moyennes glissantes, pente
+de tendance) sont ensuite calculées pour l'ensemble des services en une passe,
+à l'aide de np.bincount sur l'indice du service, sans boucle Python par service.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.evaluation import Evaluation, EvaluationStatus
+
+PERCENTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_BINS = 11  # notes arrondies de 0 à 10
+Z_95 = 1.959964
+SECONDS_PER_DAY = 86400.0
+# Les dates sont stockées en UTC sans fuseau (datetime.utcnow)
+EPOCH = datetime(1970, 1, 1)
+
+# Nombre maximal de services par appel de GET /evaluations/stats/bulk
+MAX_BULK_STATS_SERVICES = 500
+
+# Taille des listes IN envoyées à la base
+_LOAD_CHUNK_SIZE = 1000
+
+
+def load_score_columns(
+    db: Session,
+    service_ids: Sequence[UUID],
+    status: Optional[EvaluationStatus] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Charge les notes des services demandés.
+
+    Retourne trois tableaux alignés : indice du service dans `service_ids`,
+    note (float64) et date en secondes depuis EPOCH (NaN si inconnue).
+    """
+    positions = {service_id: index for index, service_id in enumerate(service_ids)}
+    groups: List[int] = []
+    scores: List[float] = []
+    times: List[float] = []
+
+    timestamp = func.coalesce(Evaluation.timestamp, Evaluation.created_at)
+    for start in range(0, len(service_ids), _LOAD_CHUNK_SIZE):
+        chunk = list(service_ids[start:start + _LOAD_CHUNK_SIZE])
+        query = db.query(Evaluation.service_id, Evaluation.score, timestamp).filter(
+            Evaluation.service_id.in_(chunk)
+        )
+        if status is not None:
+            query = query.filter(Evaluation.status == status)
+        for service_id, score, evaluated_at in query:
+            groups.append(positions[service_id])
+            scores.append(score)
+            times.append((evaluated_at - EPOCH).total_seconds() if evaluated_at is not None else np.nan)
+
+    return (
+        np.asarray(groups, dtype=np.int64),
+        np.asarray(scores, dtype=np.float64),
+        np.asarray(times, dtype=np.float64),
+    )
+
+
+def _nullable(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(value) else float(value) for value in values]
+
+
+def _grouped_percentiles(groups: np.ndarray, scores: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Percentiles (interpolation linéaire) par groupe ; NaN pour un groupe vide."""
+    order = np.lexsort((scores, groups))
+    sorted_scores = scores[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    fractions = np.asarray(PERCENTILES, dtype=np.float64)[:, None] / 100.0
+    positions = starts[None, :] + fractions * np.maximum(counts - 1, 0)[None, :]
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    if sorted_scores.size:
+        lower = np.clip(lower, 0, sorted_scores.size - 1)
+        upper = np.clip(upper, 0, sorted_scores.size - 1)
+        values = sorted_scores[lower] + (sorted_scores[upper] - sorted_scores[lower]) * (positions - lower)
+    else:
+        values = np.zeros_like(positions)
+    values[:, counts == 0] = np.nan
+    return values  # forme (len(PERCENTILES), nombre de services)
+
+
+def compute_bulk_stats(
+    service_ids: Sequence[UUID],
+    groups: np.ndarray,
+    scores: np.ndarray,
+    times: np.ndarray,
+    *,
+    now: Optional[datetime] = None,
+    trend_days: int = 30,
+    bucket_days: int = 7,
+    buckets: int = 12,
+    rolling_buckets: int = 4
+) -> List[Dict[str, Any]]:
+    """
+    Calcule les statistiques de tous les services en une passe vectorisée.
+
+    - `recent_trend` : moyenne des `trend_days` derniers jours moins celle de
+      la période précédente (même définition que get_evaluation_stats) ;
+    - `trend_slope` : pente de la régression linéaire note/temps, en points
+      par `trend_days` jours ;
+    - `rolling_average` : moyenne glissante sur `rolling_buckets` périodes de
+      `bucket_days` jours, pour chacune des `buckets` dernières périodes.
+    """
+    n = len(service_ids)
+    now = now or datetime.utcnow()
+    now_ts = (now - EPOCH).total_seconds()
+
+    counts = np.bincount(groups, minlength=n)
+    sums = np.bincount(groups, weights=scores, minlength=n)
+    squares = np.bincount(groups, weights=scores * scores, minlength=n)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, sums / counts, np.nan)
+        variances = np.where(counts > 1, (squares - counts * means ** 2) / (counts - 1), np.nan)
+        stds = np.sqrt(np.maximum(variances, 0.0))
+        margins = Z_95 * stds / np.sqrt(counts)
+
+    bins = np.clip(np.rint(scores), 0, HISTOGRAM_BINS - 1).astype(np.int64)
+    histograms = np.bincount(groups * HISTOGRAM_BINS + bins, minlength=n * HISTOGRAM_BINS).reshape(n, HISTOGRAM_BINS)
+
+    percentiles = _grouped_percentiles(groups, scores, counts)
+
+    # Tendances : seulement les évaluations datées
+    dated = ~np.isnan(times)
+    dated_groups, dated_scores = groups[dated], scores[dated]
+    age_days = (now_ts - times[dated]) / SECONDS_PER_DAY
+
+    recent = (age_days >= 0) & (age_days < trend_days)
+    previous = (age_days >= trend_days) & (age_days < 2 * trend_days)
+    recent_counts = np.bincount(dated_groups[recent], minlength=n)
+    previous_counts = np.bincount(dated_groups[previous], minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        recent_means = np.bincount(dated_groups[recent], weights=dated_scores[recent], minlength=n) / recent_counts
+        previous_means = (
+            np.bincount(dated_groups[previous], weights=dated_scores[previous], minlength=n) / previous_counts
+        )
+    recent_trend = np.where(
+        (recent_counts > 0) | (previous_counts > 0),
+        np.nan_to_num(recent_means) - np.nan_to_num(previous_means),
+        np.nan,
+    )
+
+    # Pente des moindres carrés : cov(t, s) / var(t), t en jours
+    t = -age_days
+    dated_counts = np.bincount(dated_groups, minlength=n)
+    sum_t = np.bincount(dated_groups, weights=t, minlength=n)
+    sum_s = np.bincount(dated_groups, weights=dated_scores, minlength=n)
+    sum_tt = np.bincount(dated_groups, weights=t * t, minlength=n)
+    sum_ts = np.bincount(dated_groups, weights=t * dated_scores, minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        denominator = dated_counts * sum_tt - sum_t ** 2
+        slopes = np.where(
+            (dated_counts > 1) & (denominator > 1e-12),
+            (dated_counts * sum_ts - sum_t * sum_s) / denominator * trend_days,
+            np.nan,
+        )
+
+    # Moyennes glissantes : sommes par (service, période) puis somme cumulée
+    periods = buckets + rolling_buckets - 1
+    bucket = np.floor(age_days / bucket_days).astype(np.int64)
+    in_range = (bucket >= 0) & (bucket < periods)
+    column = periods - 1 - bucket[in_range]  # de la plus ancienne à la plus récente
+    flat = dated_groups[in_range] * periods + column
+    bucket_sums = np.bincount(flat, weights=dated_scores[in_range], minlength=n * periods).reshape(n, periods)
+    bucket_counts = np.bincount(flat, minlength=n * periods).reshape(n, periods)
+    cumulative_sums = np.concatenate((np.zeros((n, 1)), np.cumsum(bucket_sums, axis=1)), axis=1)
+    cumulative_counts = np.concatenate((np.zeros((n, 1), dtype=np.int64), np.cumsum(bucket_counts, axis=1)), axis=1)
+    window_sums = cumulative_sums[:, rolling_buckets:] - cumulative_sums[:, :-rolling_buckets]
+    window_counts = cumulative_counts[:, rolling_buckets:] - cumulative_counts[:, :-rolling_buckets]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rolling = np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+    period_ends = [now - timedelta(days=bucket_days * (buckets - 1 - index)) for index in range(buckets)]
+
+    results = []
+    for index, service_id in enumerate(service_ids):
+        results.append({
+            "service_id": service_id,
+            "count": int(counts[index]),
+            "average_score": None if np.isnan(means[index]) else float(means[index]),
+            "std_dev": None if np.isnan(stds[index]) else float(stds[index]),
+            "confidence_interval": None if np.isnan(margins[index]) else [
+                float(means[index] - margins[index]), float(means[index] + margins[index])
+            ],
+            "percentiles": dict(zip((f"p{p}" for p in PERCENTILES), _nullable(percentiles[:, index]))),
+            "score_distribution": {str(score): int(count) for score, count in enumerate(histograms[index])},
+            "recent_trend": None if np.isnan(recent_trend[index]) else float(recent_trend[index]),
+            "trend_slope": None if np.isnan(slopes[index]) else float(slopes[index]),
+            "rolling_average": [
+                {"period_end": period_end, "average": average, "count": int(count)}
+                for period_end, average, count in zip(
+                    period_ends, _nullable(rolling[index]), window_counts[index]
+                )
+            ],
+        })
+    return results
+
+
+def get_bulk_rating_stats(
+    db: Session,
+    service_ids: Sequence[UUID],
+    status: Optional[EvaluationStatus] = None,
+    now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """Charge les notes des services puis calcule leurs statistiques en une passe."""
+    service_ids = list(dict.fromkeys(service_ids))
+    groups, scores, times = load_score_columns(db, service_ids, status=status)
+    return compute_bulk_stats(service_ids, groups, scores, times, now=now)
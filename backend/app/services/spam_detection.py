@@ -0,0 +1,299 @@
+"""
+Détection automatique du spam et des doublons parmi les nouvelles évaluations.
+
+Exécutée par le répartiteur de l'outbox (événement evaluation.created, voir
+app.core.outbox) après create_evaluation, elle combine trois signaux :
+
+* doublon : commentaire quasi identique à un commentaire récent, détecté par
+  MinHash sur les k-grammes de caractères et indexation LSH par bandes ;
+* rafale : trop d'évaluations du même utilisateur dans une courte fenêtre ;
+* note aberrante : note très éloignée de la moyenne d'un service déjà bien noté.
+
+Une évaluation en attente qui déclenche au moins un signal passe au statut
+FLAGGED (à traiter avec POST /evaluations/moderate). L'index de similarité et
+l'historique des soumissions sont conservés en mémoire, par processus, et
+bornés (SPAM_INDEX_SIZE commentaires, SPAM_TRACKED_USERS utilisateurs) : les
+entrées les plus anciennes sont évincées. L'index est amorcé au premier appel
+avec les commentaires les plus récents de la base.
+"""
+import logging
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.outbox import subscribe
+# Enregistre d'abord le recalcul des notes : les totaux du service incluent
+# alors l'évaluation analysée
+from app.crud import crud_evaluation  # noqa: F401
+from app.database import SessionLocal
+from app.models.evaluation import Evaluation, EvaluationStatus
+from app.models.service import Service
+
+logger = logging.getLogger(__name__)
+
+SIGNAL_DUPLICATE = "duplicate"
+SIGNAL_BURST = "burst"
+SIGNAL_OUTLIER = "outlier"
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_comment(comment: str) -> str:
+    """Minuscules, ponctuation et espaces multiples réduits à une espace"""
+    return _NON_WORD.sub(" ", comment.lower()).strip()
+
+
+class SpamDetector:
+    """
+    Index MinHash/LSH des commentaires récents et fenêtres de soumission par utilisateur
+
+    La signature d'un commentaire est le minimum, pour chaque permutation, d'un
+    hachage multiplicatif (a * x + b) >> 32 de ses k-grammes d'octets, calculé
+    en une opération NumPy. Elle est découpée en SPAM_LSH_BANDS bandes : deux
+    commentaires qui partagent une bande sont candidats, et la part de
+    composantes égales de leurs signatures estime leur similarité de Jaccard.
+    """
+
+    def __init__(
+        self,
+        index_size: Optional[int] = None,
+        permutations: Optional[int] = None,
+        bands: Optional[int] = None,
+        shingle_size: Optional[int] = None,
+        seed: int = 0
+    ):
+        self.index_size = index_size or settings.SPAM_INDEX_SIZE
+        self.permutations = permutations or settings.SPAM_MINHASH_PERMUTATIONS
+        self.bands = bands or settings.SPAM_LSH_BANDS
+        self.shingle_size = shingle_size or settings.SPAM_SHINGLE_SIZE
+        if not 1 <= self.shingle_size <= 8:
+            raise ValueError("SPAM_SHINGLE_SIZE doit être compris entre 1 et 8")
+        if self.permutations % self.bands:
+            raise ValueError("SPAM_MINHASH_PERMUTATIONS doit être un multiple de SPAM_LSH_BANDS")
+        self._rows = self.permutations // self.bands
+
+        rng = np.random.default_rng(seed)
+        # Multiplicateurs impairs : le hachage multiplicatif reste injectif modulo 2^64
+        self._a = (rng.integers(0, 2 ** 63, size=self.permutations, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=self.permutations, dtype=np.uint64)
+
+        self._signatures: "OrderedDict[Any, np.ndarray]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, bytes], Set[Any]] = {}
+        # Utilisateur -> {évaluation: date de soumission}, dans l'ordre d'arrivée
+        self._submissions: "OrderedDict[Any, OrderedDict[Any, datetime]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def signature(self, comment: Optional[str]) -> Optional[np.ndarray]:
+        """Signature MinHash du commentaire, ou None s'il est trop court pour être comparé"""
+        text = normalize_comment(comment or "")
+        if len(text) < settings.SPAM_MIN_COMMENT_LENGTH:
+            return None
+        # k-grammes d'octets, chacun codé dans un entier de 64 bits (les
+        # répétitions ne changent pas le minimum, inutile de les dédoublonner)
+        data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+        count = len(data) - self.shingle_size + 1
+        shingles = np.zeros(count, dtype=np.uint64)
+        for offset in range(self.shingle_size):
+            shingles |= data[offset:offset + count] << np.uint64(8 * offset)
+        # Les produits débordent volontairement (arithmétique modulo 2^64) ; on
+        # garde les 32 bits de poids fort du minimum
+        hashed = self._a[:, None] * shingles[None, :] + self._b[:, None]
+        return hashed.min(axis=1) >> np.uint64(32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        rows = self._rows
+        return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+
+    def _add(self, key: Any, signature: np.ndarray) -> None:
+        if key in self._signatures:
+            self._remove(key)
+        self._signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, set()).add(key)
+        while len(self._signatures) > self.index_size:
+            self._remove(next(iter(self._signatures)))
+
+    def _remove(self, key: Any) -> None:
+        signature = self._signatures.pop(key)
+        for band_key in self._band_keys(signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def _nearest(self, key: Any, signature: np.ndarray) -> Optional[Tuple[Any, float]]:
+        candidates: Set[Any] = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+        candidates.discard(key)
+        if not candidates:
+            return None
+        candidates_list = list(candidates)
+        matrix = np.stack([self._signatures[candidate] for candidate in candidates_list])
+        similarities = (matrix == signature).mean(axis=1)
+        best = int(similarities.argmax())
+        return candidates_list[best], float(similarities[best])
+
+    def _record_submission(self, user_id: Any, evaluation_id: Any, submitted_at: datetime) -> int:
+        """
+        Ajoute une soumission et retourne le nombre de soumissions dans la fenêtre
+
+        Une évaluation déjà enregistrée (amorçage, événement livré à nouveau)
+        n'est pas comptée deux fois.
+        """
+        window_start = submitted_at - timedelta(seconds=settings.SPAM_BURST_WINDOW_SECONDS)
+        submissions = self._submissions.get(user_id)
+        if submissions is None:
+            submissions = self._submissions[user_id] = OrderedDict()
+            while len(self._submissions) > settings.SPAM_TRACKED_USERS:
+                self._submissions.popitem(last=False)
+        else:
+            self._submissions.move_to_end(user_id)
+        submissions.setdefault(evaluation_id, submitted_at)
+        while submissions and next(iter(submissions.values())) < window_start:
+            submissions.popitem(last=False)
+        return len(submissions)
+
+    def check(
+        self,
+        evaluation_id: Any,
+        user_id: Any,
+        comment: Optional[str],
+        score: float,
+        submitted_at: datetime,
+        service_mean: Optional[float] = None,
+        service_count: int = 0
+    ) -> List[str]:
+        """
+        Évalue une soumission, l'ajoute à l'index et retourne les signaux déclenchés
+
+        `service_mean` et `service_count` décrivent les autres évaluations du service.
+        """
+        signals = []
+        signature = self.signature(comment)
+        with self._lock:
+            if signature is not None:
+                nearest = self._nearest(evaluation_id, signature)
+                if nearest is not None and nearest[1] >= settings.SPAM_SIMILARITY_THRESHOLD:
+                    signals.append(SIGNAL_DUPLICATE)
+                self._add(evaluation_id, signature)
+            if self._record_submission(user_id, evaluation_id, submitted_at) > settings.SPAM_BURST_MAX_SUBMISSIONS:
+                signals.append(SIGNAL_BURST)
+        if (
+            service_mean is not None
+            and service_count >= settings.SPAM_OUTLIER_MIN_EVALUATIONS
+            and abs(score - service_mean) >= settings.SPAM_OUTLIER_DEVIATION
+        ):
+            signals.append(SIGNAL_OUTLIER)
+        return signals
+
+    def warm_up(self, db: Session, exclude: Any = None) -> None:
+        """
+        Amorce l'index avec les commentaires et soumissions les plus récents de la base
+
+        `exclude` est l'évaluation en cours d'analyse (déjà en base), que
+        check() enregistre ensuite.
+        """
+        with self._lock:
+            if self.loaded:
+                return
+            query = db.query(Evaluation.id, Evaluation.user_id, Evaluation.comment, Evaluation.timestamp)
+            if exclude is not None:
+                query = query.filter(Evaluation.id != exclude)
+            rows = query.order_by(Evaluation.timestamp.desc()).limit(self.index_size).all()
+            burst_start = datetime.utcnow() - timedelta(seconds=settings.SPAM_BURST_WINDOW_SECONDS)
+            # Du plus ancien au plus récent, pour que l'éviction suive l'ordre d'arrivée
+            for evaluation_id, user_id, comment, submitted_at in reversed(rows):
+                signature = self.signature(comment)
+                if signature is not None:
+                    self._add(evaluation_id, signature)
+                if submitted_at is not None and submitted_at >= burst_start:
+                    self._record_submission(user_id, evaluation_id, submitted_at)
+            self.loaded = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._signatures.clear()
+            self._buckets.clear()
+            self._submissions.clear()
+            self.loaded = False
+
+
+spam_detector = SpamDetector()
+
+
+def _screen(db: Session, evaluation_id: Any) -> List[str]:
+    """Analyse une évaluation et la signale si nécessaire, sans valider la transaction"""
+    if not spam_detector.loaded:
+        spam_detector.warm_up(db, exclude=evaluation_id)
+    row = db.query(
+        Evaluation.user_id, Evaluation.comment, Evaluation.score, Evaluation.timestamp,
+        Service.evaluation_count, Service.score_sum
+    ).join(Service, Service.id == Evaluation.service_id).filter(Evaluation.id == evaluation_id).first()
+    if row is None:
+        return []
+    user_id, comment, score, submitted_at, count, score_sum = row
+
+    # Moyenne des autres évaluations du service (celle-ci est déjà dans les totaux)
+    others = (count or 0) - 1
+    service_mean = ((score_sum or 0.0) - score) / others if others > 0 else None
+    signals = spam_detector.check(
+        evaluation_id, user_id, comment, score, submitted_at or datetime.utcnow(), service_mean, others
+    )
+
+    if signals:
+        flagged = db.execute(
+            update(Evaluation)
+            .where(Evaluation.id == evaluation_id, Evaluation.status == EvaluationStatus.PENDING)
+            .values(status=EvaluationStatus.FLAGGED)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if flagged:
+            logger.info(f"Évaluation {evaluation_id} signalée automatiquement : {', '.join(signals)}")
+    return signals
+
+
+@subscribe("evaluation.created")
+def screen_new_evaluations(db: Session, events: List[Any]) -> None:
+    """Gestionnaire de l'outbox : analyse les évaluations créées"""
+    if not settings.SPAM_DETECTION_ENABLED:
+        return
+    for event in events:
+        _screen(db, event.aggregate_id)
+
+
+def screen_evaluation(evaluation_id: UUID, db: Optional[Session] = None) -> List[str]:
+    """
+    Analyse une évaluation qui vient d'être créée et la signale si nécessaire
+
+    Seule une évaluation encore en attente passe au statut FLAGGED (une
+    décision de modération déjà prise n'est pas écrasée). Retourne les signaux
+    déclenchés ; les erreurs sont journalisées, la fonction ne lève pas.
+    """
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
+    try:
+        signals = _screen(db, evaluation_id)
+        db.commit()
+        return signals
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Erreur lors de l'analyse anti-spam de l'évaluation {evaluation_id}: {str(e)}")
+        return []
+    finally:
+        if own_session:
+            db.close()
@@ -0,0 +1,124 @@
+import os
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Cheap password hashes for the users created by the tests (read when app.core.security is imported)
+os.environ.setdefault("PASSWORD_BCRYPT_ROUNDS", "5")
+
+
+@pytest.fixture
+def engine():
+    """In-memory SQLite database with every table, shared by all the sessions of a test"""
+    from app import models  # noqa: F401
+    from app.database import Base
+
+    test_engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(test_engine)
+    yield test_engine
+    test_engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    db = sessionmaker(bind=engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def db(session):
+    """The test session, under the name used by the API tests"""
+    return session
+
+
+@pytest.fixture
+def client(engine):
+    """TestClient of the app, with its get_db dependency bound to the test database"""
+    from fastapi.testclient import TestClient
+
+    from app.core.auth_cache import token_user_cache
+    from app.database import get_db
+    from app.main import app
+
+    TestSession = sessionmaker(bind=engine)
+
+    def get_test_db():
+        db = TestSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_test_db
+    token_user_cache.clear()
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        token_user_cache.clear()
+
+
+def _token_headers(session, role):
+    from app.core.security import create_access_token
+    from app.models.user import User
+
+    user = User(username=f"{role}-client", email=f"{role}-client@example.com", full_name=f"{role.title()} Client",
+                hashed_password="not-a-hash", role=role)
+    session.add(user)
+    session.commit()
+    return {"Authorization": f"Bearer {create_access_token(user.id)}"}
+
+
+@pytest.fixture
+def admin_headers(session):
+    """Bearer token headers of a new admin"""
+    return _token_headers(session, "admin")
+
+
+@pytest.fixture
+def user_headers(session):
+    """Bearer token headers of a new regular user"""
+    return _token_headers(session, "user")
+
+
+@pytest.fixture
+def query_budget(engine):
+    """
+    Assert a maximum number of SQL statements for a block of code
+
+    Usage:
+    ```
+    def test_list_services(client, query_budget):
+        with query_budget(2):
+            client.get("/api/v1/services/")
+    ```
+    On failure the message lists every statement and repeated (N+1) shapes.
+    """
+    from app.core.query_profiler import record_queries
+
+    @contextmanager
+    def budget(max_queries: int, allow_n_plus_one: bool = False):
+        with record_queries(engine) as profile:
+            yield profile
+        assert profile.count <= max_queries, (
+            f"Query budget exceeded ({profile.count} > {max_queries}):\n{profile.report()}"
+        )
+        if not allow_n_plus_one:
+            assert not profile.repeated_shapes(), f"N+1 query pattern detected:\n{profile.report()}"
+
+    return budget
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    """Every test starts with full rate limit buckets (all requests come from the test client)"""
+    from app.core.rate_limit import MemoryBucketStore, rate_limiter
+
+    rate_limiter.store = MemoryBucketStore()
+    yield
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Country, Evaluation, EvaluationVote, Service, User
+from app.scripts.export_analytics_snapshot import export_snapshot, load_state
+
+pa_dataset = pytest.importorskip("pyarrow.dataset")
+
+NOW = datetime(2024, 3, 10, 12, 0, 0)
+
+
+def add_evaluation(db, service, user, created_at):
+    evaluation = Evaluation(service=service, user=user, score=7.0, timestamp=created_at, created_at=created_at)
+    db.add(evaluation)
+    db.flush()
+    db.add(EvaluationVote(evaluation_id=evaluation.id, voter_id=user.id, is_helpful=True, timestamp=created_at))
+    db.commit()
+    return evaluation
+
+
+def read(path):
+    return pa_dataset.dataset(path, partitioning="hive").to_table().to_pylist()
+
+
+def test_snapshot_is_partitioned_and_incremental(session, tmp_path):
+    country = Country(name="Testland", code="TL")
+    user = User(username="alice", email="alice@example.com", full_name="Alice", hashed_password="x")
+    service = Service(name="Town hall", category="public", country=country)
+    session.add_all([country, user, service])
+    add_evaluation(session, service, user, datetime(2024, 1, 15))
+    add_evaluation(session, service, user, datetime(2024, 2, 20))
+    recent = add_evaluation(session, service, user, NOW - timedelta(seconds=10))
+
+    counts = export_snapshot(session, str(tmp_path), lag_seconds=60, now=NOW)
+
+    assert counts["evaluations"] == 2
+    assert counts["votes"] == 2
+    months = sorted(row["month"] for row in read(tmp_path / "evaluations"))
+    assert months == ["2024-01", "2024-02"]
+    assert (tmp_path / "evaluations" / f"country_id={country.id}" / "month=2024-01").is_dir()
+
+    # The row inside the lag window is picked up by the next run, and only once
+    counts = export_snapshot(session, str(tmp_path), lag_seconds=60, now=NOW + timedelta(minutes=5))
+    assert counts["evaluations"] == 1
+    rows = read(tmp_path / "evaluations")
+    assert len(rows) == 3
+    assert str(recent.id) in {row["id"] for row in rows}
+    assert load_state(str(tmp_path))["until"] == (NOW + timedelta(minutes=4)).isoformat()
@@ -1,2 +1,67 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
+
+from app.core.auth_cache import token_user_cache
+from app.crud.crud_auth import _duplicate_user_field, update_user
+from app.models import User
+from app.schemas.user import UserUpdate
+
+USER_LOOKUP = "FROM users \nWHERE users.id = ?"
+
+
+def signup(client, username, email):
+    return client.post("/api/v1/auth/signup", json={
+        "username": username, "email": email, "full_name": "Alice Martin", "password": "secret-password",
+    })
+
+
+def test_signup_reports_which_field_is_taken(client):
+    assert signup(client, "alice", "alice@example.com").status_code == 201
+
+    taken_email = signup(client, "alice2", "alice@example.com")
+    assert (taken_email.status_code, taken_email.json()["detail"]) == (400, "Email already registered")
+    taken_username = signup(client, "alice", "alice2@example.com")
+    assert (taken_username.status_code, taken_username.json()["detail"]) == (400, "Username already taken")
+
+
+@pytest.mark.parametrize("message, field", [
+    ("UNIQUE constraint failed: users.email", "email"),
+    ("UNIQUE constraint failed: users.username", "username"),
+    ("(1062, \"Duplicate entry 'a@example.com' for key 'users.ix_users_email'\")", "email"),
+    ("(1062, \"Duplicate entry 'alice' for key 'ix_users_username'\")", "username"),
+    # The duplicate value itself must not be taken for the field
+    ("(1062, \"Duplicate entry 'username@example.com' for key 'users.ix_users_email'\")", "email"),
+    ("(1062, \"Duplicate entry 'email' for key 'users.ix_users_username'\")", "username"),
+    ("NOT NULL constraint failed: users.email", None),
+    ("FOREIGN KEY constraint failed", None),
+])
+def test_duplicate_user_field_reads_the_violated_key(message, field):
+    assert _duplicate_user_field(IntegrityError("INSERT INTO users ...", {}, Exception(message))) == field
+
+
+def test_repeated_token_is_served_from_the_auth_cache(client, user_headers, query_budget):
+    with query_budget(3) as first:
+        assert client.get("/api/v1/evaluations/user/me", headers=user_headers).status_code == 200
+    assert any(USER_LOOKUP in statement for statement, _ in first.statements)
+    assert len(token_user_cache) == 1
+
+    # Same token: no signature check and no user query
+    with query_budget(2) as second:
+        assert client.get("/api/v1/evaluations/user/me", headers=user_headers).status_code == 200
+    assert not any(USER_LOOKUP in statement for statement, _ in second.statements)
+
+
+def test_cached_tokens_are_dropped_when_the_user_changes(client, session, admin_headers, user_headers):
+    queue = "/api/v1/evaluation-reports/queue"
+    assert client.get(queue, headers=admin_headers).status_code == 200
+    assert client.get("/api/v1/evaluations/user/me", headers=user_headers).status_code == 200
+
+    admin = session.query(User).filter(User.username == "admin-client").one()
+    update_user(session, user_id=admin.id, user_in=UserUpdate(role="user"))
+    assert client.get(queue, headers=admin_headers).status_code == 403
+
+    user = session.query(User).filter(User.username == "user-client").one()
+    update_user(session, user_id=user.id, user_in=UserUpdate(is_active=False))
+    response = client.get("/api/v1/evaluations/user/me", headers=user_headers)
+    assert (response.status_code, response.json()["detail"]) == (400, "Inactive user")
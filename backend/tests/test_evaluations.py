@@ -10,9 +10,7 @@ from app.models.country import Country
 from app.models.evaluation import Evaluation
 from app.crud.crud_auth import create_user
 from app.crud.crud_service import create_service
-from app.crud.crud_country import create_country
 from app.schemas.user import UserCreate
-from app.schemas.country import CountryCreate
 from app.schemas.service import ServiceCreate
 
 
@@ -23,6 +21,7 @@ def user_token_headers(client: TestClient, db: Session):
     user = UserCreate(
         username="testuser",
         email="testuser@example.com",
+        full_name="Test User",
         password="testpass123"
     )
     
@@ -48,8 +47,9 @@ def admin_token_headers(client: TestClient, db: Session):
     admin_user = UserCreate(
         username="admin",
         email="admin@example.com",
+        full_name="Admin User",
         password="admin123",
-        role=UserRole.ADMIN
+        role=UserRole.admin
     )
     
     # Add admin to database
@@ -71,11 +71,9 @@ def admin_token_headers(client: TestClient, db: Session):
 def test_service(db: Session):
     """Create a test service for evaluations"""
     # Create a country first
-    country = CountryCreate(
-        name="Test Country",
-        region="Test Region"
-    )
-    db_country = create_country(db, country)
+    db_country = Country(name="Test Country", code="TC", region="Test Region")
+    db.add(db_country)
+    db.commit()
     
     # Create a service
     service = ServiceCreate(
@@ -199,6 +197,21 @@ def test_get_evaluations_by_service(client: TestClient, test_service, test_evalu
     assert data[0]["service_id"] == test_service.id
 
 
+# Test that listing evaluations does not lazy-load users/services per row
+def test_get_evaluations_query_budget(client: TestClient, query_budget, test_evaluation):
+    with query_budget(2):
+        response = client.get("/api/v1/evaluations/?page=1&limit=100")
+    
+    assert response.status_code == 200
+
+
+def test_get_evaluations_by_service_query_budget(client: TestClient, query_budget, test_service, test_evaluation):
+    with query_budget(3):
+        response = client.get(f"/api/v1/evaluations/{test_service.id}/list")
+    
+    assert response.status_code == 200
+
+
 # Test getting a specific evaluation
 def test_get_evaluation_by_id(client: TestClient, test_evaluation):
     response = client.get(f"/api/v1/evaluations/{test_evaluation.id}")
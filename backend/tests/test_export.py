@@ -0,0 +1,75 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+from uuid import UUID
+
+from app.core import export
+from app.core.export import gzip_stream, stream_csv, stream_ndjson
+from app.models.evaluation import EvaluationStatus
+
+COLUMNS = ("id", "score", "comment", "status", "timestamp")
+
+
+def make_rows(count):
+    for index in range(count):
+        yield (
+            UUID(int=index), index % 10 + 0.5, f"comment, with \"quotes\" {index}",
+            EvaluationStatus.APPROVED, datetime(2024, 1, 1, 12, 0, index % 60),
+        )
+
+
+def test_stream_csv_is_chunked_and_round_trips(monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_CHUNK_BYTES", 1024)
+
+    chunks = list(stream_csv(COLUMNS, make_rows(500)))
+
+    assert len(chunks) > 1
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert rows[0] == list(COLUMNS)
+    assert len(rows) == 501
+    assert rows[2] == [str(UUID(int=1)), "1.5", 'comment, with "quotes" 1', "approved", "2024-01-01T12:00:01"]
+
+
+def test_stream_ndjson_reads_rows_lazily():
+    consumed = []
+
+    def rows():
+        for row in make_rows(3):
+            consumed.append(row)
+            yield row
+
+    stream = stream_ndjson(COLUMNS, rows())
+    assert consumed == []
+
+    lines = b"".join(stream).splitlines()
+    assert len(consumed) == 3
+    assert json.loads(lines[0]) == {
+        "id": str(UUID(int=0)),
+        "score": 0.5,
+        "comment": 'comment, with "quotes" 0',
+        "status": "approved",
+        "timestamp": "2024-01-01T12:00:00",
+    }
+
+
+def test_gzip_stream_produces_a_valid_archive():
+    body = b"".join(gzip_stream(stream_ndjson(COLUMNS, make_rows(1000))))
+
+    assert len(gzip.decompress(body).splitlines()) == 1000
+
+
+def test_export_route_is_admin_only(client, engine, admin_headers, user_headers, monkeypatch):
+    from sqlalchemy.orm import sessionmaker
+
+    from app.api import evaluations
+    from app.crud.crud_evaluation import EVALUATION_EXPORT_COLUMNS
+
+    # The export reads with its own session
+    monkeypatch.setattr(evaluations, "SessionLocal", sessionmaker(bind=engine))
+
+    assert client.get("/api/v1/evaluations/export", headers=user_headers).status_code == 403
+    response = client.get("/api/v1/evaluations/export", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.text.splitlines() == [",".join(EVALUATION_EXPORT_COLUMNS)]
@@ -0,0 +1,30 @@
+from app.models import User
+from app.scripts.import_users import filter_existing_users, import_users, read_users_csv
+
+
+def test_import_skips_invalid_duplicate_and_existing_accounts(session, tmp_path):
+    session.add(User(username="taken", email="existing@example.com", full_name="Existing", hashed_password="x"))
+    session.commit()
+    path = tmp_path / "accounts.csv"
+    path.write_text(
+        "username,email,full_name,password,role\n"
+        "alice,alice@example.com,Alice,secret-1,admin\n"
+        "bob,bob@example.com,Bob,secret-2,\n"
+        "alice,other@example.com,Alice Again,secret-3,\n"
+        "carol,not-an-email,Carol,secret-4,\n"
+        "taken,new@example.com,Taken,secret-5,\n"
+        "dave,existing@example.com,Dave,secret-6,\n",
+        encoding="utf-8",
+    )
+
+    users, errors = read_users_csv(str(path))
+    assert [user.username for user in users] == ["alice", "bob", "taken", "dave"]
+    assert [error.split(":")[0] for error in errors] == ["Ligne 4", "Ligne 5"]
+
+    users, skipped = filter_existing_users(session, users, chunk_size=2)
+    assert ([user.username for user in users], skipped) == (["alice", "bob"], 2)
+
+    assert import_users(session, users, chunk_size=1, workers=1) == 2
+    rows = {user.username: user for user in session.query(User).filter(User.username.in_(["alice", "bob"]))}
+    assert (rows["alice"].role.value, rows["bob"].role.value) == ("admin", "user")
+    assert rows["alice"].hashed_password.startswith("$2")
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.core.jobs import JobWorker, enqueue, job
+from app.crud.crud_job import cancel_job, get_jobs
+from app.models import Job, JobStatus
+
+calls = []
+
+
+@job("test.add")
+def add(db, a, b=1):
+    calls.append((a, b))
+    return {"sum": a + b}
+
+
+@job("test.flaky")
+def flaky(db, failures):
+    calls.append(failures)
+    if len(calls) <= failures:
+        raise RuntimeError("temporary failure")
+    return None
+
+
+@pytest.fixture
+def make_session(engine):
+    calls.clear()
+    return sessionmaker(bind=engine)
+
+
+def test_jobs_run_in_order_and_store_their_result(make_session):
+    db = make_session()
+    later = enqueue(db, "test.add", {"a": 1, "b": 2}, run_at=datetime.utcnow() + timedelta(hours=1))
+    first = enqueue(db, "test.add", {"a": 5})
+    with pytest.raises(ValueError):
+        enqueue(db, "test.missing")
+    with pytest.raises(ValueError):
+        enqueue(db, "test.add", {"b": 2})
+
+    worker = JobWorker(make_session, worker_id="worker-1")
+    assert worker.run_once() is True
+    # The scheduled job is not due yet
+    assert worker.run_once() is False
+    assert calls == [(5, 1)]
+
+    db.expire_all()
+    done = db.get(Job, first.id)
+    assert (done.status, done.result, done.attempts, done.worker_id) == (JobStatus.SUCCEEDED, {"sum": 6}, 1, "worker-1")
+    assert db.get(Job, later.id).status == JobStatus.QUEUED
+    assert get_jobs(db, status=JobStatus.SUCCEEDED)[1] == 1
+
+
+def test_failed_attempts_are_retried_with_backoff(make_session):
+    db = make_session()
+    retried = enqueue(db, "test.flaky", {"failures": 1}, max_attempts=2)
+    worker = JobWorker(make_session)
+
+    assert worker.run_once() is True
+    db.expire_all()
+    waiting = db.get(Job, retried.id)
+    assert (waiting.status, waiting.attempts, waiting.last_error) == (
+        JobStatus.QUEUED, 1, "RuntimeError: temporary failure"
+    )
+    assert waiting.run_at > datetime.utcnow()
+    assert worker.run_once() is False
+
+    waiting.run_at = datetime.utcnow()
+    db.commit()
+    assert worker.run_once() is True
+    db.expire_all()
+    assert db.get(Job, retried.id).status == JobStatus.SUCCEEDED
+
+    calls.clear()
+    doomed = enqueue(db, "test.flaky", {"failures": 5}, max_attempts=1)
+    worker.run_once()
+    db.expire_all()
+    assert db.get(Job, doomed.id).status == JobStatus.FAILED
+
+
+def test_expired_leases_are_claimed_again(make_session):
+    db = make_session()
+    abandoned = enqueue(db, "test.add", {"a": 1}, max_attempts=2)
+    crashed = JobWorker(make_session, worker_id="crashed")
+    claimed = crashed.claim(db)
+    assert claimed.id == abandoned.id
+    # Leased: no other worker takes it
+    other = JobWorker(make_session, worker_id="other")
+    assert other.run_once() is False
+
+    db.query(Job).update({Job.locked_until: datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    assert other.run_once() is True
+    db.expire_all()
+    done = db.get(Job, abandoned.id)
+    assert (done.status, done.attempts, done.worker_id) == (JobStatus.SUCCEEDED, 2, "other")
+
+
+def test_cancel_queued_jobs_only(make_session):
+    db = make_session()
+    queued = enqueue(db, "test.add", {"a": 1})
+    assert cancel_job(db, queued.id) == (True, "Job cancelled")
+    assert JobWorker(make_session).run_once() is False
+    assert cancel_job(db, queued.id) == (False, "Only queued jobs can be cancelled")
+
+
+def test_job_routes_are_admin_only(client, make_session, admin_headers, user_headers):
+    for method, path in (("post", "/api/v1/jobs/"), ("get", "/api/v1/jobs/available"), ("get", "/api/v1/jobs/")):
+        assert client.request(method, path, headers=user_headers, json={"name": "test.add"}).status_code == 403
+
+    queued = client.post("/api/v1/jobs/", headers=admin_headers, json={"name": "test.add", "payload": {"a": 2}})
+    assert queued.status_code == 202
+    job_id = queued.json()["id"]
+    assert client.post("/api/v1/jobs/", headers=admin_headers, json={"name": "test.missing"}).status_code == 400
+    assert "test.add" in client.get("/api/v1/jobs/available", headers=admin_headers).json()
+    assert client.get("/api/v1/jobs/", headers=admin_headers).json()["total"] == 1
+
+    assert client.get(f"/api/v1/jobs/{job_id}", headers=user_headers).status_code == 403
+    assert client.get(f"/api/v1/jobs/{job_id}", headers=admin_headers).json()["status"] == "queued"
+    assert client.post(f"/api/v1/jobs/{job_id}/cancel", headers=user_headers).status_code == 403
+    assert client.post(f"/api/v1/jobs/{job_id}/cancel", headers=admin_headers).status_code == 200
+    assert client.post(f"/api/v1/jobs/{job_id}/cancel", headers=admin_headers).status_code == 409
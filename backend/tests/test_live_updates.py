@@ -0,0 +1,87 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.live_updates import REREAD_SECONDS, LiveUpdateHub, LiveUpdatesFull, live_updates
+from app.core.outbox import OutboxDispatcher, publish
+from app.crud.crud_evaluation import create_evaluation
+from app.models import Country, Service, User
+from app.models.user import UserRole
+from app.schemas.evaluation import EvaluationCreate
+
+
+def parse(frame):
+    event, data = frame.decode().strip().split("\n")
+    return event[len("event: "):], json.loads(data[len("data: "):])
+
+
+def test_rating_changes_are_coalesced_per_service(session):
+    hub = LiveUpdateHub()
+    watched, other = "service-1", "service-2"
+    # The feed is picked up from REREAD_SECONDS ago: a change committed just
+    # before the first poll is sent, older ones are not
+    stale = publish(session, "service.rating_changed", watched, {"rating": 0.5})
+    stale.created_at = datetime.utcnow() - timedelta(seconds=REREAD_SECONDS + 5)
+    publish(session, "service.rating_changed", watched, {"rating": 1.0})
+    session.commit()
+    frames = hub.poll(session, [watched])
+    assert [parse(frame) for frame in frames[watched]] == [("rating", {"service_id": watched, "rating": 1.0})]
+    assert hub.poll(session, [watched]) == {}
+
+    for rating in (2.0, 3.0):
+        publish(session, "service.rating_changed", watched, {"rating": rating})
+    publish(session, "service.rating_changed", other, {"rating": 9.0})
+    session.commit()
+    frames = hub.poll(session, [watched])
+    assert [parse(frame) for frame in frames[watched]] == [("rating", {"service_id": watched, "rating": 3.0})]
+    assert other not in frames
+    # Events are sent once, even though recent ones are read again
+    assert hub.poll(session, [watched]) == {}
+
+
+def test_approved_evaluations_are_sent_with_the_new_rating(session):
+    country = Country(name="Testland", code="TL")
+    service = Service(name="Town hall", category="public", country=country)
+    # Evaluations written by admins are approved right away
+    user = User(username="admin", email="admin@example.com", full_name="Admin",
+                hashed_password="secret-hash", role=UserRole.admin)
+    session.add_all([country, service, user])
+    session.commit()
+    hub = LiveUpdateHub()
+    key = str(service.id)
+    hub.poll(session, [key])
+
+    evaluation = create_evaluation(session, EvaluationCreate(service_id=service.id, score=8.0, comment="Fast"), user.id)
+    OutboxDispatcher().drain(session)
+    frames = [parse(frame) for frame in hub.poll(session, [key])[key]]
+    assert [event for event, _ in frames] == ["rating", "evaluations"]
+    assert (frames[0][1]["rating"], frames[0][1]["evaluation_count"]) == (pytest.approx(8.0), 1)
+    assert [(item["id"], item["comment"]) for item in frames[1][1]] == [(str(evaluation.id), "Fast")]
+
+
+def test_unknown_service_releases_the_viewer_slot(client):
+    # Viewers are registered before the service is read
+    response = client.get("/api/v1/services/00000000-0000-0000-0000-000000000000/live")
+    assert response.status_code == 404
+    assert live_updates.stats()["subscribers"] == 0
+
+
+def test_slow_viewers_lose_the_oldest_messages():
+    async def scenario():
+        hub = LiveUpdateHub(queue_size=2, max_subscribers=2)
+        slow = hub.subscribe("service-1")
+        hub.subscribe("service-1")
+        with pytest.raises(LiveUpdatesFull):
+            hub.subscribe("service-2")
+
+        hub.broadcast({"service-1": [b"1", b"2", b"3"], "service-2": [b"ignored"]})
+        assert [slow.get_nowait(), slow.get_nowait()] == [b"2", b"3"]
+        assert hub.stats()["dropped"] == 2
+
+        hub.unsubscribe("service-1", slow)
+        hub.unsubscribe("service-1", slow)
+        assert hub.stats()["subscribers"] == 1
+
+    asyncio.run(scenario())
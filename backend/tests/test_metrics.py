@@ -0,0 +1,38 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import HISTOGRAMS, MetricsMiddleware, instrument_engine, render_metrics
+
+
+def build_app():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1")).scalar()
+            conn.execute(text("SELECT 2")).scalar()
+        return {"id": item_id}
+
+    return app
+
+
+def test_metrics_are_recorded_per_route_template():
+    for histogram in HISTOGRAMS:
+        histogram.reset()
+    client = TestClient(build_app())
+
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+
+    output = render_metrics()
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{item_id}",status="200"} 2' in output
+    assert 'http_request_db_queries_sum{method="GET",route="/items/{item_id}"} 4' in output
+    assert 'http_request_duration_seconds_count{method="GET",route="<unmatched>",status="404"} 1' in output
+    assert 'http_response_size_bytes_bucket{method="GET",route="/items/{item_id}",le="100"} 2' in output
@@ -0,0 +1,195 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.outbox import outbox_dispatcher
+from app.crud.crud_evaluation import bulk_moderate_evaluations
+from app.crud.crud_evaluation_report import (
+    create_evaluation_report, get_moderation_queue, reporter_reputation, resolve_evaluation_reports
+)
+from app.models import Country, Evaluation, EvaluationReport, OutboxEvent, ReportReason, ReportResolution, Service, User
+from app.models.evaluation import EvaluationStatus
+from app.models.user import UserRole
+from app.schemas.evaluation import EvaluationBulkModeration, EvaluationModerationAction, EvaluationReportCreate
+
+
+@pytest.fixture
+def world(session):
+    country = Country(name="Testland", code="TL")
+    service = Service(name="Town hall", category="public", country=country)
+    users = [
+        User(username=f"user{index}", email=f"user{index}@example.com", full_name=f"User {index}",
+             hashed_password="secret-hash", role=UserRole.user)
+        for index in range(4)
+    ]
+    evaluations = [
+        Evaluation(user=users[0], service=service, score=float(index), status=EvaluationStatus.APPROVED,
+                   timestamp=datetime(2024, 1, 1) + timedelta(days=index))
+        for index in range(5)
+    ]
+    session.add_all([country, service, *users, *evaluations])
+    session.commit()
+    return users, evaluations
+
+
+def report(session, evaluation, reporter):
+    created = create_evaluation_report(
+        session, EvaluationReportCreate(evaluation_id=evaluation.id, reason=ReportReason.spam), reporter.id
+    )
+    # Queue counters are maintained by the outbox dispatcher
+    outbox_dispatcher.drain(session)
+    return created
+
+
+def test_reports_maintain_queue_counters(session, world):
+    users, evaluations = world
+    report(session, evaluations[0], users[1])
+    report(session, evaluations[0], users[2])
+
+    session.refresh(evaluations[0])
+    assert evaluations[0].unresolved_report_count == 2
+    assert evaluations[0].report_weight == pytest.approx(2 * reporter_reputation(0, 0))
+    assert evaluations[0].first_reported_at is not None
+
+    # Redelivered events are not counted twice
+    session.query(OutboxEvent).update({OutboxEvent.processed_at: None})
+    session.commit()
+    outbox_dispatcher.drain(session)
+    session.refresh(evaluations[0])
+    assert evaluations[0].unresolved_report_count == 2
+
+
+def test_resolving_before_delivery_does_not_count_the_report_again(session, world):
+    users, evaluations = world
+    created = create_evaluation_report(
+        session, EvaluationReportCreate(evaluation_id=evaluations[0].id, reason=ReportReason.spam), users[1].id
+    )
+    resolve_evaluation_reports(session, [created.id], ReportResolution.rejected, None)
+    outbox_dispatcher.drain(session)
+
+    session.refresh(evaluations[0])
+    assert (evaluations[0].unresolved_report_count, evaluations[0].report_weight) == (0, 0.0)
+
+
+def test_queue_order_and_keyset_pagination(session, world):
+    users, evaluations = world
+    trusted, newcomer, doubtful = users[1], users[2], users[3]
+    trusted.reports_accepted = 5
+    doubtful.reports_rejected = 5
+    session.commit()
+
+    report(session, evaluations[0], newcomer)
+    report(session, evaluations[1], doubtful)
+    report(session, evaluations[2], trusted)
+    report(session, evaluations[3], newcomer)
+    report(session, evaluations[3], doubtful)
+
+    expected = [evaluations[3].id, evaluations[2].id, evaluations[0].id, evaluations[1].id]
+    items, next_key = get_moderation_queue(session, limit=10)
+    assert [item["evaluation_id"] for item in items] == expected
+    assert next_key is None
+
+    seen, after = [], None
+    while True:
+        items, after = get_moderation_queue(session, limit=1, after=after)
+        seen.extend(item["evaluation_id"] for item in items)
+        if after is None:
+            break
+        after = [after[0], after[1], after[2].isoformat(), str(after[3])]
+    assert seen == expected
+
+    with pytest.raises(ValueError):
+        get_moderation_queue(session, after=["x"])
+
+
+def test_batch_resolve(session, world):
+    users, evaluations = world
+    spam_reports = [report(session, evaluations[0], users[1]), report(session, evaluations[0], users[2])]
+    dismissed = report(session, evaluations[1], users[3])
+    kept = report(session, evaluations[2], users[3])
+
+    accepted = resolve_evaluation_reports(session, [spam_reports[0].id], ReportResolution.accepted, users[0].id)
+    # The other pending report on the same evaluation is upheld too
+    assert accepted == {"resolved": 2, "skipped": 0, "evaluations_updated": 1}
+
+    result = resolve_evaluation_reports(
+        session, [dismissed.id, spam_reports[1].id], ReportResolution.rejected, users[0].id
+    )
+    assert result == {"resolved": 1, "skipped": 1, "evaluations_updated": 1}
+
+    for instance in (*evaluations, *users):
+        session.refresh(instance)
+    assert evaluations[0].status == EvaluationStatus.REJECTED
+    assert (evaluations[0].unresolved_report_count, evaluations[0].first_reported_at) == (0, None)
+    assert evaluations[1].status == EvaluationStatus.APPROVED
+    assert evaluations[1].unresolved_report_count == 0
+    assert evaluations[2].unresolved_report_count == 1
+    assert (users[1].reports_accepted, users[2].reports_accepted) == (1, 1)
+    assert (users[3].reports_accepted, users[3].reports_rejected) == (0, 1)
+
+    resolved = session.query(EvaluationReport).filter(EvaluationReport.id == dismissed.id).one()
+    assert (resolved.resolved, resolved.resolution, resolved.resolved_by) == (True, ReportResolution.rejected, users[0].id)
+    assert session.query(EvaluationReport).filter(EvaluationReport.id == kept.id).one().resolved is False
+
+
+def test_bulk_moderation(session, world):
+    users, evaluations = world
+    service = evaluations[0].service
+    for evaluation in evaluations:
+        evaluation.status = EvaluationStatus.PENDING
+    session.commit()
+
+    approved = bulk_moderate_evaluations(session, EvaluationBulkModeration(
+        action=EvaluationModerationAction.approve, evaluation_ids=[evaluations[0].id, evaluations[1].id]
+    ))
+    # Pending evaluations already count towards the rating
+    assert approved == {"evaluations_updated": 2, "services_recomputed": 0}
+
+    rejected = bulk_moderate_evaluations(session, EvaluationBulkModeration(
+        action=EvaluationModerationAction.reject, service_id=service.id, min_score=3.0, current_status=None
+    ))
+    assert rejected == {"evaluations_updated": 2, "services_recomputed": 1}
+
+    for instance in (service, *evaluations):
+        session.refresh(instance)
+    assert [evaluation.status for evaluation in evaluations] == [
+        EvaluationStatus.APPROVED, EvaluationStatus.APPROVED, EvaluationStatus.PENDING,
+        EvaluationStatus.REJECTED, EvaluationStatus.REJECTED,
+    ]
+    assert (service.evaluation_count, service.rating) == (3, pytest.approx(1.0))
+
+    with pytest.raises(ValueError):
+        EvaluationBulkModeration(action=EvaluationModerationAction.approve)
+
+
+def test_moderation_queue_route_is_admin_only(client, session, world, admin_headers, user_headers):
+    users, evaluations = world
+    report(session, evaluations[0], users[1])
+
+    assert client.get("/api/v1/evaluation-reports/queue", headers=user_headers).status_code == 403
+    response = client.get("/api/v1/evaluation-reports/queue", headers=admin_headers)
+    assert response.status_code == 200
+    assert [item["evaluation_id"] for item in response.json()["items"]] == [str(evaluations[0].id)]
+
+
+def test_batch_resolve_route_is_admin_only(client, session, world, admin_headers, user_headers):
+    users, evaluations = world
+    filed = report(session, evaluations[1], users[2])
+    body = {"report_ids": [str(filed.id)], "resolution": "rejected"}
+
+    assert client.post("/api/v1/evaluation-reports/resolve", headers=user_headers, json=body).status_code == 403
+    response = client.post("/api/v1/evaluation-reports/resolve", headers=admin_headers, json=body)
+    assert response.status_code == 200
+    assert response.json() == {"resolved": 1, "skipped": 0, "evaluations_updated": 1}
+
+
+def test_bulk_moderation_route_is_admin_only(client, session, world, admin_headers, user_headers):
+    users, evaluations = world
+    evaluations[0].status = EvaluationStatus.PENDING
+    session.commit()
+    body = {"action": "approve", "evaluation_ids": [str(evaluations[0].id)]}
+
+    assert client.post("/api/v1/evaluations/moderate", headers=user_headers, json=body).status_code == 403
+    response = client.post("/api/v1/evaluations/moderate", headers=admin_headers, json=body)
+    assert response.status_code == 200
+    assert response.json()["evaluations_updated"] == 1
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.outbox import OutboxDispatcher, publish, subscribe
+from app.crud.crud_evaluation import create_evaluation, delete_evaluation
+from app.crud.crud_service import recompute_service_ratings
+from app.models import Country, OutboxEvent, Service, User
+from app.models.user import UserRole
+from app.schemas.evaluation import EvaluationCreate
+
+delivered = []
+
+
+@subscribe("test.recorded")
+def record(db, events):
+    delivered.append([event.payload["value"] for event in events])
+
+
+@subscribe("test.poison")
+def poison(db, events):
+    if any(event.payload["value"] == "bad" for event in events):
+        raise RuntimeError("cannot handle this event")
+    delivered.append([event.payload["value"] for event in events])
+
+
+@pytest.fixture(autouse=True)
+def clear_delivered():
+    delivered.clear()
+
+
+def test_events_are_committed_with_the_write_and_delivered_in_batches(session):
+    publish(session, "test.recorded", payload={"value": "rolled back"})
+    session.rollback()
+    for value in ("a", "b", "c"):
+        publish(session, "test.recorded", payload={"value": value})
+    session.commit()
+
+    dispatcher = OutboxDispatcher(batch_size=2)
+    assert dispatcher.drain(session) == 3
+    assert delivered == [["a", "b"], ["c"]]
+    assert session.query(OutboxEvent).filter(OutboxEvent.processed_at.is_(None)).count() == 0
+    assert dispatcher.drain(session) == 0
+
+    # Processed events are purged after the retention period
+    session.query(OutboxEvent).update({OutboxEvent.processed_at: datetime.utcnow() - timedelta(days=30)})
+    session.commit()
+    assert dispatcher.purge(session) == 3
+
+
+def test_failing_events_are_isolated_and_retried(session):
+    for value in ("good", "bad", "fine"):
+        publish(session, "test.poison", payload={"value": value})
+    session.commit()
+
+    dispatcher = OutboxDispatcher(max_attempts=2)
+    assert dispatcher.run_once(session) == 3
+    assert delivered == [["good"], ["fine"]]
+    bad = session.query(OutboxEvent).filter(OutboxEvent.processed_at.is_(None)).one()
+    assert (bad.attempts, bad.last_error) == (1, "RuntimeError: cannot handle this event")
+    assert bad.available_at > datetime.utcnow()
+    # Backing off
+    assert dispatcher.run_once(session) == 0
+
+    bad.available_at = datetime.utcnow()
+    session.commit()
+    assert dispatcher.run_once(session) == 1
+    bad.available_at = datetime.utcnow()
+    session.commit()
+    # Given up after max_attempts, left for inspection
+    assert dispatcher.run_once(session) == 0
+    assert dispatcher.stats()["failures"] == 2
+
+
+def test_service_rating_is_refreshed_asynchronously_and_idempotently(session):
+    country = Country(name="Testland", code="TL")
+    service = Service(name="Town hall", category="public", country=country)
+    user = User(username="author", email="author@example.com", full_name="Author",
+                hashed_password="secret-hash", role=UserRole.user)
+    session.add_all([country, service, user])
+    session.commit()
+
+    create_evaluation(session, EvaluationCreate(service_id=service.id, score=8.0), user.id)
+    session.refresh(service)
+    assert service.evaluation_count == 0
+
+    dispatcher = OutboxDispatcher()
+    assert dispatcher.drain(session) == 1
+    session.refresh(service)
+    assert (service.evaluation_count, service.rating) == (1, pytest.approx(8.0))
+
+    # A redelivered event does not count the evaluation twice
+    session.query(OutboxEvent).filter(OutboxEvent.topic == "evaluation.created").update({OutboxEvent.processed_at: None})
+    session.commit()
+    # Along with the service.rating_changed event published by the first delivery
+    assert dispatcher.drain(session) == 2
+    session.refresh(service)
+    assert (service.evaluation_count, service.score_sum) == (1, pytest.approx(8.0))
+
+
+def test_mixed_topic_batches_are_applied_in_order(session):
+    country = Country(name="Testland", code="TL")
+    service, other = (Service(name=name, category="public", country=country) for name in ("Town hall", "Library"))
+    user = User(username="author", email="author@example.com", full_name="Author",
+                hashed_password="secret-hash", role=UserRole.user)
+    session.add_all([country, service, other, user])
+    session.commit()
+    create_evaluation(session, EvaluationCreate(service_id=service.id, score=5.0), user.id)
+    elsewhere = create_evaluation(session, EvaluationCreate(service_id=other.id, score=3.0), user.id)
+    dispatcher = OutboxDispatcher()
+    dispatcher.drain(session)
+
+    # One batch: deleted (other service), created, deleted (same evaluation)
+    delete_evaluation(session, elsewhere.id, user.id)
+    added = create_evaluation(session, EvaluationCreate(service_id=service.id, score=8.0), user.id)
+    delete_evaluation(session, added.id, user.id)
+    dispatcher.drain(session)
+
+    session.refresh(service)
+    assert (service.evaluation_count, service.score_sum, service.rating) == (1, pytest.approx(5.0), pytest.approx(5.0))
+    recompute_service_ratings(session, [service.id])
+    session.refresh(service)
+    assert (service.evaluation_count, service.score_sum) == (1, pytest.approx(5.0))
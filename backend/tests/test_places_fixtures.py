@@ -0,0 +1,52 @@
+from app.services.google_places import GooglePlacesService
+from app.services.places_fixtures import (
+    RecordingTransport, ReplayTransport, SyntheticPlacesTransport, generate_places
+)
+
+
+class FakeTransport:
+    """Transport en mémoire simulant l'API réelle"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, endpoint, params):
+        self.calls += 1
+        if endpoint == "textsearch":
+            return {"status": "OK", "results": [{"place_id": "abc", "name": params["query"]}]}
+        return {"status": "OK", "result": {"name": "Mairie", "types": ["city_hall"]}}
+
+
+def test_generate_places_is_deterministic():
+    assert generate_places(50, seed=3) == generate_places(50, seed=3)
+    assert generate_places(50, seed=3) != generate_places(50, seed=4)
+
+
+def test_record_then_replay(tmp_path):
+    archive = str(tmp_path / "places.jsonl.gz")
+    inner = FakeTransport()
+    recorder = GooglePlacesService(transport=RecordingTransport(inner, archive))
+
+    recorded_search = recorder.search_places("mairie rabat")
+    recorded_details = recorder.get_place_details("abc")
+    assert inner.calls == 2
+
+    replayer = GooglePlacesService(transport=ReplayTransport(archive))
+    assert replayer.search_places("mairie rabat") == recorded_search
+    assert replayer.get_place_details("abc") == recorded_details
+
+    # Une requête jamais enregistrée ne doit pas lever d'exception
+    assert replayer.search_places("tribunal paris")["status"] == "NOT_FOUND"
+
+
+def test_synthetic_transport_feeds_enrichment():
+    service = GooglePlacesService(transport=SyntheticPlacesTransport(count=100, seed=1))
+
+    search = service.search_places("préfecture casablanca")
+    assert search["status"] == "OK"
+    assert len(search["results"]) == 20
+    assert search == service.search_places("préfecture casablanca")
+
+    enriched = service.enrich_service({"name": "Préfecture", "address": "Casablanca"})
+    assert enriched["address"]
+    assert enriched["latitude"] is not None
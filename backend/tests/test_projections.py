@@ -0,0 +1,97 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.deps import parse_fields
+from app.crud.crud_auth import get_user_rows
+from app.crud.crud_evaluation import EVALUATION_LIST_FIELDS, get_evaluation_rows
+from app.crud.crud_evaluation_vote import get_user_votes_for_evaluations
+from app.crud.crud_service import get_service_rows
+from app.models import Country, Evaluation, EvaluationVote, Service, User
+from app.models.user import UserRole
+
+
+@pytest.fixture
+def evaluation(session):
+    country = Country(name="Testland", code="TL")
+    user = User(username="alice", email="alice@example.com", full_name="Alice",
+                hashed_password="secret-hash", role=UserRole.user)
+    voter = User(username="bob", email="bob@example.com", full_name="Bob",
+                 hashed_password="secret-hash", role=UserRole.user)
+    service = Service(name="Town hall", category="public", country=country, rating=None)
+    evaluation = Evaluation(user=user, service=service, score=7.5, comment="Fine",
+                            timestamp=datetime(2024, 1, 1))
+    session.add_all([country, user, voter, service, evaluation])
+    session.flush()
+    session.add_all([
+        EvaluationVote(evaluation_id=evaluation.id, voter_id=voter.id, is_helpful=True),
+        EvaluationVote(evaluation_id=evaluation.id, voter_id=user.id, is_helpful=False),
+        EvaluationVote(evaluation_id=evaluation.id, voter_id=uuid.uuid4(), is_helpful=True),
+    ])
+    session.commit()
+    return evaluation
+
+
+def test_evaluation_rows_default_shape(session, evaluation):
+    items, total = get_evaluation_rows(session, page=1, limit=10)
+
+    assert total == 1
+    item = items[0]
+    assert list(item) == list(EVALUATION_LIST_FIELDS)
+    assert item["id"] == evaluation.id
+    assert item["user"]["username"] == "alice"
+    assert "hashed_password" not in item["user"]
+    assert item["service"]["rating"] == 0.0
+    assert (item["helpful_votes"], item["unhelpful_votes"]) == (2, 1)
+
+
+def test_evaluation_rows_projection(session, evaluation):
+    items, _ = get_evaluation_rows(session, fields=["id", "score", "service"])
+
+    assert items == [{
+        "id": evaluation.id,
+        "score": 7.5,
+        "service": {
+            "id": evaluation.service_id,
+            "name": "Town hall",
+            "category": "public",
+            "country_id": evaluation.service.country_id,
+            "rating": 0.0,
+        },
+    }]
+
+
+def test_evaluation_rows_embed_my_vote(session, evaluation):
+    alice = session.query(User).filter(User.username == "alice").one()
+    stranger = uuid.uuid4()
+
+    items, _ = get_evaluation_rows(session, fields=["score"], voter_id=alice.id)
+    assert items == [{"score": 7.5, "my_vote": False}]
+    items, _ = get_evaluation_rows(session, fields=["score"], voter_id=stranger)
+    assert items == [{"score": 7.5, "my_vote": None}]
+
+    other = uuid.uuid4()
+    assert get_user_votes_for_evaluations(session, [evaluation.id, other, evaluation.id], alice.id) == {
+        evaluation.id: False
+    }
+    assert get_user_votes_for_evaluations(session, [evaluation.id], stranger) == {}
+
+
+def test_service_and_user_projections(session, evaluation):
+    assert get_service_rows(session, fields=["name"]) == [{"name": "Town hall"}]
+
+    items, total = get_user_rows(session, fields=["username"], sort_by="username", sort_order="desc")
+    assert total == 2
+    assert items == [{"username": "bob"}, {"username": "alice"}]
+
+
+def test_parse_fields_rejects_unknown_fields():
+    assert parse_fields(None, ("id", "name")) is None
+    assert parse_fields(" name, id ,name", ("id", "name")) == ["name", "id"]
+
+    with pytest.raises(HTTPException) as error:
+        parse_fields("id,hashed_password", ("id", "name"))
+    assert error.value.status_code == 400
+    assert "hashed_password" in error.value.detail
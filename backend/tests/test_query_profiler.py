@@ -0,0 +1,33 @@
+from sqlalchemy import create_engine, text
+
+from app.core.query_profiler import record_queries, statement_shape
+
+
+def test_statement_shape_folds_literals_and_in_lists():
+    assert statement_shape("SELECT *  FROM users\nWHERE id = 42") == "SELECT * FROM users WHERE id = ?"
+    assert (
+        statement_shape("SELECT * FROM users WHERE id IN (?, ?, ?)")
+        == statement_shape("SELECT * FROM users WHERE id IN (?)")
+    )
+
+
+def test_repeated_statements_are_flagged_as_n_plus_one():
+    engine = create_engine("sqlite://")
+
+    with record_queries(engine, n_plus_one_threshold=3) as profile:
+        with engine.connect() as conn:
+            for i in range(5):
+                conn.execute(text("SELECT :value"), {"value": i}).scalar()
+            conn.execute(text("SELECT 1 + 1")).scalar()
+
+    assert profile.count == 6
+    assert profile.repeated_shapes() == [("SELECT ?", 5)]
+    assert "possible N+1" in profile.report()
+
+
+def test_query_budget_fixture(query_budget, engine):
+    with query_budget(1) as profile:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1")).scalar()
+
+    assert profile.count == 1
@@ -0,0 +1,205 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.api.deps import decode_cursor, encode_cursor
+from app.core.outbox import outbox_dispatcher
+from app.core.ranking import bayesian_average, category_priors, decay_factor, wilson_lower_bound
+from app.crud.crud_evaluation import create_evaluation, delete_evaluation, get_evaluation_rows, update_evaluation
+from app.crud.crud_evaluation_vote import (
+    create_or_update_evaluation_vote, delete_evaluation_vote, recompute_evaluation_helpfulness
+)
+from app.crud.crud_service import apply_service_score_delta, get_service_rows, recompute_service_ratings
+from app.models import Country, Evaluation, Service, User
+from app.models.user import UserRole
+from app.schemas.evaluation import EvaluationCreate, EvaluationUpdate, EvaluationVoteCreate
+
+
+@pytest.fixture(autouse=True)
+def fresh_category_priors():
+    category_priors.invalidate()
+    yield
+    category_priors.invalidate()
+
+
+def make_users(session, count):
+    users = [
+        User(username=f"user{index}", email=f"user{index}@example.com", full_name=f"User {index}",
+             hashed_password="secret-hash", role=UserRole.user)
+        for index in range(count)
+    ]
+    session.add_all(users)
+    session.commit()
+    return users
+
+
+def test_bayesian_average_prefers_many_good_scores_over_one_perfect():
+    one_perfect = bayesian_average(10.0, 1, prior_mean=6.0, prior_weight=10)
+    many_good = bayesian_average(9.2 * 5000, 5000, prior_mean=6.0, prior_weight=10)
+
+    assert many_good > one_perfect
+    assert bayesian_average(0.0, 0, prior_mean=6.0, prior_weight=10) == 6.0
+
+
+def test_wilson_lower_bound():
+    assert wilson_lower_bound(0, 0) == 0.0
+    assert wilson_lower_bound(1, 1) < wilson_lower_bound(90, 100)
+    assert wilson_lower_bound(90, 100) == pytest.approx(0.8256, abs=1e-4)
+    assert 0.0 <= wilson_lower_bound(0, 10) < wilson_lower_bound(5, 10) < 0.5
+
+
+def test_evaluation_writes_maintain_service_totals(session):
+    country = Country(name="Testland", code="TL")
+    service = Service(name="Town hall", category="public", country=country)
+    session.add_all([country, service])
+    session.commit()
+    alice, bob = make_users(session, 2)
+
+    first = create_evaluation(session, EvaluationCreate(service_id=service.id, score=8.0), alice.id)
+    create_evaluation(session, EvaluationCreate(service_id=service.id, score=4.0), bob.id)
+    update_evaluation(session, first.id, EvaluationUpdate(score=10.0), alice.id)
+    # Ratings are refreshed by the outbox dispatcher
+    assert outbox_dispatcher.drain(session) == 3
+
+    session.refresh(service)
+    assert service.evaluation_count == 2
+    assert service.score_sum == pytest.approx(14.0)
+    assert service.rating == pytest.approx(7.0)
+    # A single category with few evaluations: the prior is the default
+    assert service.ranking_score == pytest.approx(bayesian_average(14.0, 2, 5.0))
+
+    delete_evaluation(session, first.id, alice.id)
+    outbox_dispatcher.drain(session)
+    session.refresh(service)
+    assert (service.evaluation_count, service.rating) == (1, pytest.approx(4.0))
+
+    # Incremental totals agree with a full rebuild, which also refreshes the
+    # cached prior (now the global mean, 4.0)
+    expected = (service.evaluation_count, service.score_sum, service.rating)
+    assert recompute_service_ratings(session) == 1
+    session.refresh(service)
+    assert (service.evaluation_count, service.score_sum, service.rating) == pytest.approx(expected)
+    assert service.ranking_score == pytest.approx(bayesian_average(4.0, 1, 4.0))
+
+
+def test_decayed_rating_is_maintained_lazily(session):
+    country = Country(name="Testland", code="TL")
+    service = Service(name="Town hall", category="public", country=country)
+    session.add_all([country, service])
+    session.commit()
+    start = datetime(2020, 1, 1)
+    two_half_lives = start + timedelta(days=730)
+
+    apply_service_score_delta(session, service.id, 1, 2.0, evaluated_at=start, now=start)
+    apply_service_score_delta(session, service.id, 1, 10.0, evaluated_at=two_half_lives, now=two_half_lives)
+    session.refresh(service)
+    assert service.rating == pytest.approx(6.0)
+    assert service.decayed_rating == pytest.approx((0.25 * 2.0 + 10.0) / 1.25)
+    assert service.decay_reference == two_half_lives
+
+    # Removing the old evaluation later subtracts its decayed weight
+    later = two_half_lives + timedelta(days=365)
+    apply_service_score_delta(session, service.id, -1, -2.0, evaluated_at=start, now=later)
+    session.refresh(service)
+    assert service.decayed_rating == pytest.approx(10.0)
+    assert service.decayed_weight == pytest.approx(0.5)
+
+
+def test_recompute_rebuilds_decayed_rating(session):
+    country = Country(name="Testland", code="TL")
+    service = Service(name="Town hall", category="public", country=country)
+    session.add_all([country, service])
+    session.commit()
+    old_user, new_user = make_users(session, 2)
+    old = create_evaluation(session, EvaluationCreate(service_id=service.id, score=2.0), old_user.id)
+    create_evaluation(session, EvaluationCreate(service_id=service.id, score=9.0), new_user.id)
+    old.timestamp = datetime.utcnow() - timedelta(days=365)
+    session.commit()
+
+    recompute_service_ratings(session, [service.id])
+    session.refresh(service)
+    assert service.rating == pytest.approx(5.5)
+    assert service.decayed_rating == pytest.approx((0.5 * 2.0 + 9.0) / 1.5, rel=1e-4)
+    assert decay_factor(timedelta(days=-1)) == 1.0
+
+    # The pending delta events were counted by the rebuild, not applied again
+    outbox_dispatcher.drain(session)
+    session.refresh(service)
+    assert (service.evaluation_count, service.score_sum) == (2, pytest.approx(11.0))
+
+
+def test_sort_services_by_ranking(session):
+    country = Country(name="Testland", code="TL")
+    lucky = Service(name="One perfect", category="public", country=country)
+    steady = Service(name="Many good", category="public", country=country)
+    session.add_all([country, lucky, steady])
+    session.commit()
+    users = make_users(session, 30)
+
+    create_evaluation(session, EvaluationCreate(service_id=lucky.id, score=10.0), users[0].id)
+    for user in users:
+        create_evaluation(session, EvaluationCreate(service_id=steady.id, score=9.0), user.id)
+    outbox_dispatcher.drain(session)
+
+    by_rating = get_service_rows(session, fields=["name"], sort_by="rating")
+    by_ranking = get_service_rows(session, fields=["name"], sort_by="ranking", category="public")
+    assert [row["name"] for row in by_rating] == ["One perfect", "Many good"]
+    assert [row["name"] for row in by_ranking] == ["Many good", "One perfect"]
+
+
+def test_votes_maintain_helpfulness(session):
+    country = Country(name="Testland", code="TL")
+    service = Service(name="Town hall", category="public", country=country)
+    session.add_all([country, service])
+    session.commit()
+    author, *voters = make_users(session, 4)
+    evaluation = create_evaluation(session, EvaluationCreate(service_id=service.id, score=7.0), author.id)
+
+    for voter in voters:
+        create_or_update_evaluation_vote(session, EvaluationVoteCreate(evaluation_id=evaluation.id, is_helpful=True), voter.id)
+    # Changing a vote moves it between counters, deleting removes it
+    create_or_update_evaluation_vote(session, EvaluationVoteCreate(evaluation_id=evaluation.id, is_helpful=False), voters[0].id)
+    delete_evaluation_vote(session, evaluation.id, voters[1].id)
+
+    session.refresh(evaluation)
+    assert (evaluation.helpful_count, evaluation.unhelpful_count) == (1, 1)
+    assert evaluation.helpfulness == pytest.approx(wilson_lower_bound(1, 2))
+
+    session.query(Evaluation).update({Evaluation.helpful_count: 0, Evaluation.helpfulness: 0.0})
+    recompute_evaluation_helpfulness(session, [evaluation.id])
+    session.refresh(evaluation)
+    assert (evaluation.helpful_count, evaluation.unhelpful_count) == (1, 1)
+    assert evaluation.helpfulness == pytest.approx(wilson_lower_bound(1, 2))
+
+
+def test_helpfulness_keyset_pagination(session):
+    country = Country(name="Testland", code="TL")
+    service = Service(name="Town hall", category="public", country=country)
+    session.add_all([country, service])
+    session.commit()
+    users = make_users(session, 25)
+    for index, user in enumerate(users):
+        evaluation = create_evaluation(session, EvaluationCreate(service_id=service.id, score=5.0), user.id)
+        # Many ties, which the id tie-break must order consistently
+        evaluation.helpfulness = wilson_lower_bound(index % 4, 4)
+    session.commit()
+
+    expected, _ = get_evaluation_rows(session, limit=100, service_id=service.id, sort_by="helpfulness")
+    assert [item["helpfulness"] for item in expected] == sorted((item["helpfulness"] for item in expected), reverse=True)
+
+    seen, after = [], None
+    while True:
+        items, total = get_evaluation_rows(
+            session, limit=4, service_id=service.id, sort_by="helpfulness",
+            after=after, include_total=False
+        )
+        assert total is None
+        seen.extend(item["id"] for item in items)
+        if len(items) < 4:
+            break
+        after = decode_cursor(encode_cursor([items[-1]["helpfulness"], items[-1]["id"]]))
+
+    assert seen == [item["id"] for item in expected]
+
+    with pytest.raises(ValueError):
+        get_evaluation_rows(session, service_id=service.id, sort_by="comment", after=[1, "x"])
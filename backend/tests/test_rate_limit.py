@@ -0,0 +1,88 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.auth_cache import token_user_cache
+from app.core.rate_limit import MemoryBucketStore, RateLimiter, RateLimitMiddleware, parse_rate
+
+
+def test_parse_rate():
+    assert parse_rate("10/minute") == (10, 60.0)
+    assert parse_rate("1 / Second").interval == 1.0
+    for invalid in ("10", "ten/minute", "10/week", "0/minute"):
+        with pytest.raises(ValueError):
+            parse_rate(invalid)
+
+
+def test_buckets_allow_bursts_and_refill_continuously():
+    store = MemoryBucketStore(max_size=100)
+    # 3 tokens, one more every 2 seconds
+    assert [store.acquire("client", 0.0, 2.0, 3) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert store.acquire("client", 0.0, 2.0, 3) == pytest.approx(2.0)
+    assert store.acquire("client", 1.5, 2.0, 3) == pytest.approx(0.5)
+    assert store.acquire("client", 2.0, 2.0, 3) == 0.0
+    # Other clients have their own bucket
+    assert store.acquire("other", 2.0, 2.0, 3) == 0.0
+    # Full again after 3 * 2 seconds
+    assert [store.acquire("client", 8.0, 2.0, 3) for _ in range(4)][-1] > 0
+
+
+def test_full_buckets_are_dropped_when_the_store_grows():
+    store = MemoryBucketStore(max_size=4)
+    for i in range(4):
+        store.acquire(i, 0.0, 1.0, 5)
+    assert len(store) == 4
+    store.acquire("new", 10.0, 1.0, 5)
+    assert len(store) == 1
+
+    # Too many active clients: the buckets closest to full are forgotten
+    for i in range(4):
+        store.acquire(i, 10.0, 1.0, 5)
+    store.acquire(3, 10.0, 1.0, 5)
+    assert len(store) == 2
+    assert store.acquire(3, 10.0, 1.0, 5) == 0.0 and len(store) == 2
+
+
+def limited_app(limiter):
+    app = FastAPI()
+
+    @app.post("/api/auth/login")
+    def login():
+        return {"ok": True}
+
+    @app.get("/api/auth/login")
+    def login_page():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    return TestClient(app)
+
+
+def test_limited_routes_answer_429_with_retry_after():
+    limiter = RateLimiter({"POST /auth/login": "2/minute"}, prefix="/api")
+    client = limited_app(limiter)
+
+    assert [client.post("/api/auth/login").status_code for _ in range(2)] == [200, 200]
+    limited = client.post("/api/auth/login/")
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "30"
+    # Other methods and other clients (here a verified user) are not limited
+    assert client.get("/api/auth/login").status_code == 200
+    token_user_cache.set("user-token", "user-1", "user", True)
+    try:
+        assert client.post("/api/auth/login", headers={"Authorization": "Bearer user-token"}).status_code == 200
+    finally:
+        token_user_cache.clear()
+    assert limiter.stats() == {"limited": 1, "buckets": 2}
+
+
+def test_unverified_tokens_share_the_client_address_bucket():
+    limiter = RateLimiter({"POST /auth/login": "2/minute"}, prefix="/api")
+    client = limited_app(limiter)
+
+    statuses = [
+        client.post("/api/auth/login", headers={"Authorization": f"Bearer junk-{attempt}"}).status_code
+        for attempt in range(5)
+    ]
+    assert statuses == [200, 200, 429, 429, 429]
+    assert limiter.stats() == {"limited": 3, "buckets": 1}
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.services.rating_analytics import EPOCH, PERCENTILES, compute_bulk_stats
+
+NOW = datetime(2024, 6, 1)
+
+
+def synthetic_columns(seed=0):
+    rng = np.random.default_rng(seed)
+    service_ids = [uuid4() for _ in range(4)]
+    sizes = [50, 1, 0, 200]  # includes a single-evaluation and an empty service
+    groups = np.repeat(np.arange(4), sizes)
+    scores = np.round(rng.uniform(0, 10, groups.size), 1)
+    ages = rng.uniform(0, 120, groups.size)
+    times = (NOW - EPOCH).total_seconds() - ages * 86400
+    order = rng.permutation(groups.size)
+    return service_ids, groups[order], scores[order], times[order], ages[order]
+
+
+def test_bulk_stats_match_per_service_reference():
+    service_ids, groups, scores, times, ages = synthetic_columns()
+
+    results = compute_bulk_stats(service_ids, groups, scores, times, now=NOW)
+
+    for index, result in enumerate(results):
+        own = scores[groups == index]
+        own_ages = ages[groups == index]
+        assert result["service_id"] == service_ids[index]
+        assert result["count"] == own.size
+        assert sum(result["score_distribution"].values()) == own.size
+        if own.size == 0:
+            assert result["average_score"] is None
+            assert result["percentiles"]["p50"] is None
+            continue
+
+        assert result["average_score"] == pytest.approx(own.mean())
+        expected = np.percentile(own, PERCENTILES)
+        assert list(result["percentiles"].values()) == pytest.approx(list(expected))
+
+        recent = own[own_ages < 30]
+        previous = own[(own_ages >= 30) & (own_ages < 60)]
+        if recent.size or previous.size:
+            expected_trend = (recent.mean() if recent.size else 0.0) - (previous.mean() if previous.size else 0.0)
+            assert result["recent_trend"] == pytest.approx(expected_trend)
+
+        if own.size > 1:
+            assert result["std_dev"] == pytest.approx(own.std(ddof=1))
+            low, high = result["confidence_interval"]
+            assert low < result["average_score"] < high
+            slope = np.polyfit(-own_ages, own, 1)[0] * 30
+            assert result["trend_slope"] == pytest.approx(slope)
+        else:
+            assert result["std_dev"] is None
+            assert result["trend_slope"] is None
+
+
+def test_rolling_average_uses_trailing_windows():
+    service_ids = [uuid4()]
+    ages = np.array([1.0, 2.0, 8.0, 20.0, 40.0])
+    scores = np.array([10.0, 8.0, 6.0, 4.0, 2.0])
+    times = (NOW - EPOCH).total_seconds() - ages * 86400
+    groups = np.zeros(ages.size, dtype=np.int64)
+
+    result = compute_bulk_stats(
+        service_ids, groups, scores, times, now=NOW, bucket_days=7, buckets=3, rolling_buckets=2
+    )[0]
+
+    points = result["rolling_average"]
+    assert [point["period_end"] for point in points] == [NOW - timedelta(days=14), NOW - timedelta(days=7), NOW]
+    # Windows of two weeks ending now, a week ago and two weeks ago
+    assert [point["count"] for point in points] == [1, 2, 3]
+    assert [point["average"] for point in points] == pytest.approx([4.0, 5.0, 8.0])
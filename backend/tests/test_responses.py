@@ -0,0 +1,38 @@
+import json
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from app.core import responses
+from app.core.responses import FastJSONResponse
+from app.models.evaluation import EvaluationStatus
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_fast_json_response_matches_stdlib_encoding(monkeypatch, use_orjson):
+    if use_orjson and responses.orjson is None:
+        pytest.skip("orjson is not installed")
+    if not use_orjson:
+        monkeypatch.setattr(responses, "orjson", None)
+
+    evaluation_id = uuid4()
+    content = {
+        "id": evaluation_id,
+        "timestamp": datetime(2024, 5, 1, 12, 30, 15, 250),
+        "status": EvaluationStatus.APPROVED,
+        "score": 8.5,
+        "comment": "Très bien",
+        "items": [],
+    }
+
+    body = FastJSONResponse(content).body
+
+    assert json.loads(body) == {
+        "id": str(evaluation_id),
+        "timestamp": "2024-05-01T12:30:15.000250",
+        "status": "approved",
+        "score": 8.5,
+        "comment": "Très bien",
+        "items": [],
+    }
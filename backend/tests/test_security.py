@@ -0,0 +1,90 @@
+import threading
+import time
+from datetime import timedelta
+from uuid import uuid4
+
+import pytest
+from jose import jwt
+from passlib.hash import bcrypt
+
+from app.core.auth_cache import TokenUserCache
+from app.core.config import settings
+from app.core.password_pool import PasswordHashPool, PasswordHashPoolBusy
+from app.core.security import (
+    create_access_token, decode_access_token, verify_password_and_update, verify_token
+)
+
+
+def test_fast_path_matches_jose():
+    user_id = uuid4()
+    token = create_access_token(user_id)
+
+    expected = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    assert decode_access_token(token) == expected
+    assert verify_token(token) == str(user_id)
+
+
+def test_rejects_tampered_and_expired_tokens():
+    token = create_access_token(uuid4())
+    header, payload, signature = token.split(".")
+    forged = jwt.encode({"sub": "intruder"}, "wrong-secret", algorithm=settings.ALGORITHM)
+
+    assert verify_token(f"{header}.{forged.split('.')[1]}.{signature}") is None
+    assert verify_token(forged) is None
+    assert verify_token("not-a-token") is None
+    assert verify_token(create_access_token(uuid4(), expires_delta=timedelta(seconds=-1))) is None
+
+
+def test_token_cache_invalidation_and_eviction():
+    cache = TokenUserCache(ttl_seconds=60, max_size=2)
+    alice, bob = uuid4(), uuid4()
+
+    cache.set("t1", alice, "user", True)
+    cache.set("t2", alice, "user", True)
+    assert cache.get("t1").id == alice
+
+    cache.invalidate_user(alice)
+    assert cache.get("t1") is None
+    assert cache.get("t2") is None
+
+    cache.set("t1", alice, "user", True)
+    cache.set("t2", bob, "admin", True)
+    cache.set("t3", bob, "admin", True)
+    assert len(cache) == 2
+    assert cache.get("t1") is None
+
+
+def test_token_cache_respects_token_expiry():
+    cache = TokenUserCache(ttl_seconds=60, max_size=10)
+
+    cache.set("expired", uuid4(), "user", True, token_exp=time.time() - 1)
+    assert cache.get("expired") is None
+
+
+def test_password_pool_rejects_when_queue_is_full():
+    pool = PasswordHashPool(workers=0, max_concurrency=1, max_queue=0)
+    release = threading.Event()
+    worker = threading.Thread(target=pool.run, args=(release.wait,))
+    worker.start()
+    while pool.stats()["in_flight"] == 0:
+        time.sleep(0.001)
+
+    with pytest.raises(PasswordHashPoolBusy):
+        pool.run(lambda: None)
+
+    release.set()
+    worker.join()
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 1
+
+
+def test_rehash_when_work_factor_changes():
+    old_hash = bcrypt.using(rounds=4).hash("secret")
+
+    is_valid, new_hash = verify_password_and_update("secret", old_hash)
+    assert is_valid
+    assert new_hash is not None
+    assert f"${settings.PASSWORD_BCRYPT_ROUNDS:02d}$" in new_hash
+
+    assert verify_password_and_update("wrong", old_hash) == (False, None)
@@ -1,2 +1,22 @@
 import pytest
 from fastapi.testclient import TestClient
+
+from app.models import Country, Service
+
+
+def test_list_services_includes_the_country_on_request(client, session, query_budget):
+    country = Country(name="Testland", code="TL", region="Test Region")
+    session.add_all([Service(name="Town hall", category="public", country=country),
+                     Service(name="Library", category="culture", country=country)])
+    session.commit()
+
+    plain = client.get("/api/v1/services/").json()
+    assert len(plain) == 2 and all("country" not in item for item in plain)
+
+    with query_budget(1):
+        items = client.get("/api/v1/services/", params={"include_country": True, "fields": "name,country_id"}).json()
+    expected_country = {"id": str(country.id), "name": "Testland", "region": "Test Region"}
+    assert sorted(items, key=lambda item: item["name"]) == [
+        {"name": "Library", "country_id": str(country.id), "country": expected_country},
+        {"name": "Town hall", "country_id": str(country.id), "country": expected_country},
+    ]
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.models import Country, Evaluation, Service, User
+from app.models.evaluation import EvaluationStatus
+from app.models.user import UserRole
+from app.services.spam_detection import (
+    SIGNAL_BURST, SIGNAL_DUPLICATE, SIGNAL_OUTLIER, SpamDetector, screen_evaluation, spam_detector
+)
+
+COMMENT = "The staff at the front desk were rude and the waiting time was over three hours"
+NOW = datetime(2024, 6, 1, 12, 0)
+
+
+def test_near_duplicates_are_detected():
+    detector = SpamDetector(index_size=100)
+    assert detector.check(1, "a", COMMENT, 5.0, NOW) == []
+    assert detector.check(2, "b", COMMENT.upper() + "!!", 5.0, NOW) == [SIGNAL_DUPLICATE]
+    assert detector.check(3, "c", "Clean building, friendly agents and my passport was ready in a week", 5.0, NOW) == []
+    # Short comments are never compared
+    assert detector.check(4, "d", "Great", 5.0, NOW) == []
+    assert detector.check(5, "e", "Great", 5.0, NOW) == []
+
+
+def test_index_is_bounded():
+    detector = SpamDetector(index_size=3)
+    for index in range(10):
+        detector.check(index, index, f"{COMMENT} variant number {index}" * 2, 5.0, NOW)
+    assert len(detector) == 3
+    assert all(len(bucket) <= 3 for bucket in detector._buckets.values())
+
+
+def test_bursts_and_outliers():
+    detector = SpamDetector()
+    signals = [
+        detector.check(index, "user", None, 5.0, NOW + timedelta(seconds=index))
+        for index in range(settings.SPAM_BURST_MAX_SUBMISSIONS + 1)
+    ]
+    assert signals[-2:] == [[], [SIGNAL_BURST]]
+    later = NOW + timedelta(seconds=settings.SPAM_BURST_WINDOW_SECONDS + 60)
+    assert detector.check("late", "user", None, 5.0, later) == []
+
+    count = settings.SPAM_OUTLIER_MIN_EVALUATIONS
+    assert detector.check("low", "other", None, 1.0, NOW, service_mean=9.0, service_count=count) == [SIGNAL_OUTLIER]
+    assert detector.check("few", "other", None, 1.0, NOW, service_mean=9.0, service_count=count - 1) == []
+
+
+@pytest.fixture(autouse=True)
+def clear_spam_detector():
+    spam_detector.clear()
+    yield
+    spam_detector.clear()
+
+
+def test_screen_evaluation_flags_pending_duplicates(session):
+    country = Country(name="Testland", code="TL")
+    service = Service(name="Town hall", category="public", country=country, evaluation_count=3, score_sum=15.0)
+    users = [
+        User(username=f"user{index}", email=f"user{index}@example.com", full_name=f"User {index}",
+             hashed_password="secret-hash", role=UserRole.user)
+        for index in range(3)
+    ]
+    session.add_all([country, service, *users])
+    session.commit()
+
+    def submit(user, status, minutes_ago):
+        evaluation = Evaluation(user_id=user.id, service_id=service.id, score=5.0, comment=COMMENT, status=status,
+                                timestamp=datetime.utcnow() - timedelta(minutes=minutes_ago))
+        session.add(evaluation)
+        session.commit()
+        return evaluation
+
+    original = submit(users[0], EvaluationStatus.APPROVED, 3)
+    # Indexed at warm up
+    assert screen_evaluation(original.id, session) == []
+
+    copy = submit(users[1], EvaluationStatus.PENDING, 2)
+    reviewed = submit(users[2], EvaluationStatus.APPROVED, 1)
+    assert screen_evaluation(copy.id, session) == [SIGNAL_DUPLICATE]
+    assert screen_evaluation(reviewed.id, session) == [SIGNAL_DUPLICATE]
+
+    session.refresh(copy)
+    session.refresh(reviewed)
+    assert copy.status == EvaluationStatus.FLAGGED
+    # A moderation decision is never overridden
+    assert reviewed.status == EvaluationStatus.APPROVED
+
+
+def test_submissions_are_counted_once(session):
+    country = Country(name="Testland", code="TL")
+    service = Service(name="Town hall", category="public", country=country)
+    user = User(username="author", email="author@example.com", full_name="Author",
+                hashed_password="secret-hash", role=UserRole.user)
+    session.add_all([country, service, user])
+    session.commit()
+    evaluations = [
+        Evaluation(user_id=user.id, service_id=service.id, score=5.0, status=EvaluationStatus.PENDING,
+                   timestamp=datetime.utcnow() - timedelta(seconds=10 * index))
+        for index in range(settings.SPAM_BURST_MAX_SUBMISSIONS)
+    ]
+    session.add_all(evaluations)
+    session.commit()
+
+    # Exactly the limit: the screened evaluation, already in the database,
+    # is not counted both at warm up and when checked
+    assert screen_evaluation(evaluations[0].id, session) == []
+    # Screening it again (a redelivered event) does not add a submission
+    assert screen_evaluation(evaluations[0].id, session) == []
+    assert spam_detector.check("next", user.id, None, 5.0, datetime.utcnow()) == [SIGNAL_BURST]
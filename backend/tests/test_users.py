@@ -16,8 +16,9 @@ def admin_token_headers(client: TestClient, db: Session):
     admin_user = UserCreate(
         username="admin",
         email="admin@example.com",
+        full_name="Admin User",
         password="admin123",
-        role=UserRole.ADMIN
+        role=UserRole.admin
     )
     
     # Add admin to database
@@ -42,6 +43,7 @@ def normal_user_token_headers(client: TestClient, db: Session):
     normal_user = UserCreate(
         username="normaluser",
         email="user@example.com",
+        full_name="Normal User",
         password="user123"
     )
     
@@ -213,3 +215,40 @@ def test_delete_admin_self(client: TestClient, admin_token_headers):
     # Try to delete self
     response = client.delete("/api/v1/users/1", headers=admin_token_headers)
     assert response.status_code == 400
+
+
+def test_bulk_deactivate_users_admin(client: TestClient, admin_token_headers, db: Session):
+    """Test that admin can deactivate many users at once"""
+    user_ids = [
+        str(create_user(db, UserCreate(
+            username=f"bulkuser{i}",
+            email=f"bulk{i}@example.com",
+            full_name=f"Bulk User {i}",
+            password="bulk123"
+        )).id)
+        for i in range(3)
+    ]
+    
+    response = client.post(
+        "/api/v1/users/bulk",
+        headers=admin_token_headers,
+        json={"user_ids": user_ids, "action": "deactivate"}
+    )
+    assert response.status_code == 200
+    assert response.json()["users_updated"] == 3
+    
+    for user_id in user_ids:
+        data = client.get(f"/api/v1/users/{user_id}", headers=admin_token_headers).json()
+        assert data["is_active"] is False
+
+
+def test_bulk_update_users_normal_user(client: TestClient, normal_user_token_headers):
+    """Test that normal user cannot run bulk operations"""
+    token_headers, user_id = normal_user_token_headers
+    
+    response = client.post(
+        "/api/v1/users/bulk",
+        headers=token_headers,
+        json={"user_ids": [str(user_id)], "action": "anonymize"}
+    )
+    assert response.status_code == 403
@@ -0,0 +1,94 @@
+import pytest
+
+from app.core.ranking import wilson_lower_bound
+from app.core.vote_buffer import VoteBuffer
+from app.crud.crud_evaluation_vote import write_evaluation_votes
+from app.models import Country, Evaluation, EvaluationVote, Service, User
+from app.models.user import UserRole
+
+
+@pytest.fixture
+def world(session):
+    country = Country(name="Testland", code="TL")
+    service = Service(name="Town hall", category="public", country=country)
+    users = [
+        User(username=f"user{index}", email=f"user{index}@example.com", full_name=f"User {index}",
+             hashed_password="secret-hash", role=UserRole.user)
+        for index in range(3)
+    ]
+    evaluation = Evaluation(user=users[0], service=service, score=7.0)
+    session.add_all([country, service, *users, evaluation])
+    session.commit()
+    return users, evaluation
+
+
+def stored_vote(session, evaluation, voter):
+    vote = session.query(EvaluationVote).filter(
+        EvaluationVote.evaluation_id == evaluation.id, EvaluationVote.voter_id == voter.id
+    ).first()
+    return None if vote is None else vote.is_helpful
+
+
+def test_votes_are_coalesced_and_counted_before_flush(session, world):
+    users, evaluation = world
+    buffer = VoteBuffer(lambda batch: write_evaluation_votes(session, batch), interval_ms=1000, max_pending=100)
+
+    for choice in (True, False, True):
+        buffer.submit(evaluation.id, users[1].id, choice, None, None)
+    buffer.submit(evaluation.id, users[2].id, False, None, None)
+    assert buffer.pending_counts(evaluation.id) == (1, 1)
+    assert buffer.pending_vote(evaluation.id, users[1].id).desired is True
+
+    assert buffer.flush() == 2
+    session.refresh(evaluation)
+    assert (evaluation.helpful_count, evaluation.unhelpful_count) == (1, 1)
+    assert evaluation.helpfulness == pytest.approx(wilson_lower_bound(1, 2))
+    assert session.query(EvaluationVote).count() == 2
+    assert buffer.pending_counts(evaluation.id) == (0, 0)
+    assert buffer.pending_vote(evaluation.id, users[1].id) is None
+
+    # Flip one vote, remove the other
+    buffer.submit(evaluation.id, users[1].id, False, True, None)
+    buffer.submit(evaluation.id, users[2].id, None, False, None)
+    assert buffer.pending_counts(evaluation.id) == (-1, 0)
+    buffer.flush()
+    session.refresh(evaluation)
+    assert (evaluation.helpful_count, evaluation.unhelpful_count) == (0, 1)
+    assert (stored_vote(session, evaluation, users[1]), stored_vote(session, evaluation, users[2])) == (False, None)
+
+
+def test_failed_flush_keeps_votes(session, world):
+    users, evaluation = world
+    failing = [True]
+
+    def writer(batch):
+        if failing[0]:
+            raise RuntimeError("database unavailable")
+        write_evaluation_votes(session, batch)
+
+    buffer = VoteBuffer(writer, interval_ms=1000, max_pending=100)
+    buffer.submit(evaluation.id, users[1].id, True, None, None)
+    assert buffer.flush() == 0
+    assert buffer.stats()["failures"] == 1
+
+    buffer.submit(evaluation.id, users[2].id, True, None, None)
+    assert buffer.pending_counts(evaluation.id) == (2, 0)
+    failing[0] = False
+    assert buffer.flush() == 2
+    session.refresh(evaluation)
+    assert evaluation.helpful_count == 2
+
+
+def test_writer_compares_with_stored_votes(session, world):
+    users, evaluation = world
+    buffer = VoteBuffer(lambda batch: write_evaluation_votes(session, batch), interval_ms=1000, max_pending=100)
+    # The buffer assumed no vote, but one was written elsewhere in the meantime
+    buffer.submit(evaluation.id, users[1].id, True, None, None)
+    session.add(EvaluationVote(evaluation_id=evaluation.id, voter_id=users[1].id, is_helpful=True))
+    session.query(Evaluation).update({Evaluation.helpful_count: 1})
+    session.commit()
+
+    buffer.flush()
+    session.refresh(evaluation)
+    assert evaluation.helpful_count == 1
+    assert session.query(EvaluationVote).count() == 1
@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.crud.crud_evaluation_vote import (
+    create_or_update_evaluation_vote, delete_evaluation_vote, upsert_evaluation_vote
+)
+from app.database import Base
+from app.models import Country, Evaluation, EvaluationVote, Service, User
+from app.models.user import UserRole
+from app.schemas.evaluation import EvaluationVoteCreate
+
+VOTERS = 4
+THREADS_PER_VOTER = 6
+
+
+@pytest.fixture
+def make_session(tmp_path):
+    # A file database so that every thread has its own connection
+    engine = create_engine(f"sqlite:///{tmp_path / 'votes.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def world(make_session):
+    db = make_session()
+    country = Country(name="Testland", code="TL")
+    service = Service(name="Town hall", category="public", country=country)
+    users = [
+        User(username=f"user{index}", email=f"user{index}@example.com", full_name=f"User {index}",
+             hashed_password="secret-hash", role=UserRole.user)
+        for index in range(VOTERS + 1)
+    ]
+    evaluation = Evaluation(user=users[0], service=service, score=7.0)
+    db.add_all([country, service, *users, evaluation])
+    db.commit()
+    ids = [user.id for user in users[1:]], evaluation.id
+    db.close()
+    return ids
+
+
+def test_upsert_reports_created_flipped_and_unchanged(make_session, world):
+    voter_ids, evaluation_id = world
+    db = make_session()
+    assert upsert_evaluation_vote(db, evaluation_id, voter_ids[0], True) == (True, None)
+    assert upsert_evaluation_vote(db, evaluation_id, voter_ids[0], True) == (False, True)
+    assert upsert_evaluation_vote(db, evaluation_id, voter_ids[0], False) == (False, True)
+    assert upsert_evaluation_vote(db, evaluation_id, voter_ids[0], True) == (False, False)
+    db.commit()
+    assert db.query(EvaluationVote).count() == 1
+    db.close()
+
+
+def test_parallel_votes_never_duplicate(make_session, world):
+    voter_ids, evaluation_id = world
+    barrier = threading.Barrier(VOTERS * THREADS_PER_VOTER)
+    errors = []
+
+    def vote(voter_id, is_helpful, delete):
+        db = make_session()
+        try:
+            barrier.wait()
+            create_or_update_evaluation_vote(db, EvaluationVoteCreate(evaluation_id=evaluation_id, is_helpful=is_helpful), voter_id)
+            if delete:
+                delete_evaluation_vote(db, evaluation_id, voter_id)
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [
+        threading.Thread(target=vote, args=(voter_id, index % 2 == 0, voter_index == 0 and index == 0))
+        for voter_index, voter_id in enumerate(voter_ids)
+        for index in range(THREADS_PER_VOTER)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+    db = make_session()
+    per_voter = db.query(EvaluationVote.voter_id, func.count()).group_by(EvaluationVote.voter_id).all()
+    assert all(count == 1 for _, count in per_voter)
+    assert len(per_voter) >= VOTERS - 1
+
+    helpful = db.query(EvaluationVote).filter(EvaluationVote.is_helpful == True).count()
+    unhelpful = db.query(EvaluationVote).filter(EvaluationVote.is_helpful == False).count()
+    evaluation = db.query(Evaluation).filter(Evaluation.id == evaluation_id).one()
+    # The counters agree with the rows whatever the interleaving
+    assert (evaluation.helpful_count, evaluation.unhelpful_count) == (helpful, unhelpful)
+    db.close()